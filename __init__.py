@@ -3,9 +3,11 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from dotenv import load_dotenv
 from flask_migrate import Migrate
+import logging
 import os
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 db = SQLAlchemy()
 cors = CORS()
@@ -23,16 +25,106 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
         SQLALCHEMY_DATABASE_URI=uri,
-        SQLALCHEMY_TRACK_MODIFICATIONS=False
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # In-progress game sessions: 'memory' (single worker) or 'sqlite' (shared by workers on a host)
+        SESSION_STORE_BACKEND=os.environ.get('SESSION_STORE_BACKEND', 'memory'),
+        SESSION_STORE_PATH=os.environ.get('SESSION_STORE_PATH', 'instance/game_sessions.db'),
+        SESSION_TTL_SECONDS=int(os.environ.get('SESSION_TTL_SECONDS', 2 * 60 * 60)),
+        SESSION_STORE_MAX_ENTRIES=int(os.environ.get('SESSION_STORE_MAX_ENTRIES', 10000)),
+        SESSION_SWEEP_INTERVAL=int(os.environ.get('SESSION_SWEEP_INTERVAL', 60)),
+        # Ready-made games per "board:image_count=target", e.g. "classic:10=20,dual:10=5". Empty disables the pool
+        GAME_POOL_SIZES=os.environ.get('GAME_POOL_SIZES', ''),
+        GAME_POOL_OWNER=os.environ.get('GAME_POOL_OWNER', 'admin'),
+        GAME_POOL_REFILL_INTERVAL=int(os.environ.get('GAME_POOL_REFILL_INTERVAL', 5)),
+        GAME_POOL_REFILL_BATCH=int(os.environ.get('GAME_POOL_REFILL_BATCH', 10)),
+        # Seconds between expiry sweeps of the games table; 0 disables the sweeper
+        GAME_EXPIRY_SWEEP_INTERVAL=int(os.environ.get('GAME_EXPIRY_SWEEP_INTERVAL', 60)),
+        GAME_EXPIRY_BATCH_SIZE=int(os.environ.get('GAME_EXPIRY_BATCH_SIZE', 500)),
+        # Seconds between folding guesses and feedback written outside the game service into the
+        # dashboard rollups; 0 disables the catch-up thread
+        GUESS_ROLLUP_INTERVAL=int(os.environ.get('GUESS_ROLLUP_INTERVAL', 300)),
+        # Store new games as a sampling seed instead of one game_images row per image
+        SEEDED_GAMES=os.environ.get('SEEDED_GAMES', 'false').lower() == 'true',
+        # Per-request SQL statement counts, X-Query-* response headers and N+1 warnings
+        QUERY_PROFILER_ENABLED=os.environ.get('QUERY_PROFILER_ENABLED', 'true').lower() == 'true',
+        QUERY_PROFILER_REPEAT_THRESHOLD=int(os.environ.get('QUERY_PROFILER_REPEAT_THRESHOLD', 3)),
+        # Bearer token required for /admin/metrics and /admin/getQueryStats; empty leaves it open like the other admin routes
+        METRICS_TOKEN=os.environ.get('METRICS_TOKEN', ''),
+        LOG_LEVEL=os.environ.get('LOG_LEVEL', 'INFO'),
+        # Per-logger levels, e.g. "services.game_service=DEBUG,middleware.auth=WARNING"
+        LOG_LEVELS=os.environ.get('LOG_LEVELS', ''),
+        # Share of requests whose debug/info records are kept, per endpoint, e.g. "game.get_game=0.1,*=1"
+        LOG_SAMPLE_RATES=os.environ.get('LOG_SAMPLE_RATES', ''),
+        LOG_FORMAT=os.environ.get('LOG_FORMAT', 'json'),
+        # Write logs from a background thread
+        LOG_ASYNC=os.environ.get('LOG_ASYNC', 'true').lower() == 'true',
+        # Verified ID tokens kept in memory; 0 verifies every request with Firebase
+        ID_TOKEN_CACHE_SIZE=int(os.environ.get('ID_TOKEN_CACHE_SIZE', 10000)),
+        # Verify ID tokens with PyJWT against signing keys fetched in the background;
+        # the project id is read from the Firebase credential unless FIREBASE_PROJECT_ID overrides it
+        ID_TOKEN_OFFLINE_VERIFY=os.environ.get('ID_TOKEN_OFFLINE_VERIFY', 'true').lower() == 'true',
+        FIREBASE_PROJECT_ID=os.environ.get('FIREBASE_PROJECT_ID', ''),
+        ID_TOKEN_CLOCK_SKEW=int(os.environ.get('ID_TOKEN_CLOCK_SKEW', 5)),
+        # JSON of key id -> PEM certificate to verify against instead of Google's keys (tests, benchmarks)
+        ID_TOKEN_KEYS_FILE=os.environ.get('ID_TOKEN_KEYS_FILE', ''),
+        # Seconds a user row is served from memory; 0 loads it from the database every request
+        USER_CACHE_TTL=int(os.environ.get('USER_CACHE_TTL', 30)),
+        # Browser / proxy cache lifetime of served images before revalidating with the ETag
+        IMAGE_CACHE_MAX_AGE=int(os.environ.get('IMAGE_CACHE_MAX_AGE', 24 * 60 * 60)),
+        # Resized / WebP copies of the images; defaults to ImageVariants next to the Images folder
+        IMAGE_VARIANT_DIR=os.environ.get('IMAGE_VARIANT_DIR', ''),
+        # Processes rendering variants of uploaded images; 0 renders them on first request only
+        IMAGE_VARIANT_WORKERS=int(os.environ.get('IMAGE_VARIANT_WORKERS', 2)),
+        # Pack file built by /scripts/buildImagePack; defaults to ImagePacks next to the Images folder
+        IMAGE_PACK_DIR=os.environ.get('IMAGE_PACK_DIR', '')
     )
     if test_config is not None:
         app.config.update(test_config)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        from services.request_metrics import TimedQueuePool
+        # Same pool as the default, but records connection checkout wait
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).setdefault('poolclass', TimedQueuePool)
+
+    from services.log_config import log_config
+    log_config.init_app(app)
 
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     cors.init_app(app)
 
+    from services import session_store
+    from services import game_expiry
+    from services import guess_rollups
+    from services.game_pool import game_pool
+    from services.query_profiler import query_profiler
+    from services.request_metrics import request_metrics
+    from services.game_codes import game_code_cache
+    from services.game_manifest import game_manifest_cache
+    from services.token_cache import token_cache
+    from services.token_verifier import id_token_verifier
+    from services.current_user import user_cache
+    from services.image_variants import image_variants
+    from services.image_pack import image_pack
+    request_metrics.init_app(app)
+    query_profiler.init_app(app)
+    session_store.init_app(app)
+    game_pool.init_app(app)
+    game_expiry.init_app(app)
+    guess_rollups.init_app(app)
+    token_cache.init_app(app)
+    id_token_verifier.init_app(app)
+    user_cache.init_app(app)
+    image_variants.init_app(app)
+    image_pack.init_app(app)
+    request_metrics.register_cache('game_manifest', game_manifest_cache.stats)
+    request_metrics.register_cache('game_code', game_code_cache.stats)
+    request_metrics.register_cache('game_session', lambda: session_store.get_session_store().stats())
+    request_metrics.register_cache('id_token', token_cache.stats)
+    request_metrics.register_cache('user', user_cache.stats)
+    request_metrics.register_cache('image_variant', image_variants.stats)
+    request_metrics.register_cache('image_pack', image_pack.stats)
+
     with app.app_context():
         # Register blueprints
         from routes import bp
@@ -75,5 +167,5 @@ def create_app(test_config=None):
         app.register_blueprint(user_dashboard, url_prefix='/user_dashboard')
         app.register_blueprint(scripts_bp)
 
-    print(app.url_map)
+    logger.debug("Registered routes: %s", app.url_map)
     return app 
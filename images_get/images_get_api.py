@@ -1,15 +1,20 @@
-from flask import Flask, jsonify, url_for, send_from_directory
+from flask import Flask, jsonify, url_for
 from flask_cors import CORS
 import os
+import sys
 from dotenv import load_dotenv
 from urllib.parse import unquote
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.image_files import send_image
+
 # NOTE: CREATE A .env file in this folder and fill it in with the following variables: IMAGE_FOLDER, PORT, HOST, and VM_IP
 # FOR TESTING: run file and GET Request from http://127.0.0.1:5000/fetchImages/
 
 load_dotenv()
 
 IMAGE_FOLDER = os.getenv('IMAGE_FOLDER', 'static/images')
+IMAGE_ROOT = os.path.abspath(IMAGE_FOLDER)
 HOST = os.getenv('HOST', '127.0.0.1')
 PORT = int(os.getenv('PORT', 5000))
 VM_IP = os.getenv('VM_IP', f"http://{HOST}:{PORT}")
@@ -43,20 +48,20 @@ def get_images(offset=0, type='real', size=5):
 @app.route('/fetchImageByPath/<path:image_path>', methods=['GET'])
 def get_image_by_id_or_path(image_id=None, image_path=None):
     try:
+        # Both are file paths relative to IMAGE_FOLDER, including the extension;
+        # send_image treats paths escaping the folder as missing
         if image_id:
-            # You may want to implement logic to map image_id to a file path in your system.
-            image_file = f"{IMAGE_FOLDER}/{image_id}"  # Assuming a .jpg extension for simplicity.
+            image_file = image_id
         elif image_path:
-            # If the image path is passed, use it directly.
-            image_file = f"{IMAGE_FOLDER}/{image_path}"
+            image_file = image_path
         else:
             return jsonify({'error': 'No image ID or path provided'}), 400
 
-        # Ensure the image exists
-        if os.path.exists(image_file):
-            return send_from_directory(os.path.dirname(image_file), os.path.basename(image_file))
-        else:
+        # Serve with validators so clients can revalidate instead of downloading again
+        response = send_image(IMAGE_ROOT, image_file)
+        if response is None:
             return jsonify({'error': 'Image not found'}), 404
+        return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2,46 +2,83 @@ from functools import wraps
 from flask import request, jsonify
 import firebase_admin
 from firebase_admin import auth, credentials
+import logging
 import os
 
-print("Starting middleware/auth.py initialization")
+from services.token_cache import token_cache
+from services.token_verifier import id_token_verifier
+
+logger = logging.getLogger(__name__)
 
 # Initialize Firebase Admin SDK
 try:
-    print("Attempting to initialize Firebase Admin SDK")
     cred = credentials.Certificate('medgenaifirebase.json')
     firebase_admin.initialize_app(cred)
-    print("Firebase Admin SDK initialized successfully")
+    logger.info("Firebase Admin SDK initialized successfully")
 except Exception as e:
-    print(f"Error initializing Firebase Admin SDK: {str(e)}")
+    logger.error("Error initializing Firebase Admin SDK: %s", e)
+
+
+def verify_token(token, check_revoked=False):
+    """
+    Verify a Firebase ID token, reusing the claims of tokens verified earlier
+    and checking new ones locally against the prefetched signing keys
+
+    Args:
+        token: The raw ID token
+        check_revoked: Ask Firebase whether the token was revoked, bypassing the cache
+
+    Returns:
+        dict: The decoded token claims
+    """
+    if not check_revoked:
+        decoded_token = token_cache.get(token)
+        if decoded_token is not None:
+            return decoded_token
+        decoded_token = id_token_verifier.verify(token)
+        if decoded_token is not None:
+            token_cache.put(token, decoded_token)
+            return decoded_token
+    try:
+        # Revocation checks and tokens the local verifier can't decide need Firebase
+        decoded_token = auth.verify_id_token(
+            token,
+            check_revoked=check_revoked,
+            clock_skew_seconds=5
+        )
+    except Exception:
+        # A revoked token must not keep working from the cache
+        token_cache.forget(token)
+        raise
+    token_cache.put(token, decoded_token)
+    return decoded_token
+
 
+def require_auth(f=None, check_revoked=False):
+    """
+    Require a valid Firebase ID token; use ``@require_auth(check_revoked=True)``
+    on routes that must notice revoked tokens straight away
+    """
+    if f is None:
+        return lambda f: require_auth(f, check_revoked=check_revoked)
 
-def require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        print("Starting require_auth decorator")
         auth_header = request.headers.get('Authorization')
-        print(f"Authorization header: {auth_header}")
         
         if not auth_header or not auth_header.startswith('Bearer '):
-            print("No valid Authorization header found")
+            logger.debug("No valid Authorization header found")
             return jsonify({'error': 'No token provided'}), 401
             
         token = auth_header.split('Bearer ')[1]
-        print(f"Extracted token: {token[:10]}...")  # Only print first 10 chars for security
         
         try:
-            print("Attempting to verify ID token")
-            # Add clock tolerance of 5 seconds
-            decoded_token = auth.verify_id_token(
-                token,
-                clock_skew_seconds=5  # Add this parameter
-            )
-            print(f"Token verified successfully. UID: {decoded_token['uid']}")
+            decoded_token = verify_token(token, check_revoked=check_revoked)
+            logger.debug("Token verified for user %s", decoded_token['uid'])
             request.user_id = decoded_token['uid']
             return f(*args, **kwargs)
         except Exception as e:
-            print(f"Auth error: {str(e)}")  # Debug print
+            logger.info("Auth error: %s", e)
             return jsonify({'error': 'Invalid token', 'details': str(e)}), 401
             
     return decorated_function
@@ -53,30 +90,25 @@ auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/auth/session', methods=['POST'])
 def create_session():
-    print("Starting create_session function")
     try:
         # Get the ID token from the request
-        print("Attempting to get ID token from request")
         id_token = request.json.get('idToken')
         if not id_token:
-            print("No ID token provided in request")
+            logger.debug("No ID token provided in request")
             return jsonify({'error': 'No ID token provided'}), 400
 
-        print("Setting up session parameters")
         # Verify the ID token and create a session cookie
         # Set session expiration to 5 days
         expires_in = datetime.timedelta(days=5)
         
-        print("Attempting to create session cookie")
         # Create the session cookie using Firebase Admin SDK
         session_cookie = auth.create_session_cookie(id_token, expires_in=expires_in)
-        print("Session cookie created successfully")
+        logger.debug("Session cookie created successfully")
         
         response = jsonify({'sessionCookie': session_cookie})
-        print("Returning successful response")
         
         return response, 200
 
     except Exception as e:
-        print(f"Error in create_session: {str(e)}")
+        logger.info("Error in create_session: %s", e)
         return jsonify({'error': str(e)}), 401
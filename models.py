@@ -93,6 +93,9 @@ class Game(db.Model):
                             backref=db.backref('created_games', lazy=True),
                             foreign_keys=[created_by])
 
+    # Used by the expiry sweeper to find active games past their expiry date
+    __table_args__ = (db.Index('ix_games_status_expiry_date', 'game_status', 'expiry_date'),)
+
 class GameCode(db.Model):
     __tablename__ = 'game_code'
 
@@ -106,6 +109,29 @@ class GameCode(db.Model):
     game = db.relationship('Game', backref=db.backref('game_code', uselist=False))
     __table_args__ = (db.UniqueConstraint('game_id', name='uq_game_codes_game_id'),)
 
+class GameSeed(db.Model):
+    """Sampling seed of a game whose images are regenerated instead of stored as GameImages rows"""
+    __tablename__ = 'game_seeds'
+
+    game_id = db.Column(db.Integer, db.ForeignKey('games.game_id'), primary_key=True)
+    seed = db.Column(db.BigInteger, nullable=False)
+    # Highest image id the game was drawn from
+    catalog_version = db.Column(db.Integer, nullable=False)
+    image_count = db.Column(db.Integer, nullable=False)
+    # Comma-separated image ids drawn at creation, used when the catalog changed under the seed
+    image_ids = db.Column(db.Text, nullable=False)
+
+class GamePool(db.Model):
+    """Pre-generated games waiting to be claimed when a player starts a game"""
+    __tablename__ = 'game_pool'
+
+    game_id = db.Column(db.Integer, db.ForeignKey('games.game_id'), primary_key=True)
+    game_board = db.Column(db.String(50), nullable=False)
+    image_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index('ix_game_pool_board_image_count', 'game_board', 'image_count'),)
+
 class UserGameSession(db.Model):
     """Tracks individual user sessions for each game"""
     __tablename__ = 'user_game_sessions'
@@ -146,6 +172,44 @@ class UserGuess(db.Model):
     image = db.relationship('Images', backref=db.backref('guesses', lazy=True))
     user = db.relationship('Users', backref=db.backref('guesses', lazy=True))
 
+    # Used by the rollup catch-up to recompute the guesses of a day
+    __table_args__ = (db.Index('ix_user_guesses_date_of_guess', 'date_of_guess'),)
+
+class GuessDailyRollup(db.Model):
+    """Guesses per day, image and guessed type, see services/guess_rollups.py"""
+    __tablename__ = 'guess_daily_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    image_id = db.Column(db.Integer, primary_key=True)
+    image_type = db.Column(db.String(50), primary_key=True)
+    guess_type = db.Column(db.String(50), primary_key=True)
+    guess_count = db.Column(db.Integer, nullable=False, default=0)
+
+class UserDailyRollup(db.Model):
+    """Guesses per day and user, see services/guess_rollups.py"""
+    __tablename__ = 'user_daily_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.String(128), primary_key=True)
+    guess_count = db.Column(db.Integer, nullable=False, default=0)
+    correct_count = db.Column(db.Integer, nullable=False, default=0)
+
+class FeedbackDailyRollup(db.Model):
+    """Feedback per day of the guess it was left on and image, see services/guess_rollups.py"""
+    __tablename__ = 'feedback_daily_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    image_id = db.Column(db.Integer, primary_key=True)
+    feedback_count = db.Column(db.Integer, nullable=False, default=0)
+
+class RollupWatermark(db.Model):
+    """Highest id of a source table ('guesses', 'feedback') the rollup catch-up has folded in"""
+    __tablename__ = 'rollup_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
 
 class FeedbackUser(db.Model):
     __tablename__ = 'feedback_users'
@@ -1,6 +1,11 @@
 import os
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, current_app
 from services.admin.generateaiimage import generate_image
+from services.image_files import DEFAULT_MAX_AGE, send_image
+from services.image_index import image_index
+from services.image_variants import image_variants, send_image_variant
+from services.image_catalog import image_catalog
+from services.image_sampler import image_sampler
 from werkzeug.utils import secure_filename
 from __init__ import db
 from models import Images
@@ -84,6 +89,11 @@ def save_generated_image():
         )
         db.session.add(new_image)
         db.session.commit()
+        image_sampler.add_image(new_image.image_id, new_image.image_type, new_image.image_path)
+        image_catalog.add_image(new_image.image_id, new_image.image_path, new_image.image_type,
+                                new_image.gender, new_image.age, new_image.disease)
+        image_index.add(new_image.image_path)
+        image_variants.submit(new_image.image_path)
 
         return jsonify(
             {
@@ -100,7 +110,11 @@ def save_generated_image():
 
 @bp.route("/admin/<path:filename>")
 def serve_image(filename):
-    image_full_path = os.path.join(BASE_IMAGES_PATH, filename)
-    if os.path.exists(image_full_path):
-        return send_file(image_full_path, mimetype="image/jpeg")
-    return jsonify({"error": "Image not found"}), 404
+    # Grids can ask for a small variant with ?size=
+    response = send_image_variant(filename, request.args.get("size", type=int), request.accept_mimetypes,
+                                  current_app.config.get("IMAGE_CACHE_MAX_AGE", DEFAULT_MAX_AGE))
+    if response is None:
+        response = send_image(os.path.abspath(BASE_IMAGES_PATH), filename, mimetype="image/jpeg")
+    if response is None:
+        return jsonify({"error": "Image not found"}), 404
+    return response
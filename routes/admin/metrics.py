@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 
 from services.admin.metrics import (
     get_image_detection_accuracy, 
@@ -7,6 +7,9 @@ from services.admin.metrics import (
     get_leaderboard, 
     get_image_difficulty
 )
+from services.game_pool import game_pool
+from services.query_profiler import query_profiler
+from services.request_metrics import request_metrics
 
 bp = Blueprint('adminMetrics', __name__)
 
@@ -36,4 +39,29 @@ def get_leaderboard_route():
 
 @bp.route('/admin/getImageDifficulty', methods=['GET'])
 def get_image_difficulty_route():
-    return jsonify(get_image_difficulty())
\ No newline at end of file
+    return jsonify(get_image_difficulty())
+
+
+@bp.route('/admin/getGamePoolMetrics', methods=['GET'])
+def get_game_pool_metrics_route():
+    return jsonify(game_pool.metrics.snapshot())
+
+
+@bp.route('/admin/getQueryStats', methods=['GET'])
+def get_query_stats_route():
+    # Includes SQL statement text, so it is guarded like the scrape endpoint
+    if not _has_metrics_token():
+        return jsonify({'error': 'Invalid metrics token'}), 401
+    return jsonify(query_profiler.summary())
+
+
+@bp.route('/admin/metrics', methods=['GET'])
+def prometheus_metrics_route():
+    if not _has_metrics_token():
+        return jsonify({'error': 'Invalid metrics token'}), 401
+    return current_app.response_class(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _has_metrics_token() -> bool:
+    token = current_app.config.get('METRICS_TOKEN')
+    return not token or request.headers.get('Authorization') == f"Bearer {token}"
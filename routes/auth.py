@@ -2,11 +2,12 @@ from flask import Blueprint, request, jsonify
 from models import Users
 from __init__ import db
 from middleware.auth import require_auth
+from services.rank_index import rank_index
 
 auth_signup_bp = Blueprint('auth_signup', __name__)
 
 @auth_signup_bp.route('/auth/register', methods=['POST'])
-@require_auth
+@require_auth(check_revoked=True)
 def register_user():
     try:
         data = request.get_json()
@@ -35,6 +36,7 @@ def register_user():
 
         db.session.add(new_user)
         db.session.commit()
+        rank_index.set_score(firebase_uid, 0, username)
 
         return jsonify({
             'message': 'User registered successfully',
@@ -4,6 +4,9 @@ from middleware.auth import require_auth
 from datetime import datetime
 from __init__ import db
 from models import Competition, CompetitionGame
+import logging
+
+logger = logging.getLogger(__name__)
 
 competition_bp = Blueprint('competition', __name__)
 competition_service = CompetitionService()
@@ -23,7 +26,7 @@ def create_competition():
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error in create_competition: {str(e)}")
+        logger.exception("Error in create_competition: %s", e)
         return jsonify({"error": "Failed to create competition"}), 500
 
 @competition_bp.route('/join/<int:competition_id>', methods=['GET'])
@@ -56,5 +59,5 @@ def join_competition(competition_id):
         }), 200
         
     except Exception as e:
-        print(f"Error in join_competition: {str(e)}")
+        logger.exception("Error in join_competition: %s", e)
         return jsonify({"error": "Failed to join competition"}), 500
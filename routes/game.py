@@ -1,11 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from middleware.auth import require_auth
 from models import Users, UserGuess, Images
 from __init__ import db
 from services.game_service import GameService
+from services.current_user import add_user_stats, apply_user_totals, current_user
+import logging
 import random
 
 game_bp = Blueprint('game', __name__)
+logger = logging.getLogger(__name__)
 game_service = GameService()
 
 @game_bp.route('/initialize-classic-game', methods=['POST'])
@@ -19,34 +22,29 @@ def initialize_classic_game():
         image_count = data.get('imageCount', 10)  # Default to 10 images if not specified
         user_id = request.user_id  # From @require_auth decorator
 
-        print(f"Initializing classic game for user {user_id}")
-        print(f"Image count: {image_count}")
+        logger.debug("Initializing classic game with %s images for user %s", image_count, user_id)
         
         # Ensure user exists in database
-        user = Users.query.filter_by(user_id=user_id).first()
+        user = current_user()
         if not user:
             return jsonify({
                 'error': 'User not found',
                 'status': 'error'
             }), 404
         
-        print(f"User found: {user}")
-        
         # Initialize classic game - will get a mix of real and AI images
-        game_id, images, code = game_service.initialize_classic_game(
+        # Also counts the started game, in the same transaction as the game itself
+        game_id, images, code, totals = game_service.initialize_classic_game(
             image_count=image_count,
             user_id=user.user_id
         )
 
-        # Update user's games_started count
-        user.games_started += 1
-        db.session.commit()
-
         return jsonify({
             'gameId': game_id,
             'images': images,
             'status': 'success',
-            'gameCode': code
+            'gameCode': code,
+            'gamesStarted': totals.games_started
         })
 
     except ValueError as e:
@@ -55,7 +53,7 @@ def initialize_classic_game():
             'status': 'error'
         }), 400
     except Exception as e:
-        print(f"Error in initialize_classic_game: {str(e)}")
+        logger.exception("Error in initialize_classic_game: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
@@ -79,20 +77,17 @@ def initialize_single_game_with_code():
                 'status': 'error'
             }), 400
 
-        print(f"Image count: {image_count}")
     
-        print(f"Initializing game with code {game_code} for user {user_id}")
+        logger.debug("Initializing game with code %s and %s images for user %s", game_code, image_count, user_id)
         
         # Ensure user exists in database
-        user = Users.query.filter_by(user_id=user_id).first()
+        user = current_user()
         if not user:
             return jsonify({
                 'error': 'User not found',
                 'status': 'error'
             }), 404
         
-        print(f"User found: {user}")
-        
         # Initialize game with code
         game_id, images, game_code = game_service.initialize_game_with_code(
             game_code=game_code,
@@ -115,7 +110,7 @@ def initialize_single_game_with_code():
             'status': 'error'
         }), 400
     except Exception as e:
-        print(f"Error in initialize_single_game_with_code: {str(e)}")
+        logger.exception("Error in initialize_single_game_with_code: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
@@ -129,9 +124,9 @@ def finish_classic_game():
     POST request with the following fields:
     gameId: The ID of the game to finish
     userGuesses: A list of user guesses for the game - each guess is a dictionary with the following fields:
-        imageId: The ID of the image the user guessed
-        userGuessType: The type of guess the user made (real or ai)
-        correct: Whether the guess was correct or not
+        url: The URL of the image the user guessed
+        guess: The type of guess the user made (real or ai)
+        timeTaken: Seconds the user spent on the image (optional)
     """
     try:
         data = request.get_json()
@@ -160,7 +155,7 @@ def finish_classic_game():
             'status': 'error'
         }), 400
     except Exception as e:
-        print(f"Error in finish_classic_game: {str(e)}")
+        logger.exception("Error in finish_classic_game: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
@@ -174,11 +169,11 @@ def get_game(game_id):
     """
     try:
         user_id = request.user_id
-        game = game_service.get_game(game_id, user_id)
+        game_json = game_service.get_game_json(game_id, user_id)
 
-        return jsonify(game)
+        return current_app.response_class(game_json, mimetype='application/json')
     except Exception as e:
-        print(f"Error in get_game: {str(e)}")
+        logger.exception("Error in get_game: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
@@ -194,7 +189,7 @@ def get_competition_single_game():
         user_id = request.user_id
         
         # Ensure user exists in database
-        user = Users.query.filter_by(user_id=user_id).first()
+        user = current_user()
         if not user:
             return jsonify({
                 'error': 'User not found',
@@ -204,9 +199,10 @@ def get_competition_single_game():
         # Get a random competition game
         game_id, images = game_service.get_random_competition_game(user_id)
         
-        # Update user's games_started count
-        user.games_started += 1
+        # Update user's games_started count in SQL, the loaded row may be a few seconds old
+        totals = add_user_stats(user.user_id, games_started=1)
         db.session.commit()
+        apply_user_totals(user.user_id, totals)
         
         return jsonify({
             'gameId': game_id,
@@ -220,7 +216,7 @@ def get_competition_single_game():
             'status': 'error'
         }), 400
     except Exception as e:
-        print(f"Error in get_competition_single_game: {str(e)}")
+        logger.exception("Error in get_competition_single_game: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
@@ -236,7 +232,6 @@ def get_dual_game_by_game_code():
     try:
         data = request.get_json()
         game_code = data.get('game_code')
-        print(f"game_code: {game_code}")
         #user_id = request.user_id
         
         if not game_code:
@@ -246,12 +241,9 @@ def get_dual_game_by_game_code():
             }), 400
             
         # Get dual game by game code
-        game_data = game_service.get_dual_game_by_game_code(game_code, None)
+        game_json = game_service.get_dual_game_json_by_game_code(game_code)
         
-        return jsonify({
-            "game_data": game_data,
-            'status': 'success'
-        })
+        return current_app.response_class(game_json, mimetype='application/json')
         
     except ValueError as e:
         return jsonify({
@@ -259,7 +251,7 @@ def get_dual_game_by_game_code():
             'status': 'error'
         }), 400
     except Exception as e:
-        print(f"Error in get_dual_game_by_game_code: {str(e)}")
+        logger.exception("Error in get_dual_game_by_game_code: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
@@ -272,24 +264,18 @@ def initialize_classic_dual_game():
     """
     Initialize a classic dual game where users guess between real and AI images
     """
-    print("Initializing classic dual game")
     try:
         data = request.get_json()
         round_count = data.get('round_count', 10)  # Default to 10 images if not specified
         user_id = request.user_id  # From @require_auth decorator
 
-        print(f"Initializing classic dual game")
-        print(f"Round count: {round_count}")
+        logger.debug("Initializing classic dual game with %s rounds", round_count)
         
 
         game_code = game_service.initialize_dual_game(round_count)
-        game_data = game_service.get_dual_game_by_game_code(game_code, user_id)
-
+        game_json = game_service.get_dual_game_json_by_game_code(game_code)
 
-        return jsonify({
-            "game_data": game_data,
-            'status': 'success'
-        })
+        return current_app.response_class(game_json, mimetype='application/json')
 
     except ValueError as e:
         return jsonify({
@@ -297,7 +283,7 @@ def initialize_classic_dual_game():
             'status': 'error'
         }), 400
     except Exception as e:
-        print(f"Error in initialize_classic_game: {str(e)}")
+        logger.exception("Error in initialize_classic_game: %s", e)
         return jsonify({
             'error': str(e),
             'status': 'error'
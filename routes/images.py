@@ -1,42 +1,46 @@
-from flask import jsonify, send_from_directory, Blueprint, request, current_app
-from services.images import get_image_list, get_images_rand
+from flask import jsonify, Blueprint, request, current_app
+from services.images import get_image_list, get_images_rand, get_image_view_url
+from services.image_files import DEFAULT_MAX_AGE, IMAGES_ROOT, send_image
+from services.image_index import DEFAULT_PAGE_SIZE
+from services.image_pack import send_packed_image
+from services.image_variants import send_image_variant
 import os
 import logging
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 bp = Blueprint('images', __name__)
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 @bp.route('/api/images', methods=['GET'])
 def list_images():
     """
-    Returns a list of all image URLs.
+    Returns one page of image URLs.
+    Usage: /api/images?limit=100, then /api/images?cursor=<nextCursor> until nextCursor is null
     """
-    print("Fetching image list...")
-    return jsonify(get_image_list())
+    try:
+        return jsonify(get_image_list(request.args.get('cursor'),
+                                      request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 @bp.route('/api/images/view/<path:image_path>', methods=['GET'])
 def view_image(image_path):
     """
-    Serves a specific image file.
+    Serves a specific image file, answering conditional and range requests.
+    Usage: /api/images/view/<path>?size=256 for a resized variant, as WebP
+    when the Accept header allows it
     """
-    # Dynamically locate the Images folder
-    BASE_IMAGES_PATH = os.path.abspath(os.path.join(os.getcwd(), "../MedGenAI-Images/Images"))
-
-    # Debugging output
-    print("Current Directory:", os.getcwd())
-    print("Base Images Path:", BASE_IMAGES_PATH)
-    current_app.logger.debug(f"Current Directory: {os.getcwd()}")
-    current_app.logger.debug(f"Base Images Path: {BASE_IMAGES_PATH}")
-    # Join the base path with the relative image path
-    full_image_path = os.path.join(BASE_IMAGES_PATH, image_path)
-    print("Full Image path:", full_image_path)
-    current_app.logger.debug(f"Full Image path: {full_image_path}")
-    # Serve the file if it exists
-    if os.path.exists(full_image_path):
-        return send_from_directory(BASE_IMAGES_PATH, image_path)
-    return jsonify({"error": "Image not found"}), 404
+    max_age = current_app.config.get('IMAGE_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+    response = send_image_variant(image_path, request.args.get('size', type=int),
+                                  request.accept_mimetypes, max_age)
+    if response is None:
+        response = send_packed_image(image_path, max_age)
+    if response is None:
+        response = send_image(IMAGES_ROOT, image_path, max_age=max_age)
+    if response is None:
+        return jsonify({"error": "Image not found"}), 404
+    return response
 
 @bp.route('/api/images/mixed', methods=['GET'])
 def get_mixed_images():
@@ -49,6 +53,6 @@ def get_mixed_images():
         return jsonify({"error": "Missing required parameter: count"}), 400  # Bad Request
     half_count = max(count // 2, 1)
 
-    real_images = get_images_rand(half_count, 'real')
-    cf_images = get_images_rand(half_count, 'ai')
+    real_images = [get_image_view_url(img.image_path) for img in get_images_rand(half_count, 'real')]
+    cf_images = [get_image_view_url(img.image_path) for img in get_images_rand(half_count, 'ai')]
     return jsonify({"real": real_images, "cf": cf_images})
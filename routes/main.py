@@ -6,6 +6,7 @@ from __init__ import db
 from sqlalchemy import text
 from . import bp
 from models import *
+from services.guess_rollups import record_feedback, record_guesses
 
 @bp.route('/hello')
 def hello():
@@ -29,6 +30,7 @@ def process_response():
     timestamp = datetime.now(timezone.utc)
     guessID = str(uuid.uuid4())
     feedbackID = str(uuid.uuid4())
+    image_type = db.session.query(Images.image_type).filter(Images.image_id == imageID).scalar()
 
     # Insert into UserGuess table
     user_guess = UserGuess(
@@ -57,6 +59,12 @@ def process_response():
     )
     db.session.add(feedback_user)
 
+    # Show up on the dashboard as soon as this commits, not at the next catch-up
+    guess_row = {'image_id': imageID, 'user_id': userID, 'user_guess_type': user_guess_type,
+                 'date_of_guess': timestamp}
+    record_guesses([guess_row], {imageID: image_type})
+    record_feedback([guess_row])
+
     db.session.commit()
     return jsonify({"message": "Response submitted successfully."}), 200
 
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from services.profile import get_profile_data, get_recent_game_history, get_user_performance
 from middleware.auth import require_auth
+import logging
+
+logger = logging.getLogger(__name__)
 
 profile_bp = Blueprint('profile', __name__)
 
@@ -16,7 +19,7 @@ def profile_data():
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(f"Error in profile_data: {str(e)}")
+        logger.exception("Error in profile_data: %s", e)
         return jsonify({"error": "Failed to retrieve profile data"}), 500
 
 @profile_bp.route('/game-history', methods=['GET'])
@@ -31,7 +34,7 @@ def game_history():
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(f"Error in game_history: {str(e)}")
+        logger.exception("Error in game_history: %s", e)
         return jsonify({"error": "Failed to retrieve game history"}), 500
 
 @profile_bp.route('/performance', methods=['GET'])
@@ -46,6 +49,6 @@ def performance():
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(f"Error in performance: {str(e)}")
+        logger.exception("Error in performance: %s", e)
         return jsonify({"error": "Failed to retrieve performance data"}), 500
 
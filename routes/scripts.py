@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify
 from services.scripts import drop_tables, setup_tables, populate_tables, process_csv
+from services import guess_rollups
+from services.image_pack import build_image_pack, image_pack
 
 bp = Blueprint('scripts', __name__)
 
@@ -33,4 +35,21 @@ def process_csv_route():
         process_csv()
         return jsonify({"message": "CSV processed and images inserted successfully."}), 200
     except Exception as e:
-        return jsonify({"message": f"An error occurred while processing the CSV: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"message": f"An error occurred while processing the CSV: {str(e)}"}), 500
+
+@bp.route('/scripts/buildImagePack', methods=['POST'])
+def build_image_pack_route():
+    try:
+        counts = build_image_pack(pack_dir=image_pack.pack_dir)
+        image_pack.reload()
+        return jsonify({"message": "Image pack built successfully.", **counts}), 200
+    except Exception as e:
+        return jsonify({"message": f"An error occurred while building the image pack: {str(e)}"}), 500
+
+@bp.route('/scripts/rebuildGuessRollups', methods=['POST'])
+def rebuild_guess_rollups_route():
+    try:
+        days = guess_rollups.rebuild()
+        return jsonify({"message": "Guess rollups rebuilt successfully.", "days": days}), 200
+    except Exception as e:
+        return jsonify({"message": f"An error occurred while rebuilding the guess rollups: {str(e)}"}), 500
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from services.user_dashboard_service import UserDashboardService
 from middleware.auth import require_auth
+import logging
+
+logger = logging.getLogger(__name__)
 
 user_dashboard = Blueprint('user_dashboard', __name__)
 dashboard_service = UserDashboardService()
@@ -17,7 +20,7 @@ def get_user_stats():
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
-        print(f"Error in get_user_stats: {str(e)}")
+        logger.exception("Error in get_user_stats: %s", e)
         return jsonify({"error": "Failed to retrieve user stats"}), 500
 
 
@@ -31,7 +34,7 @@ def get_recent_activity():
         return jsonify(activity)
         
     except Exception as e:
-        print(f"Error in get_recent_activity: {str(e)}")
+        logger.exception("Error in get_recent_activity: %s", e)
         return jsonify({"error": "Failed to retrieve recent activity"}), 500
 
 
@@ -44,6 +47,6 @@ def get_leaderboard():
         return jsonify(leaderboard)
         
     except Exception as e:
-        print(f"Error in get_leaderboard: {str(e)}")
+        logger.exception("Error in get_leaderboard: %s", e)
         return jsonify({"error": "Failed to retrieve leaderboard data"}), 500
     
\ No newline at end of file
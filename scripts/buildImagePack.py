@@ -0,0 +1,30 @@
+import os
+import requests
+from dotenv import load_dotenv
+
+# Load the environment variables from .env file
+load_dotenv()
+
+# Get the BASE_URL from the environment variable
+BASE_URL = os.getenv("BASE_URL")
+
+def build_image_pack():
+    """Send a POST request to the /scripts/buildImagePack endpoint."""
+    try:
+        url = f"{BASE_URL}/scripts/buildImagePack"
+        
+        # Send POST request to the endpoint
+        response = requests.post(url)
+
+        # Check the response status code and handle accordingly
+        if response.status_code == 200:
+            print(f"Image pack built: {response.json()}")
+        else:
+            print(f"Error: {response.status_code} - {response.text}")
+    
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+if __name__ == "__main__":
+    # Run the build_image_pack function when running the script
+    build_image_pack()
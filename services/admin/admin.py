@@ -1,6 +1,6 @@
 from __init__ import db
-from models import Users, Admin, UserGuess, Images, FeedbackUser, Feedback, Competition, Tag, UserTags
-from sqlalchemy import func, desc, text, case, and_
+from models import Users, Admin, UserGuess, Images, FeedbackUser, Feedback, Competition, Tag, UserTags, GuessDailyRollup, FeedbackDailyRollup
+from sqlalchemy import func, desc, text, case, and_, cast, Date
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 import os
@@ -8,13 +8,17 @@ import logging
 from flask import jsonify, flash
 from werkzeug.utils import secure_filename
 from decimal import Decimal
+from services.image_catalog import image_catalog
+from services.image_sampler import image_sampler
+from services.image_index import image_index
+from services.image_variants import image_variants
 
 def get_metadata_counts():
     try:
         counts = {
-            'feedback': db.session.query(func.count(FeedbackUser.guess_id)).scalar(),
+            'feedback': db.session.query(func.coalesce(func.sum(FeedbackDailyRollup.feedback_count), 0)).scalar(),
             'image': db.session.query(func.count(Images.image_id)).scalar(),
-            'leaderboard': db.session.query(func.count(UserGuess.guess_id)).scalar(),
+            'leaderboard': db.session.query(func.coalesce(func.sum(GuessDailyRollup.guess_count), 0)).scalar(),
             'competition': db.session.query(func.count(Competition.competition_id)).scalar()
         }
         return counts
@@ -25,10 +29,10 @@ def get_metadata_counts():
 def get_guesses_per_month():
     try:
         result = db.session.query(
-            func.to_char(UserGuess.date_of_guess, 'YYYY-MM').label("month"),
-            func.count().label("guess_count")
+            func.to_char(GuessDailyRollup.day, 'YYYY-MM').label("month"),
+            func.sum(GuessDailyRollup.guess_count).label("guess_count")
         ).filter(
-            UserGuess.date_of_guess >= func.now() - text("INTERVAL '12 months'")
+            GuessDailyRollup.day >= cast(func.now() - text("INTERVAL '12 months'"), Date)
         ).group_by("month").order_by("month").all()
 
         return [{"month": row.month, "guess_count": row.guess_count} for row in result]
@@ -39,33 +43,33 @@ def get_guesses_per_month():
 def get_feedback_instances():
     try:
         result = db.session.query(
-            func.to_char(UserGuess.date_of_guess, 'YYYY-MM').label("month"),
-            func.count().label("feedbackCount")
-        ).join(FeedbackUser, FeedbackUser.guess_id == UserGuess.guess_id
-               ).group_by("month").order_by("month").all()
+            func.to_char(FeedbackDailyRollup.day, 'YYYY-MM').label("month"),
+            func.sum(FeedbackDailyRollup.feedback_count).label("feedbackCount")
+        ).group_by("month").order_by("month").all()
 
         return [{"month": row.month, "feedbackCount": row.feedbackCount} for row in result]
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}
 
+def get_percentage_detected(image_type):
+    """Share of the guesses on images of a type that guessed that type"""
+    detected = db.session.query(
+        func.coalesce(
+            func.sum(GuessDailyRollup.guess_count).filter(GuessDailyRollup.guess_type == image_type) * 1.0
+            / func.nullif(func.sum(GuessDailyRollup.guess_count), 0),
+            0
+        )
+    ).filter(GuessDailyRollup.image_type == image_type).scalar()
+    return float(detected)
+
 def get_total_real_images():
     try:
-        result = db.session.query(
-            func.count(Images.image_id).label("totalReal"),
-            func.coalesce(
-                func.sum(
-                    case(
-                        (UserGuess.user_guess_type == 'real', 1), 
-                        else_=0
-                    )
-                ) * 1.0 / func.nullif(func.count(UserGuess.guess_id), 0),
-                0
-            ).label("percentageDetected")
-        ).outerjoin(UserGuess, UserGuess.image_id == Images.image_id
-                    ).filter(Images.image_type == 'real').first()
-
-        return {"totalReal": result.totalReal, "percentageDetected": float(result.percentageDetected)} if result else {}
+        catalog = image_catalog.snapshot()
+        return {
+            "totalReal": catalog.count(catalog.match('image_type', 'real')),
+            "percentageDetected": get_percentage_detected('real')
+        }
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}
@@ -74,21 +78,11 @@ def get_total_real_images():
 
 def get_total_ai_images():
     try:
-        result = db.session.query(
-            func.count(Images.image_id).label("totalAI"),
-            func.coalesce(
-                func.sum(
-                    case(
-                        (UserGuess.user_guess_type == 'ai', 1), 
-                        else_=0
-                    )
-                ) * 1.0 / func.nullif(func.count(UserGuess.guess_id), 0),
-                0
-            ).label("percentageDetected")
-        ).outerjoin(UserGuess, UserGuess.image_id == Images.image_id
-                    ).filter(Images.image_type == 'ai').first()
-
-        return {"totalAI": result.totalAI, "percentageDetected": float(result.percentageDetected)} if result else {}
+        catalog = image_catalog.snapshot()
+        return {
+            "totalAI": catalog.count(catalog.match('image_type', 'ai')),
+            "percentageDetected": get_percentage_detected('ai')
+        }
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}
@@ -364,6 +358,10 @@ def upload_image_service(request, image_type):
             db.session.commit()
 
             new_image_id = result.scalar()  
+            image_sampler.add_image(new_image_id, image_type, params['image_path'])
+            image_catalog.add_image(new_image_id, params['image_path'], image_type, sex, age, disease)
+            image_index.add(params['image_path'])
+            image_variants.submit(params['image_path'])
 
             flash(f'{image_type.capitalize()} image successfully uploaded')
             return jsonify({
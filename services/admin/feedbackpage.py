@@ -2,6 +2,15 @@ from __init__ import db
 from models import Images, Feedback, FeedbackUser, UserGuess
 from sqlalchemy import func, case, desc, asc
 from sqlalchemy.orm import aliased
+from services.image_catalog import image_catalog
+
+
+def parse_age_range(age_range):
+    # "60+" arrives as "60 " when the + isn't escaped in the query string
+    if age_range == "60 ":
+        return 60, 999
+    min_age, max_age = map(int, age_range.split('-'))
+    return min_age, max_age
 
 
 def get_feedback_with_filters(image_type=None, resolved=None, sex=None, disease=None, age_range=None, sort_by=None, sort_order='asc', limit=21, offset=0):
@@ -58,12 +67,7 @@ def get_feedback_with_filters(image_type=None, resolved=None, sex=None, disease=
             query = query.filter(Images.disease.like(f"%{disease}%"))
 
         if age_range:
-            if age_range == "60 ":
-                min_age = 60
-                max_age = 999
-            else:
-                min_age, max_age = map(int, age_range.split('-'))
-            query = query.filter(Images.age.between(min_age, max_age))
+            query = query.filter(Images.age.between(*parse_age_range(age_range)))
 
         # Sorting
         valid_sort_fields = {
@@ -113,6 +117,21 @@ def get_feedback_with_filters(image_type=None, resolved=None, sex=None, disease=
 
 def get_feedback_count(image_type=None, resolved=None, sex=None, disease=None, age_range=None):
     try:
+        if resolved is None:
+            # Without the resolved filter the feedback joins don't change the
+            # number of distinct images, so count them in the catalog
+            catalog = image_catalog.snapshot()
+            mask = catalog.all()
+            if image_type and image_type != "all":
+                mask &= catalog.match('image_type', image_type)
+            if sex:
+                mask &= catalog.match('gender', sex)
+            if disease:
+                mask &= catalog.contains('disease', disease)
+            if age_range:
+                mask &= catalog.age_between(*parse_age_range(age_range))
+            return catalog.count(mask)
+
         # Base query
         query = (
             db.session.query(func.count(func.distinct(Images.image_id)))
@@ -135,12 +154,7 @@ def get_feedback_count(image_type=None, resolved=None, sex=None, disease=None, a
             query = query.filter(Images.disease.like(f"%{disease}%"))
 
         if age_range:
-            if age_range == "60 ":
-                min_age = 60
-                max_age = 999
-            else:
-                min_age, max_age = map(int, age_range.split('-'))
-            query = query.filter(Images.age.between(min_age, max_age))
+            query = query.filter(Images.age.between(*parse_age_range(age_range)))
 
         # Execute query
         total_count = query.scalar()
@@ -1,9 +1,8 @@
 import os
 import random
+import numpy as np
 from flask import request, jsonify, send_file, url_for
-from sqlalchemy import or_
-from models import Images
-from sqlalchemy.sql.expression import func
+from services.image_catalog import image_catalog
 
 BASE_IMAGES_PATH = "../MedGenAI-Images/Images"
 CF_FOLDERS = {
@@ -58,23 +57,25 @@ def get_real_image_based_on_sex_or_disease(gender: str, disease: str, file_name:
     return None
 
 def generate_image(age: str = "", gender: str = "", disease: str = "", real_image_file_name: str = None):
-    query = Images.query
+    catalog = image_catalog.snapshot()
+    mask = catalog.all()
 
     if age and age != "any":
         age_range = map_age_range(age)
         if age_range:
-            query = query.filter(Images.age.between(*age_range))
-    
-    gender_condition = (Images.gender == gender) if gender and gender != "any" else None
-    disease_condition = (Images.disease == disease) if disease and disease != "any" else None
+            mask &= catalog.age_between(*age_range)
+
+    gender_condition = catalog.match('gender', gender) if gender and gender != "any" else None
+    disease_condition = catalog.match('disease', disease) if disease and disease != "any" else None
 
-    if gender_condition or disease_condition:
-        query = query.filter(or_(gender_condition, disease_condition))
+    conditions = [c for c in (gender_condition, disease_condition) if c is not None]
+    if conditions:
+        mask &= np.logical_or.reduce(conditions)
 
     if real_image_file_name and (gender not in ["any", ""] or disease not in ["any", ""]):
         return get_real_image_based_on_sex_or_disease(gender, disease, real_image_file_name)
 
-    image = query.first()
+    image = catalog.first(mask)
     if image:
         file_name = f"{image.image_id}.jpg"
 
@@ -90,10 +91,10 @@ def generate_image(age: str = "", gender: str = "", disease: str = "", real_imag
                 image_url = url_for('adminGenerate.serve_image', filename=os.path.join(selected_folder, file_name), _external=True)
                 return jsonify({"imagePath": image_url})
 
-    image = query.order_by(func.random()).first()
+    images = catalog.sample(mask)
 
-    if image:
-        image_path = image.image_path
+    if images:
+        image_path = images[0].image_path
         image_url = url_for('adminGenerate.serve_image', filename=image_path, _external=True)
         return jsonify({
             "imagePath": image_url
@@ -1,6 +1,6 @@
 from __init__ import db
 from models import Images, Feedback, FeedbackUser, UserGuess
-from sqlalchemy import func, case, text
+from services.guess_metrics import IMAGE, guess_counts
 
 def get_image_by_id(image_id):
     try:
@@ -69,61 +69,8 @@ def get_data_for_image(image_id):
 
 def get_image_confusion_matrix(image_id):
     try:
-        true_positive = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'real', 1), 
-                    else_=0
-                )
-            ).label('truePositive'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(Images.image_id == image_id, UserGuess.user_guess_type == Images.image_type)  # Ensure matching types
-            .scalar()
-        ) or 0
-        false_positive = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'ai', 1), 
-                    else_=0
-                )
-            ).label('falsePositive'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(Images.image_id == image_id, UserGuess.user_guess_type != Images.image_type)  # Ensure mismatched types
-            .scalar()
-        ) or 0
-
-
-        false_negative = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'real', 1), 
-                    else_=0
-                )
-            ).label('falseNegative'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(Images.image_id == image_id, UserGuess.user_guess_type != Images.image_type)  # Ensure mismatched types
-            .scalar()
-        ) or 0
-        true_negative = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'ai', 1), 
-                    else_=0
-                )
-            ).label('trueNegative'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(Images.image_id == image_id, UserGuess.user_guess_type == Images.image_type)  # Ensure matching types
-            .scalar()
-        ) or 0
-
-        return {
-            "truePositive": true_positive,
-            "falsePositive": false_positive,
-            "falseNegative": false_negative,
-            "trueNegative": true_negative
-        }
+        return guess_counts(IMAGE, int(image_id)).confusion_matrix()
 
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}
-
@@ -1,27 +1,13 @@
 from __init__ import db
-from models import UserGuess, Images, Users
-from sqlalchemy import func, case, text
+from models import GuessDailyRollup, Images
+from sqlalchemy import func
+from services.guess_metrics import DEFAULT_MONTHS, GLOBAL, MONTH, aggregate_guesses, guess_counts
+from services.leaderboard import accuracy, guess_leaderboard
 
 def get_image_detection_accuracy():
     try:
-        result = (
-            db.session.query(
-                func.to_char(UserGuess.date_of_guess, 'YYYY-MM').label('month'),
-                (func.sum(
-                    case(
-                        (UserGuess.user_guess_type == Images.image_type, 1),
-                        else_=0
-                    )
-                ) * 1.0) / func.count().label('accuracy')
-            )
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.date_of_guess >= func.now() - text("INTERVAL '12 months'"))
-            .group_by('month')
-            .order_by('month')
-            .all()
-        )
-
-        return [{'month': row[0], 'accuracy': row[1]} for row in result]
+        months = aggregate_guesses({MONTH: DEFAULT_MONTHS})[MONTH]
+        return [{'month': month, 'accuracy': months[month].accuracy} for month in sorted(months)]
     
     except Exception as e:
         db.session.rollback()
@@ -29,61 +15,7 @@ def get_image_detection_accuracy():
 
 def get_confusion_matrix():
     try:
-        true_positive = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'real', 1), 
-                    else_=0
-                )
-            ).label('truePositive'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type == Images.image_type)
-            .scalar()
-        ) or 0
-        false_positive = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'ai', 1), 
-                    else_=0
-                )
-            ).label('falsePositive'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type != Images.image_type)
-            .scalar()
-        ) or 0
-
-
-        false_negative = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'real', 1), 
-                    else_=0
-                )
-            ).label('falseNegative'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type != Images.image_type)
-            .scalar()
-        ) or 0
-
-
-        true_negative = (
-            db.session.query(func.sum(
-                case(
-                    (UserGuess.user_guess_type == 'ai', 1), 
-                    else_=0
-                )
-            ).label('trueNegative'))
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type == Images.image_type)
-            .scalar()
-        ) or 0
-
-        return {
-            "truePositive": true_positive,
-            "falsePositive": false_positive,
-            "falseNegative": false_negative,
-            "trueNegative": true_negative
-        }
+        return guess_counts(GLOBAL).confusion_matrix()
 
     except Exception as e:
         db.session.rollback()
@@ -93,49 +25,7 @@ def get_confusion_matrix():
 
 def get_ml_metrics():
     try:
-
-        true_positive = (
-            db.session.query(func.sum(
-                (UserGuess.user_guess_type == Images.image_type).cast(db.Integer)
-            )).join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type == 'real')
-            .scalar()
-        ) or 0
-        false_positive = (
-            db.session.query(func.sum(
-                (UserGuess.user_guess_type != Images.image_type).cast(db.Integer)
-            )).join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type == 'real')
-            .scalar()
-        ) or 0
-
-
-        true_negative = (
-            db.session.query(func.sum(
-                (UserGuess.user_guess_type == Images.image_type).cast(db.Integer)
-            )).join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type == 'ai')
-            .scalar()
-        ) or 0
-        false_negative = (
-            db.session.query(func.sum(
-                (UserGuess.user_guess_type != Images.image_type).cast(db.Integer)
-            )).join(Images, UserGuess.image_id == Images.image_id)
-            .filter(UserGuess.user_guess_type == 'ai')
-            .scalar()
-        ) or 0
-
-        accuracy = (true_positive + true_negative) / (true_positive + false_positive + true_negative + false_negative) if (true_positive + false_positive + true_negative + false_negative) != 0 else 0
-        precision = true_positive / (true_positive + false_positive) if (true_positive + false_positive) != 0 else 0
-        recall = true_positive / (true_positive + false_negative) if (true_positive + false_negative) != 0 else 0
-        f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) != 0 else 0
-
-        return {
-            "accuracy": accuracy,
-            "precision": precision,
-            "recall": recall,
-            "f1Score": f1_score
-        }
+        return guess_counts(GLOBAL).ml_metrics()
 
     except Exception as e:
         db.session.rollback()
@@ -143,25 +33,10 @@ def get_ml_metrics():
 
 def get_leaderboard():
     try:
-        result = (
-            db.session.query(
-                UserGuess.user_id,
-                Users.username,
-                func.avg(case(
-                    (UserGuess.user_guess_type == Images.image_type, 1), 
-                    else_=0)).label('accuracy')
-            )
-            .join(Images, UserGuess.image_id == Images.image_id)
-            .join(Users, Users.user_id == UserGuess.user_id)
-            .group_by(UserGuess.user_id, Users.username)
-            .order_by(func.avg(case(
-                    (UserGuess.user_guess_type == Images.image_type, 1), 
-                    else_=0)).desc())
-            .limit(10)
-            .all()
-        )
-
-        return [{'user_id': row[0], 'username': row[1], 'accuracy': row[2]} for row in result]
+        return [
+            {'user_id': entry.user_id, 'username': entry.name, 'accuracy': accuracy(entry)}
+            for entry in guess_leaderboard.top(10)
+        ]
 
     except Exception as e:
         db.session.rollback()
@@ -169,23 +44,22 @@ def get_leaderboard():
 
 def get_image_difficulty():
     try:
+        total_guesses = func.sum(GuessDailyRollup.guess_count)
+        incorrect_guesses = func.coalesce(func.sum(GuessDailyRollup.guess_count).filter(
+            GuessDailyRollup.guess_type != GuessDailyRollup.image_type
+        ), 0)
+        difficulty_score = incorrect_guesses * 1.0 / total_guesses
         result = (
             db.session.query(
                 Images.image_id,
                 Images.image_path,
-                func.count().label('total_guesses'),
-                func.sum(case(
-                    (UserGuess.user_guess_type != Images.image_type, 1), 
-                    else_=0)).label('incorrect_guesses'),
-                (func.sum(case(
-                    (UserGuess.user_guess_type != Images.image_type, 1), 
-                    else_=0)) * 1.0 / func.count()).label('difficulty_score')
+                total_guesses.label('total_guesses'),
+                incorrect_guesses.label('incorrect_guesses'),
+                difficulty_score.label('difficulty_score')
             )
-            .join(UserGuess, UserGuess.image_id == Images.image_id)
+            .join(GuessDailyRollup, GuessDailyRollup.image_id == Images.image_id)
             .group_by(Images.image_id)
-            .order_by((func.sum(case(
-                    (UserGuess.user_guess_type != Images.image_type, 1), 
-                    else_=0)) * 1.0 / func.count()).desc())
+            .order_by(difficulty_score.desc())
             .all()
         )
 
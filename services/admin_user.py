@@ -8,6 +8,7 @@ from flask import jsonify, flash
 from werkzeug.utils import secure_filename
 from decimal import Decimal
 from .admin.admin import filter_users_by_tags
+from services.game_codes import game_code_cache
 
 def get_users_with_filters(sort_by=None, sort_order='asc', limit=20, offset=0, level=None, min_games_won=None, max_games_won=None, min_score=None, max_score=None):
     try:
@@ -169,10 +170,10 @@ def get_user_data_by_username(username):
 
 def get_game_by_game_code(game_code):
     try:
-        game_code_entry = db.session.query(GameCode).filter_by(game_code=game_code).first()
-        if not game_code_entry:
+        game_id = game_code_cache.get_id(game_code)
+        if game_id is None:
             return {"error": "Invalid game code"}, 404
-        game_id = game_code_entry.game_id        # Fetch the game from the database
+        # Fetch the game from the database
         game = db.session.query(Game).filter_by(game_id=game_id).first()
         created_by = db.session.query(Users).filter_by(user_id=game.created_by).first()
 
@@ -202,10 +203,9 @@ def create_multiple_game_sessions(game_code, usernames, select_all=False, filter
     """Creates multiple UserGameSession objects for a given game_id and list of user_ids."""
     try:
         new_sessions = []
-        game_code_entry = db.session.query(GameCode).filter_by(game_code=game_code).first()
-        if not game_code_entry:
+        game_id = game_code_cache.get_id(game_code)
+        if game_id is None:
             return {"error": "Invalid game code"}, 404
-        game_id = game_code_entry.game_id
 
         if select_all:
             user_query = filter_users_by_tags(filter_tags, match_all)
@@ -6,6 +6,7 @@ from typing import Dict, Any
 from __init__ import db
 from models import Game, Images, GameImages, Competition, CompetitionGame
 from services.game_service import GameService
+from services.image_sampler import image_sampler
 
 class CompetitionService:
     def __init__(self):
@@ -52,8 +53,8 @@ class CompetitionService:
             
             # Create a new game for this competition
             # Get random images (10 real, 10 AI)
-            real_images = Images.query.filter_by(image_type='real').order_by(db.func.random()).limit(10).all()
-            ai_images = Images.query.filter_by(image_type='ai').order_by(db.func.random()).limit(10).all()
+            real_images = image_sampler.sample_images(10, 'real')
+            ai_images = image_sampler.sample_images(10, 'ai')
             
             # Create game
             game = Game(
@@ -4,8 +4,8 @@ from sqlalchemy import text, bindparam, func
 from datetime import datetime 
 from flask import jsonify
 import logging
+from services.game_codes import game_code_cache
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 # Admin only
 def create_competition(name, expiry, game_code):
@@ -139,7 +139,7 @@ def get_game_by_game_id(game_id):
             return {"error": "Game not found"}, 404
         
         created_by = db.session.query(Users).filter_by(user_id=game.created_by).first()
-        game_code = db.session.query(GameCode).filter_by(game_id=game_id).first()
+        game_code = game_code_cache.get_code(game_id)
         
         # Construct the response
         game_data = {
@@ -150,7 +150,7 @@ def get_game_by_game_id(game_id):
             "game_status": game.game_status,
             "expiry_date": game.expiry_date,
             "created_by": created_by.username if created_by else None,
-            "game_code": game_code.game_code if game_code else None
+            "game_code": game_code
         }
         
         return game_data, 200
@@ -161,12 +161,12 @@ def get_game_by_game_id(game_id):
 def get_game_id_from_game_code(game_code):
     try:
         # Fetch the game ID from the database using the game code
-        game_code_entry = db.session.query(GameCode).filter_by(game_code=game_code).first()
+        game_id = game_code_cache.get_id(game_code)
         
         # If game code not found, return an error message
-        if not game_code_entry:
+        if game_id is None:
             return {"error": "Game code not found"}, 404
         
-        return game_code_entry.game_id
+        return game_id
     except Exception as e:
         return {"error": str(e)}, 500
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Dict, Optional
+
+from flask import g, has_request_context, request
+from sqlalchemy import text
+from sqlalchemy.orm import make_transient_to_detached
+
+from __init__ import db
+from models import Users
+
+DEFAULT_TTL = 30
+DEFAULT_MAX_ENTRIES = 10000
+
+# One statement per stat change: the increments can't race with another game
+# of the same user and the new totals come back without a SELECT
+ADD_STATS_QUERY = text("""
+    UPDATE users
+    SET score = score + :score,
+        games_won = games_won + :games_won,
+        games_started = games_started + :games_started
+    WHERE user_id = :user_id
+    RETURNING score, games_won, games_started
+""")
+
+UserTotals = namedtuple('UserTotals', ['score', 'games_won', 'games_started'])
+
+
+class UserCache:
+    """
+    Short-TTL, process-wide cache of user rows by user id.
+
+    Only column values are kept; ``load_user`` turns them back into a session
+    bound ``Users`` instance without a SELECT. Values may be up to ``ttl``
+    seconds stale, so stat updates must be written as SQL expressions
+    (``Users.score + n``) rather than from the cached values.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # user_id -> (column values, monotonic expiry)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app) -> None:
+        self.ttl = int(app.config.get('USER_CACHE_TTL', DEFAULT_TTL))
+        self.clear()
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                values, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return values
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user: Users) -> None:
+        if self.ttl <= 0:
+            return
+        values = {column.key: getattr(user, column.key) for column in Users.__table__.columns}
+        with self._lock:
+            self._entries[user.user_id] = (values, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, user_id: str, values: Dict) -> None:
+        """Overwrite some column values of a cached user, keeping its expiry"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (dict(entry[0], **values), entry[1])
+
+    def forget(self, user_id: str) -> None:
+        """Drop a user whose row was just changed"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+def load_user(user_id: str) -> Optional[Users]:
+    """
+    A user's row attached to the current session, or None if there is no
+    such user
+
+    The authenticated user is loaded at most once per request and shared by
+    the route and every service it calls.
+    """
+    if has_request_context() and getattr(request, 'user_id', None) == user_id:
+        if 'current_user' not in g:
+            g.current_user = _load_user(user_id)
+        return g.current_user
+    return _load_user(user_id)
+
+
+def current_user() -> Optional[Users]:
+    """The user authenticated by @require_auth"""
+    return load_user(request.user_id)
+
+
+def add_user_stats(user_id: str, score: int = 0, games_won: int = 0, games_started: int = 0) -> Optional[UserTotals]:
+    """
+    Add to a user's stats in the current transaction
+
+    Call apply_user_totals after the commit to update the cached row.
+
+    Returns:
+        Optional[UserTotals]: The new totals, or None if there is no such user
+    """
+    row = db.session.execute(ADD_STATS_QUERY, {
+        'user_id': user_id,
+        'score': score,
+        'games_won': games_won,
+        'games_started': games_started,
+    }).first()
+    return UserTotals(*row) if row is not None else None
+
+
+def apply_user_totals(user_id: str, totals: UserTotals) -> None:
+    """Update the cached row with totals returned by add_user_stats once they are committed"""
+    user_cache.update(user_id, totals._asdict())
+
+
+def _load_user(user_id: str) -> Optional[Users]:
+    values = user_cache.get(user_id)
+    if values is not None:
+        user = Users(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    user = db.session.get(Users, user_id)
+    if user is not None:
+        user_cache.put(user)
+    return user
+
+
+# Shared by every request in this process
+user_cache = UserCache()
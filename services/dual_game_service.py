@@ -1,5 +1,7 @@
 from __init__ import db
 from models import *
+from services.game_codes import game_code_cache
+from services.game_expiry import joinable_games
 from sqlalchemy import text, bindparam, func
 from datetime import datetime 
 from flask import jsonify
@@ -28,6 +30,9 @@ def create_game(game_mode, game_status, username, game_board):
         )
         db.session.add(game_code) 
         db.session.commit() 
+        game_code_cache.forget(game_code.game_code, game.game_id)
+        if game_status == 'active':
+            joinable_games.add(game.game_id, game.expiry_date)
 
         return game.game_id, game_code.game_code, 201
     except Exception as e:
@@ -38,7 +43,7 @@ def create_game(game_mode, game_status, username, game_board):
 def create_dual_game(game_mode, game_status, username, image_urls):
     try:
         images_paths = [image_url.split('admin/')[-1] for image_url in image_urls]
-        print(images_paths)
+        logging.debug("Creating dual game from %d images", len(images_paths))
         image_ids = Images.query.filter(Images.image_path.in_(images_paths)).all()
 
         if not image_ids:
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from __init__ import db
+from models import GameCode
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_MISSING = 10000
+# Unknown codes are remembered for a short while only, so a code created by
+# another worker process becomes visible here without an explicit hook
+DEFAULT_MISSING_TTL = 60
+
+
+class GameCodeCache:
+    """
+    Bounded, process-wide map between game codes and game ids.
+
+    A game's code never changes, so known pairs are kept until they fall out of
+    the LRU or the game is removed. Codes (and ids) that don't exist are cached
+    as negative entries with a short TTL, which absorbs repeated lookups of
+    mistyped or guessed codes without hitting the database.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_missing: int = DEFAULT_MAX_MISSING,
+                 missing_ttl: int = DEFAULT_MISSING_TTL):
+        self.max_entries = max_entries
+        self.max_missing = max_missing
+        self.missing_ttl = missing_ttl
+        self._lock = threading.Lock()
+        self._id_by_code = OrderedDict()
+        self._code_by_id = {}
+        # ('code', game_code) / ('id', game_id) -> monotonic expiry
+        self._missing = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    def cached_id(self, game_code: str) -> Tuple[bool, Optional[int]]:
+        """
+        Look a code up without touching the database
+
+        Returns:
+            Tuple[bool, Optional[int]]: (known, game_id). known is False when
+            the database has to be asked; game_id is None for unknown codes
+        """
+        with self._lock:
+            game_id = self._id_by_code.get(game_code)
+            if game_id is not None:
+                self._id_by_code.move_to_end(game_code)
+                self.hits += 1
+                return True, game_id
+            if self._is_missing(('code', game_code)):
+                self.negative_hits += 1
+                return True, None
+            self.misses += 1
+            return False, None
+
+    def get_id(self, game_code: str) -> Optional[int]:
+        """Game id for a code, or None if no game has that code"""
+        known, game_id = self.cached_id(game_code)
+        if known:
+            return game_id
+        row = db.session.query(GameCode.game_id).filter_by(game_code=game_code).first()
+        if row is None:
+            self.remember_missing(game_code=game_code)
+            return None
+        self.remember(game_code, row.game_id)
+        return row.game_id
+
+    def get_code(self, game_id: int) -> Optional[str]:
+        """Code of a game, or None if the game has no code"""
+        game_id = int(game_id)
+        with self._lock:
+            game_code = self._code_by_id.get(game_id)
+            if game_code is not None:
+                self._id_by_code.move_to_end(game_code)
+                self.hits += 1
+                return game_code
+            if self._is_missing(('id', game_id)):
+                self.negative_hits += 1
+                return None
+            self.misses += 1
+        row = db.session.query(GameCode.game_code).filter_by(game_id=game_id).first()
+        if row is None:
+            self.remember_missing(game_id=game_id)
+            return None
+        self.remember(row.game_code, game_id)
+        return row.game_code
+
+    def remember(self, game_code: str, game_id: int) -> None:
+        with self._lock:
+            self._missing.pop(('code', game_code), None)
+            self._missing.pop(('id', game_id), None)
+            self._id_by_code[game_code] = game_id
+            self._id_by_code.move_to_end(game_code)
+            self._code_by_id[game_id] = game_code
+            while len(self._id_by_code) > self.max_entries:
+                _, evicted_id = self._id_by_code.popitem(last=False)
+                self._code_by_id.pop(evicted_id, None)
+
+    def remember_missing(self, game_code: Optional[str] = None, game_id: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + self.missing_ttl
+        with self._lock:
+            for key in (('code', game_code), ('id', game_id)):
+                if key[1] is None:
+                    continue
+                self._missing[key] = expires_at
+                self._missing.move_to_end(key)
+            while len(self._missing) > self.max_missing:
+                self._missing.popitem(last=False)
+
+    def forget(self, game_code: Optional[str] = None, game_id: Optional[int] = None) -> None:
+        """Drop cached entries for a code or game, e.g. when it is created or deleted"""
+        with self._lock:
+            if game_id is not None:
+                game_id = int(game_id)
+                self._missing.pop(('id', game_id), None)
+                known_code = self._code_by_id.pop(game_id, None)
+                if known_code is not None:
+                    self._id_by_code.pop(known_code, None)
+            if game_code is not None:
+                self._missing.pop(('code', game_code), None)
+                known_id = self._id_by_code.pop(game_code, None)
+                if known_id is not None:
+                    self._code_by_id.pop(known_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._id_by_code.clear()
+            self._code_by_id.clear()
+            self._missing.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'negativeHits': self.negative_hits,
+                'size': len(self._id_by_code),
+                'missingSize': len(self._missing),
+            }
+
+    def _is_missing(self, key) -> bool:
+        expires_at = self._missing.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._missing[key]
+            return False
+        return True
+
+
+# Shared by every service in this process
+game_code_cache = GameCodeCache()
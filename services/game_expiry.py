@@ -0,0 +1,193 @@
+import datetime
+import logging
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from __init__ import db
+from models import Game
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SWEEP_INTERVAL = 60
+DEFAULT_BATCH_SIZE = 500
+# How long (seconds) the joinable set is trusted before it is re-read; games
+# created on this process are added straight away
+REFRESH_INTERVAL = 300
+
+# Uses ix_games_status_expiry_date to find the oldest expired games; SKIP LOCKED
+# keeps sweepers on several workers from fighting over the same rows
+EXPIRE_BATCH_QUERY = text("""
+    UPDATE games SET game_status = 'expired'
+    WHERE game_id IN (
+        SELECT game_id FROM games
+        WHERE game_status = 'active' AND expiry_date <= :now
+        ORDER BY expiry_date
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING game_id
+""")
+
+
+class JoinableGames:
+    """
+    In-memory set of active, unexpired game ids.
+
+    Replaces ``ORDER BY random()`` over the games table when picking a random
+    game: ids live in a list with a position map, so adding, removing and
+    picking a random id are all O(1).
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._expiry: Dict[int, Optional[datetime.datetime]] = {}
+        self._loaded_at = None
+
+    def load(self, rows: Iterable[Tuple[int, Optional[datetime.datetime]]]) -> None:
+        """Replace the set with the given (game_id, expiry_date) pairs"""
+        ids, positions, expiry = [], {}, {}
+        for game_id, expiry_date in rows:
+            positions[game_id] = len(ids)
+            ids.append(game_id)
+            expiry[game_id] = expiry_date
+        with self._lock:
+            self._ids, self._positions, self._expiry = ids, positions, expiry
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reload the set from the games table"""
+        now = datetime.datetime.now()
+        self.load(
+            db.session.query(Game.game_id, Game.expiry_date)
+            .filter(Game.game_status == 'active')
+            .filter((Game.expiry_date > now) | (Game.expiry_date.is_(None)))
+            .all()
+        )
+
+    def invalidate(self) -> None:
+        """Force the next pick to reload the set"""
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, game_id: int, expiry_date: Optional[datetime.datetime]) -> None:
+        """Register a game that just became joinable"""
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet, the first pick will read it from the db
+                return
+            if game_id not in self._positions:
+                self._positions[game_id] = len(self._ids)
+                self._ids.append(game_id)
+            self._expiry[game_id] = expiry_date
+
+    def remove(self, game_ids: Iterable[int]) -> None:
+        """Drop games that expired or were removed"""
+        with self._lock:
+            for game_id in game_ids:
+                self._remove(game_id)
+
+    def pick(self) -> Optional[int]:
+        """A random joinable game id, or None if there is none"""
+        self._ensure_loaded()
+        now = datetime.datetime.now()
+        with self._lock:
+            while self._ids:
+                game_id = self._ids[random.randrange(len(self._ids))]
+                expiry_date = self._expiry.get(game_id)
+                if expiry_date is None or expiry_date > now:
+                    return game_id
+                # Expired since the last sweep
+                self._remove(game_id)
+            return None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _remove(self, game_id: int) -> None:
+        position = self._positions.pop(game_id, None)
+        if position is None:
+            return
+        self._expiry.pop(game_id, None)
+        last = self._ids.pop()
+        if last != game_id:
+            # Move the last id into the hole instead of shifting the list
+            self._ids[position] = last
+            self._positions[last] = position
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.refresh()
+
+
+def expire_games(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Mark every active game past its expiry date as expired, one batch per
+    transaction
+
+    Returns:
+        int: Number of games expired
+    """
+    expired = 0
+    while True:
+        game_ids = [row.game_id for row in db.session.execute(EXPIRE_BATCH_QUERY, {
+            'now': datetime.datetime.now(),
+            'batch_size': batch_size,
+        })]
+        db.session.commit()
+        joinable_games.remove(game_ids)
+        expired += len(game_ids)
+        if len(game_ids) < batch_size:
+            return expired
+
+
+class GameExpirySweeper(threading.Thread):
+    """Background thread that periodically expires games past their expiry date"""
+
+    def __init__(self, app, interval: int = DEFAULT_SWEEP_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(name='game-expiry-sweeper', daemon=True)
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    expired = expire_games(self.batch_size)
+                    db.session.remove()
+                if expired:
+                    logger.info("Expired %d games", expired)
+            except Exception as e:
+                logger.error("Error expiring games: %s", e)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+# Shared by every service in this process
+joinable_games = JoinableGames()
+_sweeper: Optional[GameExpirySweeper] = None
+
+
+def init_app(app) -> None:
+    """Start the expiry sweeper, unless GAME_EXPIRY_SWEEP_INTERVAL is 0"""
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.stop()
+        _sweeper = None
+    interval = int(app.config.get('GAME_EXPIRY_SWEEP_INTERVAL', DEFAULT_SWEEP_INTERVAL))
+    if interval > 0:
+        _sweeper = GameExpirySweeper(
+            app, interval=interval,
+            batch_size=int(app.config.get('GAME_EXPIRY_BATCH_SIZE', DEFAULT_BATCH_SIZE)),
+        )
+        _sweeper.start()
@@ -0,0 +1,179 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from __init__ import db
+from models import Game, GameCode, GameImages, GameSeed, Images
+from services.game_codes import game_code_cache
+from services.game_seeds import decode_image_ids, game_images
+
+DEFAULT_MAX_GAMES = 2048
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+class GameManifest:
+    """
+    Read-only snapshot of a game's images.
+
+    A game's image set never changes after creation, so everything a player
+    needs to load the game is built once: the image list, the dual-game rounds
+    and the JSON bodies the game routes send back. Status and expiry date do
+    change (sweeper, pool claims, competitions on any worker) and are read
+    from the games row instead.
+    """
+
+    __slots__ = ('game_id', 'game_code', 'game_board', 'images', 'rounds', 'game_json', 'dual_game_json')
+
+    def __init__(self, game_id: int, game_code: Optional[str], game_board: str,
+                 image_rows: List[Tuple[int, str, str]]):
+        """
+        Args:
+            image_rows: (game_image_id, image_path, image_type) in play order.
+                Seeded games have no GameImages rows and use the image id instead
+        """
+        self.game_id = game_id
+        self.game_code = game_code
+        self.game_board = game_board
+        self.images = tuple(
+            {'url': f"/api/images/view/{image_path}", 'type': image_type}
+            for _, image_path, image_type in image_rows
+        )
+        self.game_json = _dumps({'game_id': game_id, 'images': list(self.images)})
+
+        # Dual games alternate real / ai pairs; odd image counts can't be played
+        self.rounds = None
+        self.dual_game_json = None
+        if len(image_rows) % 2 == 0:
+            rounds = []
+            for i in range(0, len(image_rows), 2):
+                rounds.append({
+                    'roundId': str(i // 2),
+                    'images': [
+                        {'id': str(game_image_id), 'url': f"/api/images/view/{image_path}", 'isCorrect': j == 0}
+                        for j, (game_image_id, image_path, _) in enumerate(image_rows[i:i + 2])
+                    ]
+                })
+            self.rounds = tuple(rounds)
+            self.dual_game_json = _dumps({
+                'game_data': self.dual_game(),
+                'status': 'success'
+            })
+
+    def dual_game(self) -> Dict:
+        """Dual game payload as returned by get_dual_game_by_game_code"""
+        response = {
+            'gameId': str(self.game_id),
+            'rounds': list(self.rounds),
+        }
+        if self.game_code:
+            response['gameCode'] = self.game_code
+        response['settings'] = {
+            'totalRounds': len(self.rounds),
+            'timerPerRound': 60,
+        }
+        return response
+
+
+class GameManifestCache:
+    """
+    Bounded LRU cache of game manifests, addressable by game id or game code
+    (codes are resolved through the shared game_code_cache).
+
+    Each miss is filled with a single query joining the game, its code and its
+    images; seeded games are regenerated from the in-memory image catalog
+    instead. Entries are only dropped when a game is deleted or falls out of
+    the LRU.
+    """
+
+    def __init__(self, max_games: int = DEFAULT_MAX_GAMES):
+        self.max_games = max_games
+        self._lock = threading.Lock()
+        self._by_id = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_by_id(self, game_id) -> Optional[GameManifest]:
+        game_id = int(game_id)
+        manifest = self._lookup(game_id)
+        if manifest is None:
+            manifest = self._load(Game.game_id == game_id)
+        return manifest
+
+    def get_by_code(self, game_code: str) -> Optional[GameManifest]:
+        known, game_id = game_code_cache.cached_id(game_code)
+        if known:
+            return self.get_by_id(game_id) if game_id is not None else None
+        manifest = self._load(GameCode.game_code == game_code)
+        if manifest is None:
+            game_code_cache.remember_missing(game_code=game_code)
+        return manifest
+
+    def invalidate(self, game_id) -> None:
+        """Drop a game that was deleted"""
+        with self._lock:
+            self._by_id.pop(int(game_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_id.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._by_id)}
+
+    def _lookup(self, game_id: int) -> Optional[GameManifest]:
+        with self._lock:
+            manifest = self._by_id.get(game_id)
+            if manifest is None:
+                self.misses += 1
+                return None
+            self._by_id.move_to_end(game_id)
+            self.hits += 1
+            return manifest
+
+    def _load(self, condition) -> Optional[GameManifest]:
+        rows = (
+            db.session.query(
+                Game.game_id, Game.game_board, GameCode.game_code,
+                GameSeed.seed, GameSeed.catalog_version, GameSeed.image_count, GameSeed.image_ids,
+                GameImages.id, Images.image_path, Images.image_type
+            )
+            .outerjoin(GameCode, GameCode.game_id == Game.game_id)
+            .outerjoin(GameSeed, GameSeed.game_id == Game.game_id)
+            .outerjoin(GameImages, GameImages.game_id == Game.game_id)
+            .outerjoin(Images, Images.image_id == GameImages.image_id)
+            .filter(condition)
+            .order_by(GameImages.id)
+            .all()
+        )
+        if not rows:
+            return None
+        first = rows[0]
+        if first.seed is not None:
+            image_rows = [
+                (image.image_id, image.image_path, image.image_type) for image in
+                game_images(first.game_board, first.seed, first.catalog_version, first.image_count,
+                            decode_image_ids(first.image_ids))
+            ]
+        else:
+            image_rows = [(row.id, row.image_path, row.image_type) for row in rows if row.id is not None]
+        manifest = GameManifest(first.game_id, first.game_code, first.game_board, image_rows)
+        self._store(manifest)
+        return manifest
+
+    def _store(self, manifest: GameManifest) -> None:
+        if manifest.game_code is not None:
+            game_code_cache.remember(manifest.game_code, manifest.game_id)
+        with self._lock:
+            self._by_id[manifest.game_id] = manifest
+            self._by_id.move_to_end(manifest.game_id)
+            while len(self._by_id) > self.max_games:
+                self._by_id.popitem(last=False)
+
+
+# Shared by every service in this process
+game_manifest_cache = GameManifestCache()
@@ -0,0 +1,269 @@
+import collections
+import datetime
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func, text
+
+from __init__ import db
+from models import GamePool
+from services.game_expiry import joinable_games
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFILL_INTERVAL = 5
+DEFAULT_REFILL_BATCH = 10
+POOLED_STATUS = 'pooled'
+
+# Moves one pooled game to the claiming user. SKIP LOCKED lets concurrent
+# claims (from any worker) take different games instead of queueing on one row.
+CLAIM_QUERY = text("""
+    WITH claimed AS (
+        DELETE FROM game_pool
+        WHERE game_id = (
+            SELECT game_id FROM game_pool
+            WHERE game_board = :game_board AND image_count = :image_count
+            ORDER BY game_id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING game_id
+    )
+    UPDATE games
+    SET game_status = 'active', created_by = :user_id, date_created = :now, expiry_date = :expiry_date
+    FROM claimed
+    WHERE games.game_id = claimed.game_id
+    RETURNING games.game_id, (SELECT game_code FROM game_code WHERE game_code.game_id = games.game_id) AS game_code
+""")
+
+CREATE_SESSION_QUERY = text("""
+    INSERT INTO user_game_sessions (game_id, user_id, start_time, session_status)
+    VALUES (:game_id, :user_id, :now, 'active')
+    RETURNING session_id
+""")
+
+
+def parse_pool_sizes(value: str) -> Dict[Tuple[str, int], int]:
+    """
+    Parse GAME_POOL_SIZES, e.g. "classic:10=20,dual:10=5" means keep 20 ready
+    classic games of 10 images and 5 dual games of 10 rounds.
+    """
+    sizes = {}
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key, target = entry.split('=')
+        game_board, image_count = key.split(':')
+        sizes[(game_board.strip(), int(image_count))] = int(target)
+    return sizes
+
+
+class GamePoolMetrics:
+    """Claim latency, hit rate and refill throughput of the game pool"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._claim_latencies = collections.deque(maxlen=window)
+        self._refills = collections.deque(maxlen=window)
+        self.claims = 0
+        self.claim_misses = 0
+        self.refilled = 0
+        self.refill_errors = 0
+        self.depth = {}
+
+    def record_claim(self, seconds: float, hit: bool) -> None:
+        with self._lock:
+            self._claim_latencies.append(seconds)
+            if hit:
+                self.claims += 1
+            else:
+                self.claim_misses += 1
+
+    def record_refill(self, count: int) -> None:
+        with self._lock:
+            self.refilled += count
+            self._refills.append((time.monotonic(), count))
+
+    def record_refill_error(self) -> None:
+        with self._lock:
+            self.refill_errors += 1
+
+    def record_depth(self, game_board: str, image_count: int, depth: int) -> None:
+        with self._lock:
+            self.depth[(game_board, image_count)] = depth
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._claim_latencies)
+            now = time.monotonic()
+            refilled_last_minute = sum(count for at, count in self._refills if now - at <= 60)
+            return {
+                'depth': {f"{board}:{count}": depth for (board, count), depth in self.depth.items()},
+                'claims': self.claims,
+                'claimMisses': self.claim_misses,
+                'refilled': self.refilled,
+                'refillErrors': self.refill_errors,
+                'refillRatePerMinute': refilled_last_minute,
+                'claimLatencyMs': {
+                    'p50': _percentile(latencies, 0.5) * 1000,
+                    'p95': _percentile(latencies, 0.95) * 1000,
+                    'max': (latencies[-1] if latencies else 0) * 1000,
+                },
+            }
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class GamePoolManager:
+    """
+    Keeps a pool of ready-made games per (game_board, image_count) so game
+    initialization only has to claim one instead of sampling and inserting it.
+    """
+
+    def __init__(self):
+        self.sizes: Dict[Tuple[str, int], int] = {}
+        self.owner = 'admin'
+        self.metrics = GamePoolMetrics()
+        self._worker: Optional[GamePoolWorker] = None
+
+    def init_app(self, app) -> None:
+        self.sizes = parse_pool_sizes(app.config.get('GAME_POOL_SIZES', ''))
+        self.owner = app.config.get('GAME_POOL_OWNER', 'admin')
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+        if self.sizes:
+            self._worker = GamePoolWorker(
+                app, self,
+                interval=int(app.config.get('GAME_POOL_REFILL_INTERVAL', DEFAULT_REFILL_INTERVAL)),
+                batch=int(app.config.get('GAME_POOL_REFILL_BATCH', DEFAULT_REFILL_BATCH)),
+            )
+            self._worker.start()
+
+    def is_pooled(self, game_board: str, image_count: int) -> bool:
+        return (game_board, image_count) in self.sizes
+
+    def claim(self, game_board: str, image_count: int, user_id: str, expires_in: datetime.timedelta,
+              create_session: bool = False,
+              before_commit: Optional[Callable[[], None]] = None) -> Optional[Tuple[int, str, Optional[int]]]:
+        """
+        Atomically hand a pooled game to a user, optionally with their session
+
+        The caller's transaction is committed on success, after running
+        before_commit for any writes that belong with the claim.
+
+        Returns:
+            Optional[Tuple[int, str, Optional[int]]]: (game_id, game_code, session_id),
+            or None if nothing is pooled for this board and image count
+        """
+        if not self.is_pooled(game_board, image_count):
+            return None
+        started = time.perf_counter()
+        now = datetime.datetime.now()
+        row = db.session.execute(CLAIM_QUERY, {
+            'game_board': game_board,
+            'image_count': image_count,
+            'user_id': user_id,
+            'now': now,
+            'expiry_date': now + expires_in,
+        }).first()
+        if row is None:
+            db.session.rollback()
+            self.metrics.record_claim(time.perf_counter() - started, hit=False)
+            self.wake()
+            return None
+
+        session_id = None
+        if create_session:
+            session_id = db.session.execute(CREATE_SESSION_QUERY, {
+                'game_id': row.game_id,
+                'user_id': user_id,
+                'now': now,
+            }).scalar()
+        if before_commit is not None:
+            before_commit()
+        db.session.commit()
+        joinable_games.add(row.game_id, now + expires_in)
+        self.metrics.record_claim(time.perf_counter() - started, hit=True)
+        self.wake()
+        return row.game_id, row.game_code, session_id
+
+    def wake(self) -> None:
+        """Ask the worker to top the pool up now rather than at its next tick"""
+        if self._worker is not None:
+            self._worker.wake()
+
+    def refill(self, game_service, batch: int) -> int:
+        """Create up to ``batch`` games for each pool that is below its target"""
+        depths = dict(
+            ((game_board, image_count), depth) for game_board, image_count, depth in
+            db.session.query(GamePool.game_board, GamePool.image_count, func.count())
+            .group_by(GamePool.game_board, GamePool.image_count).all()
+        )
+        created = 0
+        for (game_board, image_count), target in self.sizes.items():
+            depth = depths.get((game_board, image_count), 0)
+            missing = min(target - depth, batch)
+            for _ in range(max(missing, 0)):
+                try:
+                    game_service.create_pooled_game(game_board, image_count, self.owner)
+                    db.session.commit()
+                    depth += 1
+                    created += 1
+                except Exception as e:
+                    db.session.rollback()
+                    self.metrics.record_refill_error()
+                    logger.error("Error refilling %s:%s game pool: %s", game_board, image_count, e)
+                    break
+            self.metrics.record_depth(game_board, image_count, depth)
+        if created:
+            self.metrics.record_refill(created)
+        return created
+
+
+class GamePoolWorker(threading.Thread):
+    """Background thread that keeps every configured pool at its target depth"""
+
+    def __init__(self, app, pool: GamePoolManager, interval: int = DEFAULT_REFILL_INTERVAL,
+                 batch: int = DEFAULT_REFILL_BATCH):
+        super().__init__(name='game-pool-refill', daemon=True)
+        self.app = app
+        self.pool = pool
+        self.interval = interval
+        self.batch = batch
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        from services.game_service import GameService
+        game_service = GameService()
+        while not self._stopped.is_set():
+            created = 0
+            try:
+                with self.app.app_context():
+                    created = self.pool.refill(game_service, self.batch)
+                    db.session.remove()
+            except Exception as e:
+                logger.error("Error in game pool worker: %s", e)
+            # Keep going straight away while pools are still filling up
+            if not created:
+                self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+
+# Shared by every service in this process
+game_pool = GamePoolManager()
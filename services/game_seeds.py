@@ -0,0 +1,92 @@
+import random
+from typing import Iterable, List, Optional
+
+from services.image_sampler import CatalogImage, image_sampler
+
+
+def new_seed() -> int:
+    """A random seed that fits in a signed 64 bit column"""
+    return random.getrandbits(63)
+
+
+def encode_image_ids(image_ids: Iterable[int]) -> str:
+    """Image ids in play order, as stored with the seed"""
+    return ','.join(str(image_id) for image_id in image_ids)
+
+
+def decode_image_ids(encoded: str) -> List[int]:
+    return [int(image_id) for image_id in encoded.split(',') if image_id]
+
+
+def _randbelow(rng: random.Random, n: int) -> int:
+    # Built on getrandbits only, which gives the same stream for the same seed
+    # on every python version (unlike randrange / sample)
+    bits = n.bit_length()
+    while True:
+        value = rng.getrandbits(bits)
+        if value < n:
+            return value
+
+
+def draw_positions(rng: random.Random, population: int, count: int) -> List[int]:
+    """Draw up to ``count`` distinct positions in range(population) with a partial Fisher-Yates shuffle"""
+    swapped = {}
+    positions = []
+    for i in range(min(count, population)):
+        j = i + _randbelow(rng, population - i)
+        positions.append(swapped.get(j, j))
+        swapped[j] = swapped.get(i, i)
+    return positions
+
+
+def game_image_ids(game_board: str, seed: int, catalog_version: int, image_count: int) -> List[int]:
+    """
+    Regenerate the image ids of a seeded game, in play order
+
+    Classic games have image_count images, real ones first with any odd image
+    going to real. Dual games have image_count rounds of (real, ai) pairs.
+
+    Raises:
+        ValueError: If the catalog has too few images for a dual game
+    """
+    real_ids = image_sampler.catalog('real', catalog_version)
+    ai_ids = image_sampler.catalog('ai', catalog_version)
+    if game_board == 'dual':
+        real_count = ai_count = image_count
+        if len(real_ids) < image_count or len(ai_ids) < image_count:
+            raise ValueError(f"Not enough images for {image_count} rounds")
+    else:
+        real_count, ai_count = image_count - image_count // 2, image_count // 2
+
+    rng = random.Random(seed)
+    real = [real_ids[i] for i in draw_positions(rng, len(real_ids), real_count)]
+    ai = [ai_ids[i] for i in draw_positions(rng, len(ai_ids), ai_count)]
+    if game_board == 'dual':
+        return [image_id for pair in zip(real, ai) for image_id in pair]
+    return real + ai
+
+
+def game_images(game_board: str, seed: int, catalog_version: int, image_count: int,
+                stored_ids: Optional[List[int]] = None) -> List[CatalogImage]:
+    """
+    Regenerate the images of a seeded game from the in-memory catalog, without touching the database
+
+    Deleting an image at or below the catalog version shifts the draw, so
+    when the regenerated ids differ from the ids stored at creation the
+    stored ones are used instead.
+
+    Raises:
+        ValueError: If one of the game's images is no longer in the catalog
+    """
+    try:
+        image_ids = game_image_ids(game_board, seed, catalog_version, image_count)
+    except ValueError:
+        if stored_ids is None:
+            raise
+        image_ids = stored_ids
+    if stored_ids is not None and image_ids != stored_ids:
+        image_ids = stored_ids
+    images = image_sampler.describe(image_ids)
+    if len(images) != len(image_ids):
+        raise ValueError(f"Images of seeded game missing from catalog version {catalog_version}")
+    return images
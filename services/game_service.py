@@ -1,17 +1,222 @@
-from models import Users, Images, UserGuess, Game, GameImages, UserGameSession, Feedback, FeedbackUser, Competition, CompetitionGame, GameCode
+from models import Users, Images, UserGuess, Game, GameImages, UserGameSession, Feedback, FeedbackUser, Competition, CompetitionGame, GameCode, GamePool, GameSeed
 from __init__ import db
-from typing import Tuple, List, Dict
+from flask import current_app
+from sqlalchemy import insert
+from typing import Callable, Tuple, List, Dict, Optional
 import uuid
 import datetime
+import logging
 import random
-from services.images import get_images_rand
+from services.images import get_image_view_url
+from services.image_sampler import image_sampler
+from services.session_store import SessionStore, get_session_store
+from services.current_user import UserTotals, add_user_stats, apply_user_totals, load_user
+from services.game_codes import game_code_cache
+from services.game_expiry import joinable_games
+from services.game_manifest import GameManifest, game_manifest_cache
+from services.game_pool import POOLED_STATUS, game_pool
+from services.game_seeds import encode_image_ids, game_images, new_seed
+from services.guess_rollups import record_guesses
+from services.leaderboard import display_name, record_game
+from services.rank_index import rank_index
+
+CLASSIC_GAME_LIFETIME = datetime.timedelta(days=1)  # Game expires in 24 hours
+DUAL_GAME_LIFETIME = datetime.timedelta(days=7)
+# Times a game's images are sampled before giving up on deleted images
+SAMPLE_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
 
 class GameService:
     def __init__(self):
-        print("Initializing GameService")
-        self.active_sessions = {}
+        logger.debug("Initializing GameService")
 
-    def initialize_classic_game(self, image_count: int, user_id: str) -> Tuple[str, List[Dict], str]:
+    @property
+    def active_sessions(self) -> SessionStore:
+        """Process-wide store of in-progress sessions, shared by every GameService"""
+        return get_session_store()
+
+    @staticmethod
+    def _split_image_count(image_count: int) -> Tuple[int, int]:
+        """Split a game's image count into (real, ai), giving any odd image to real"""
+        return image_count - image_count // 2, image_count // 2
+
+    def _lookup_images(self, image_ids: List[int]) -> Optional[List]:
+        """
+        (image_id, image_path, image_type) rows of sampled ids, in the order of image_ids
+
+        Returns None if any of the ids no longer exists. The missing ids are
+        dropped from the sampler, so sampling again won't draw them.
+        """
+        if not image_ids:
+            return []
+        images = {
+            row.image_id: row for row in db.session.query(
+                Images.image_id, Images.image_path, Images.image_type
+            ).filter(Images.image_id.in_(image_ids)).all()
+        }
+        if len(images) != len(image_ids):
+            image_sampler.remove_images(i for i in image_ids if i not in images)
+            return None
+        return [images[i] for i in image_ids]
+
+    def _assemble_game(self, game: Game, game_code: str, images: List) -> List:
+        """
+        Insert a new game, its code and all of its GameImages rows
+
+        Runs a constant number of statements regardless of the image count:
+        one insert for the game and its code and a single bulk insert for the
+        GameImages rows. The caller commits.
+
+        Args:
+            game (Game): Unsaved game to insert
+            game_code (str): Code to register for the game
+            images (List): (image_id, image_path, image_type) rows in the order they are played
+
+        Returns:
+            List: The images
+        """
+        db.session.add(game)
+        db.session.flush()
+        db.session.add(GameCode(game_id=game.game_id, game_code=game_code))
+        # Drop any negative entry left by lookups of this code or id
+        game_code_cache.forget(game_code, game.game_id)
+        if images:
+            db.session.execute(
+                insert(GameImages),
+                [{'game_id': game.game_id, 'image_id': image.image_id} for image in images]
+            )
+        return images
+
+    def _assemble_seeded_game(self, game: Game, game_code: str, image_count: int) -> List:
+        """
+        Insert a new game and its code, storing a sampling seed, the catalog
+        version and the drawn ids in one row instead of GameImages rows. The
+        images are drawn from the in-memory image catalog, so this writes the
+        same three rows whatever the image count. The caller commits.
+
+        Returns:
+            List: (image_id, image_path, image_type) rows in play order
+        """
+        seed = new_seed()
+        catalog_version = image_sampler.catalog_version()
+        images = game_images(game.game_board, seed, catalog_version, image_count)
+
+        db.session.add(game)
+        db.session.flush()
+        db.session.add(GameCode(game_id=game.game_id, game_code=game_code))
+        game_code_cache.forget(game_code, game.game_id)
+        db.session.add(GameSeed(
+            game_id=game.game_id, seed=seed, catalog_version=catalog_version, image_count=image_count,
+            image_ids=encode_image_ids(image.image_id for image in images),
+        ))
+        return images
+
+    def _create_game_images(self, game: Game, game_code: str, image_count: int) -> List:
+        """
+        Insert a new game with image_count images (rounds for dual games),
+        seeded when SEEDED_GAMES is on. The caller commits.
+
+        Returns:
+            List: (image_id, image_path, image_type) rows in play order
+        """
+        if current_app.config.get('SEEDED_GAMES'):
+            return self._assemble_seeded_game(game, game_code, image_count)
+        # Images deleted since the sampler was loaded are resampled rather than
+        # dropped: a shorter list would misalign the (real, ai) pairs of dual games
+        for _ in range(SAMPLE_ATTEMPTS):
+            if game.game_board == 'dual':
+                image_ids = self._sample_dual_game_image_ids(image_count)
+            else:
+                image_ids = self._sample_classic_game_image_ids(image_count)
+            images = self._lookup_images(image_ids)
+            if images is not None:
+                return self._assemble_game(game, game_code, images)
+        raise ValueError("Sampled images no longer exist")
+
+    def _sample_classic_game_image_ids(self, image_count: int) -> List[int]:
+        real_count, ai_count = self._split_image_count(image_count)
+        logger.debug("Fetching %s real images and %s AI images", real_count, ai_count)
+        return image_sampler.sample_ids(real_count, 'real') + image_sampler.sample_ids(ai_count, 'ai')
+
+    def _sample_dual_game_image_ids(self, round_count: int) -> List[int]:
+        logger.debug("Fetching %s real images and %s AI images", round_count, round_count)
+        real_ids = image_sampler.sample_ids(round_count, 'real')
+        ai_ids = image_sampler.sample_ids(round_count, 'ai')
+        if len(real_ids) < round_count or len(ai_ids) < round_count:
+            raise ValueError(f"Not enough images for {round_count} rounds")
+
+        # Rounds are read back in insertion order as (real, ai) pairs
+        return [image_id for pair in zip(real_ids, ai_ids) for image_id in pair]
+
+    def create_pooled_game(self, game_board: str, image_count: int, owner_id: str) -> int:
+        """
+        Create a ready-made game for the game pool. It stays in the 'pooled'
+        status, hidden from players, until game_pool.claim hands it out.
+        The caller commits.
+
+        Args:
+            game_board (str): 'classic' or 'dual'
+            image_count (int): Number of images, or rounds for dual games
+            owner_id (str): User that owns the game until it is claimed
+
+        Returns:
+            int: ID of the pooled game
+        """
+        now = datetime.datetime.now()
+        game = Game(
+            game_mode='classic',
+            date_created=now,
+            game_board=game_board,
+            game_status=POOLED_STATUS,
+            created_by=owner_id,
+        )
+        self._create_game_images(game, str(uuid.uuid4())[:8].upper(), image_count)
+        db.session.add(GamePool(game_id=game.game_id, game_board=game_board, image_count=image_count, created_at=now))
+        return game.game_id
+
+    def _create_classic_game(self, image_count: int, user_id: str,
+                             before_commit: Optional[Callable[[], None]] = None) -> Tuple[int, str, int, List[Dict]]:
+        """Create and commit a new classic game and the creator's session, running before_commit last"""
+        new_game = Game(
+            game_mode='classic',
+            date_created=datetime.datetime.now(),
+            game_board='classic',
+            game_status='active',
+            expiry_date=datetime.datetime.now() + CLASSIC_GAME_LIFETIME,
+            created_by=user_id,
+        )
+        # Generate a unique game code
+        game_code = str(uuid.uuid4())[:8].upper()
+        images = self._create_game_images(new_game, game_code, image_count)
+        logger.debug("Game created successfully with ID: %s", new_game.game_id)
+
+        # Format images with their types for the response
+        image_data = [{
+            'url': get_image_view_url(image.image_path),
+            'type': image.image_type
+        } for image in images]
+
+        # Create initial game session for creator
+        user_session = UserGameSession(
+            game_id=new_game.game_id,
+            user_id=user_id,
+            start_time=datetime.datetime.now(),
+            session_status='active'
+        )
+        db.session.add(user_session)
+        db.session.flush()
+        # Read the generated ids before commit expires them
+        game_id = new_game.game_id
+        expiry_date = new_game.expiry_date
+        session_id = user_session.session_id
+        if before_commit is not None:
+            before_commit()
+        db.session.commit()
+        joinable_games.add(game_id, expiry_date)
+        return game_id, game_code, session_id, image_data
+
+    def initialize_classic_game(self, image_count: int, user_id: str) -> Tuple[str, List[Dict], str, UserTotals]:
         """
         Initialize a classic game with mixed real and AI images
         
@@ -20,103 +225,42 @@ class GameService:
             user_id (str): User's ID who is creating the game
             
         Returns:
-            Tuple[str, List[dict], string]: Game ID, list of image URLs, and game code
+            Tuple[str, List[dict], string, UserTotals]: Game ID, list of image URLs, game code
+            and the user's stats after counting the started game
         """
         try:
-            print(f"[DEBUG] Initializing classic game for user {user_id}")
-            print(f"[DEBUG] Requested image count: {image_count}")
-
-            # Calculate how many of each type to fetch
-            real_count = image_count // 2
-            ai_count = image_count // 2
-            
-            # If odd number, add one more real image
-            if image_count % 2 != 0:
-                real_count += 1
-                print(f"[DEBUG] Odd number of images, adding extra real image. Real: {real_count}, AI: {ai_count}")
-            
-            print(f"[DEBUG] Fetching {real_count} real images and {ai_count} AI images")
-            
-            real_images = get_images_rand(real_count, 'real')
-            print(f"[DEBUG] Got {len(real_images)} real images")
-            print(f"[DEBUG] Real image URLs: {real_images}")
-            
-            ai_images = get_images_rand(ai_count, 'ai')
-            print(f"[DEBUG] Got {len(ai_images)} AI images")
-            print(f"[DEBUG] AI image URLs: {ai_images}")
-
-            print("[DEBUG] Creating new game in database")
-            # Create new game in database
-            
-            new_game = Game(
-                game_mode='classic',
-                date_created=datetime.datetime.now(),
-                game_board='classic',
-                game_status='active',
-                expiry_date=datetime.datetime.now() + datetime.timedelta(days=1),  # Game expires in 24 hours
-                created_by=user_id,
-            )
-            db.session.add(new_game)
-            db.session.flush()  # This will show errors before commit
-            print(f"Game created successfully with ID: {new_game.game_id}")
-
-            # Generate a unique game code
-            game_code = str(uuid.uuid4())[:8].upper()
-            # Create GameCodeTable entry
-            game_code_entry = GameCode(
-                game_id=new_game.game_id,
-                game_code=game_code
-            )
-            # print in red
-            print(f"\033[91m[DEBUG] Game code: {game_code}\033[0m")
-            db.session.add(game_code_entry)
-            
-            # Format images with their types and create GameImages entries
-            image_data = []
-            print("[DEBUG] Processing images and creating GameImages entries")
-            for url in real_images + ai_images:
-                print(f"[DEBUG] Processing image URL: {url}")
-                # Get image_id from URL
-                image_path = url.split('/api/images/view/')[-1]
-                print(f"[DEBUG] Extracted image path: {image_path}")
-                image = Images.query.filter_by(image_path=image_path).first()
-                
-                if image:
-                    print(f"[DEBUG] Found image in database with ID: {image.image_id}")
-                    # Create GameImages entry
-                    game_image = GameImages(
-                        game_id=new_game.game_id,
-                        image_id=image.image_id
-                    )
-                    db.session.add(game_image)
-                    
-                    # Add to image_data for response
-                    image_data.append({
-                        'url': url,
-                        'type': image.image_type
-                    })
-                    print(f"[DEBUG] Added image to game: {url} (type: {image.image_type})")
-                else:
-                    print(f"[WARNING] Image not found in database: {image_path}")
-
-            print("[DEBUG] Creating initial game session for creator")
-            # Create initial game session for creator
-            user_session = UserGameSession(
-                game_id=new_game.game_id,
-                user_id=user_id,
-                start_time=datetime.datetime.now(),
-                session_status='active'
-            )
-            db.session.add(user_session)
-            db.session.commit()
-            print(f"[DEBUG] Created user session with ID: {user_session.session_id}")
+            logger.debug("Initializing classic game with %s images for user %s", image_count, user_id)
+
+            totals = None
+
+            def count_started_game():
+                # Committed together with the game and the session, and run last
+                # so the user's row stays locked only until that commit
+                nonlocal totals
+                totals = add_user_stats(user_id, games_started=1)
+                if totals is None:
+                    raise ValueError(f"User with ID {user_id} not found")
+
+            claimed = game_pool.claim('classic', image_count, user_id, CLASSIC_GAME_LIFETIME, create_session=True,
+                                      before_commit=count_started_game)
+            if claimed:
+                game_id, game_code, session_id = claimed
+                logger.debug("Claimed pooled game %s", game_id)
+                image_data = [{
+                    'url': get_image_view_url(self._image_path_from_url(image['url'])),
+                    'type': image['type']
+                } for image in game_manifest_cache.get_by_id(game_id).images]
+            else:
+                game_id, game_code, session_id, image_data = self._create_classic_game(
+                    image_count, user_id, before_commit=count_started_game
+                )
+            logger.debug("Created user session with ID: %s", session_id)
 
             # Store session in memory
-            session_key = f"{new_game.game_id}_{user_id}"
-            print(f"[DEBUG] Storing session in memory with key: {session_key}")
-            self.active_sessions[session_key] = {
-                'game_id': new_game.game_id,
-                'session_id': user_session.session_id,
+            session_key = f"{game_id}_{user_id}"
+            self.active_sessions.set(session_key, {
+                'game_id': game_id,
+                'session_id': session_id,
                 'user_id': user_id,
                 'type': 'classic',
                 'image_count': len(image_data),
@@ -124,14 +268,15 @@ class GameService:
                 'status': 'active',
                 'created_at': datetime.datetime.now(),
                 'last_accessed': datetime.datetime.now()
-            }
+            })
+
+            apply_user_totals(user_id, totals)
 
-            print(f"[DEBUG] Classic game initialized successfully with {len(image_data)} images")
-            return str(new_game.game_id), image_data, game_code
+            logger.debug("Classic game %s initialized with %s images", game_id, len(image_data))
+            return str(game_id), image_data, game_code, totals
 
         except Exception as e:
-            print(f"[ERROR] Error initializing classic game: {str(e)}")
-            print(f"[ERROR] Stack trace:", exc_info=True)
+            logger.exception("Error initializing classic game: %s", e)
             db.session.rollback()
             raise
 
@@ -142,20 +287,23 @@ class GameService:
         Join an existing game
         """
         try:
-            # Check if game exists and is active
-            game = Game.query.filter_by(
-                game_id=game_id, 
-                game_status='active'
-            ).first()
-            
-            if not game:
+            # Check if game exists and is active; status and expiry change on
+            # other workers, so they come from the row rather than the manifest
+            game = db.session.query(Game.game_status, Game.expiry_date).filter(Game.game_id == game_id).first()
+
+            if not game or game.game_status != 'active':
+                joinable_games.remove([game_id])
                 raise ValueError(f"Game {game_id} not found or not active")
 
             if game.expiry_date and game.expiry_date < datetime.datetime.now():
-                game.game_status = 'expired'
+                # The expiry sweeper would get to it eventually, but don't hand it out meanwhile
+                Game.query.filter_by(game_id=game_id).update({'game_status': 'expired'})
                 db.session.commit()
+                joinable_games.remove([game_id])
                 raise ValueError(f"Game {game_id} has expired")
 
+            manifest = game_manifest_cache.get_by_id(game_id)
+
             # Check if user already has a session for this game (active or completed)
             existing_session = UserGameSession.query.filter_by(
                 game_id=game_id,
@@ -175,24 +323,19 @@ class GameService:
                 start_time=datetime.datetime.now(),
                 session_status='active'
             )
-            print(f"User session: {user_session}")
             db.session.add(user_session)
+            db.session.flush()
+            session_id = user_session.session_id
             db.session.commit()
 
-            # Get game images
-            image_data = []
-            for game_image in game.game_images:
-                image = game_image.image
-                image_data.append({
-                    'url': f"/api/images/view/{image.image_path}",
-                    'type': image.image_type
-                })
+            # Game images come from the cached manifest
+            image_data = list(manifest.images)
 
             # Store session in memory
             session_key = f"{game_id}_{user_id}"
-            self.active_sessions[session_key] = {
+            self.active_sessions.set(session_key, {
                 'game_id': game_id,
-                'session_id': user_session.session_id,
+                'session_id': session_id,
                 'user_id': user_id,
                 'type': 'classic',
                 'image_count': len(image_data),
@@ -200,23 +343,23 @@ class GameService:
                 'status': 'active',
                 'created_at': datetime.datetime.now(),
                 'last_accessed': datetime.datetime.now()
-            }
+            })
 
             return str(game_id), image_data
 
         except Exception as e:
-            print(f"Error joining game: {str(e)}")
+            logger.info("Error joining game %s: %s", game_id, e)
             db.session.rollback()
             raise
     def finish_classic_game(self, game_id, user_id, user_guesses):
         """
-        Finish a classic game and update user's score
+        Finish a classic game, store each guess as a UserGuess row and update user's score
         """
         try:
-            print(f"Starting game completion for user {user_id}, game {game_id}")
+            logger.debug("Starting game completion for user %s, game %s", user_id, game_id)
             
             # Get the user and game
-            user = Users.query.filter_by(user_id=user_id).first()
+            user = load_user(user_id)
             game = Game.query.filter_by(game_id=game_id).first()
             
             if not user or not game:
@@ -230,7 +373,7 @@ class GameService:
             
             start_time = datetime.datetime.now()
             if not session:
-                print(f"Creating new game session for user {user_id}")
+                logger.debug("Creating new game session for user %s", user_id)
                 session = UserGameSession(
                     game_id=game_id,
                     user_id=user_id,
@@ -239,28 +382,46 @@ class GameService:
                 )
                 db.session.add(session)
                 db.session.flush()
+            elif session.session_status == 'completed':
+                # Finishing twice would double count the score and the stored guesses
+                raise ValueError(f"User has already finished game {game_id}")
             else:
                 start_time = session.start_time or start_time
-                print(f"Found existing session {session.session_id}")
+                logger.debug("Found existing session %s", session.session_id)
             
-            # Process guesses and calculate score
+            # Resolve every guessed image in one lookup, then score in a single pass
+            current_time = datetime.datetime.now()
+            images_by_path = self._resolve_guessed_images(user_guesses)
             correct_guesses = 0
             total_guesses = len(user_guesses)
+            guess_rows = []
             
             for guess in user_guesses:
-                image_path = guess['url'].split('/api/images/view/')[-1]
-                image = Images.query.filter_by(image_path=image_path).first()
-                
-                if image and guess['guess'] == image.image_type:
+                image = images_by_path.get(self._image_path_from_url(guess['url']))
+                if not image:
+                    continue
+                if guess['guess'] == image.image_type:
                     correct_guesses += 1
+                guess_rows.append({
+                    'session_id': session.session_id,
+                    'image_id': image.image_id,
+                    'user_id': user_id,
+                    'user_guess_type': guess['guess'],
+                    'date_of_guess': current_time,
+                    'time_taken': guess.get('timeTaken'),
+                })
+            
+            # Persist the individual guesses with one multi-row insert
+            if guess_rows:
+                db.session.execute(insert(UserGuess), guess_rows)
+                record_guesses(guess_rows, {image.image_id: image.image_type for image in images_by_path.values()})
             
             # Calculate metrics
-            current_time = datetime.datetime.now()
             accuracy = (correct_guesses / total_guesses * 100) if total_guesses > 0 else 0
             score = correct_guesses * 10
             time_taken = (current_time - start_time).total_seconds()
             
-            print(f"Updating session {session.session_id} with completion data")
+            logger.debug("Updating session %s with completion data", session.session_id)
             # Update session with completion data
             session.completion_time = current_time
             session.final_score = score
@@ -270,24 +431,28 @@ class GameService:
             session.accuracy = accuracy
             session.time_taken = time_taken
             
-            # Update user stats
-            user.score = (user.score or 0) + score
-            user.games_won = (user.games_won or 0) + (1 if correct_guesses > 0 else 0)
-            user.games_started = (user.games_started or 0) + 1
+            # Update user stats in SQL, the loaded row may be a few seconds old
+            totals = add_user_stats(
+                user_id, score=score, games_won=1 if correct_guesses > 0 else 0, games_started=1
+            )
+            if totals is None:
+                raise ValueError("User or game not found")
             
-            print(f"Game session data:")
-            print(f"Session ID: {session.session_id}")
-            print(f"Start Time: {session.start_time}")
-            print(f"Completion Time: {session.completion_time}")
-            print(f"Score: {session.final_score}")
-            print(f"Correct Guesses: {session.correct_guesses}/{session.total_guesses}")
-            print(f"Accuracy: {session.accuracy:.2f}%")
-            print(f"Time Taken: {session.time_taken} seconds")
-            print(f"Status: {session.session_status}")
+            # Read before commit expires the session
+            session_id = session.session_id
+            username = user.username
+            name = display_name(user)
+            logger.debug(
+                "Game session %s: score %s, %s/%s correct, accuracy %.2f%%, %s seconds",
+                session_id, score, correct_guesses, total_guesses, accuracy, time_taken
+            )
             
             # Commit all changes
             db.session.commit()
-            print(f"Successfully saved game session {session.session_id}")
+            apply_user_totals(user_id, totals)
+            record_game(user_id, name, correct_guesses, total_guesses, len(guess_rows))
+            rank_index.set_score(user_id, totals.score, username)
+            self.active_sessions.delete(f"{game_id}_{user_id}")
             
             return {
                 'score': score,
@@ -296,15 +461,42 @@ class GameService:
                 'accuracy': accuracy,
                 'completionTime': current_time.isoformat(),
                 'timeTaken': time_taken,
-                'sessionId': session.session_id,
+                'sessionId': session_id,
+                'totalScore': totals.score,
+                'gamesWon': totals.games_won,
+                'gamesStarted': totals.games_started,
                 'status': 'success'
             }
             
         except Exception as e:
-            print(f"Error in finish_classic_game: {str(e)}")
+            logger.info("Error in finish_classic_game: %s", e)
             db.session.rollback()
             raise
 
+    @staticmethod
+    def _image_path_from_url(url: str) -> str:
+        """Strip the host and view route from an image URL, leaving the stored image_path"""
+        return url.split('/api/images/view/')[-1]
+
+    def _resolve_guessed_images(self, user_guesses: List[Dict]) -> Dict:
+        """
+        Look up the images behind a list of guesses with a single IN query
+
+        Returns:
+            Dict: image_path -> (image_id, image_path, image_type) row
+        """
+        paths = {self._image_path_from_url(guess['url']) for guess in user_guesses}
+        if not paths:
+            return {}
+        rows = db.session.query(
+            Images.image_id, Images.image_path, Images.image_type
+        ).filter(Images.image_path.in_(paths)).order_by(Images.image_id).all()
+        images_by_path = {}
+        for row in rows:
+            # Match the old filter_by(...).first() behaviour for duplicate paths
+            images_by_path.setdefault(row.image_path, row)
+        return images_by_path
+
     def get_session(self, game_id: str, user_id: str) -> Dict:
         """Get game session data for a specific user"""
         session_key = f"{game_id}_{user_id}"
@@ -312,79 +504,60 @@ class GameService:
         if not session:
             raise ValueError(f"Session not found for user {user_id} in game {game_id}")
         session['last_accessed'] = datetime.datetime.now()
+        self.active_sessions.set(session_key, session)
         return session
     
 
+    def get_game_manifest(self, game_id: str) -> GameManifest:
+        """
+        Get the cached manifest for a game
+
+        Args:
+            game_id (str): Game code or ID of the game to retrieve
+
+        Returns:
+            GameManifest: Immutable image data for the game
+
+        Raises:
+            ValueError: If no game matches the code or ID
+        """
+        manifest = game_manifest_cache.get_by_code(str(game_id))
+        if not manifest and str(game_id).isdigit():
+            manifest = game_manifest_cache.get_by_id(game_id)
+        if not manifest:
+            raise ValueError(f"Game with ID {game_id} not found")
+        return manifest
+
     def get_game(self, game_id: str, user_id: str = None) -> Dict:
         """
-        Get game data including images and sessions
+        Get game data including images
         
         Args:
-            game_id (str): ID of the game to retrieve
-            user_id (str, optional): If provided, also returns this user's session data
+            game_id (str): Game code or ID of the game to retrieve
+            user_id (str, optional): ID of the user requesting the game
             
         Returns:
-            dict: Game data including images and sessions
+            dict: Game data including images
         """
         try:
-            print(f"Getting game with ID {game_id} for user {user_id}")
-            game_code_obj = GameCode.query.filter_by(game_code=game_id).first()
-            if game_code_obj:
-                game_id = game_code_obj.game_id
-            # Get the game
-            game = Game.query.filter_by(game_id=game_id).first()
-            print(f"Found game: {game}")
-            if not game:
-                raise ValueError(f"Game with ID {game_id} not found")
-            
-            # Get all game images
-            game_images = []
-            print(f"Getting images for game {game_id}")
-            for game_image in game.game_images:
-                image = game_image.image
-                print(f"Processing image {image.image_id}: {image.image_path}")
-                game_images.append({
-                    'url': f"/api/images/view/{image.image_path}",
-                    'type': image.image_type
-                })
-            print(f"Found {len(game_images)} images")
-            
-            # Get all sessions for this game
-            sessions = []
-            print(f"Getting sessions for game {game_id}")
-            # get game id from game code
-            # Check if game_id is actually a game code
-            
-            print(f"Game ID: {game_id}")
-            for session in UserGameSession.query.filter_by(game_id=game_id).all():
-                user = Users.query.filter_by(user_id=session.user_id).first()
-                print(f"Processing session {session.session_id} for user {user.username if user else 'Unknown'}")
-                
-                session_data = {
-                    'session_id': session.session_id,
-                    'user_id': session.user_id,
-                    'username': user.username if user else "Unknown",
-                    'start_time': session.start_time.isoformat() if session.start_time else None,
-                    'completion_time': session.completion_time.isoformat() if session.completion_time else None,
-                    'status': session.session_status,
-                    'score': session.final_score
-                }
-                print(f"Session data: {session_data}")
-                
-                sessions.append(session_data)
-            print(f"Found {len(sessions)} sessions")
-            
-            # Build response
-            response = {
-                'game_id': game.game_id,
-                'images': game_images,
+            manifest = self.get_game_manifest(game_id)
+            return {
+                'game_id': manifest.game_id,
+                'images': list(manifest.images),
             }
-            print(f"Returning response for game {game_id}")
-        
-            return response
             
         except Exception as e:
-            print(f"Error in get_game: {str(e)}")
+            logger.info("Error in get_game: %s", e)
+            raise
+
+    def get_game_json(self, game_id: str, user_id: str = None) -> bytes:
+        """
+        Same as get_game, but returns the pre-serialized JSON body
+        """
+        try:
+            return self.get_game_manifest(game_id).game_json
+        except Exception as e:
+            logger.info("Error in get_game: %s", e)
             raise
 
     def initialize_game_with_code(self, game_code: str, user_id: str, image_count: int) -> Tuple[str, List[Dict], str]:
@@ -401,20 +574,6 @@ class GameService:
         Raises:
             ValueError: If game not found, expired, or user already completed it
         """
-        real_count = image_count // 2
-        ai_count = image_count // 2
-        
-        # If odd number, add one more real image
-        if image_count % 2 != 0:
-            real_count += 1
-        
-        print(f"Fetching {real_count} real images and {ai_count} AI images")
-        
-        real_images = get_images_rand(real_count, 'real')
-        print(f"Got {len(real_images)} real images")
-        
-        ai_images = get_images_rand(ai_count, 'ai')
-        print(f"Got {len(ai_images)} AI images")
         # Check if game code exists
         check_game_code = Game.query.filter_by(game_id=int(game_code)).first()
         if check_game_code:
@@ -431,34 +590,15 @@ class GameService:
             expiry_date=datetime.datetime.now() + datetime.timedelta(days=1),
             created_by=user_id
         )
-        db.session.add(new_game)
-        db.session.flush()
-        # Create GameCode entry
-        game_code_entry = GameCode(
-            game_id=new_game.game_id,
-            game_code=game_code
-        )
-        db.session.add(game_code_entry)
-           # Format images with their types and create GameImages entries
-        image_data = []
-        for url in real_images + ai_images:
-            # Get image_id from URL
-            image_path = url.split('/api/images/view/')[-1]
-            image = Images.query.filter_by(image_path=image_path).first()
-            
-            if image:
-                # Create GameImages entry
-                game_image = GameImages(
-                    game_id=new_game.game_id,
-                    image_id=image.image_id
-                )
-                db.session.add(game_image)
-                
-                # Add to image_data for response
-                image_data.append({
-                    'url': url,
-                    'type': image.image_type
-                })
+        images = self._create_game_images(new_game, game_code, image_count)
+        # Only joinable once the route commits; join_game drops it if that fails
+        joinable_games.add(new_game.game_id, new_game.expiry_date)
+
+        # Format images with their types for the response
+        image_data = [{
+            'url': get_image_view_url(image.image_path),
+            'type': image.image_type
+        } for image in images]
         return str(new_game.game_id), image_data, game_code
     def get_random_competition_game(self, user_id: str) -> Tuple[str, List[Dict]]:
         """
@@ -471,106 +611,66 @@ class GameService:
             Tuple[str, List[Dict]]: Game ID and list of image URLs
         """
         try:
-            print(f"Getting random game for user {user_id}")
+            logger.debug("Getting random game for user %s", user_id)
             
             # Get a random game that is active and not expired
-            game = Game.query.filter(
-                Game.game_status == 'active',
-                (Game.expiry_date > datetime.datetime.now()) | (Game.expiry_date.is_(None))
-            ).order_by(db.func.random()).first()
+            game_id = joinable_games.pick()
             
-            if not game:
+            if game_id is None:
                 raise ValueError("No active non-expired games found")
             
-            print(f"Found game ID: {game.game_id}")
+            logger.debug("Found game ID: %s", game_id)
             
             # Use the join_game method to get the game details
-            return self.join_game(game.game_id, user_id)
+            return self.join_game(game_id, user_id)
             
         except Exception as e:
-            print(f"Error getting random game: {str(e)}")
+            logger.info("Error getting random game: %s", e)
             raise
     
     def initialize_dual_game(self, round_count: int, user_id: str = "1") -> str:
         try:
-            print(f"[DEBUG] Initializing dual classic game for user {user_id}")
-            print(f"[DEBUG] Requested round count: {round_count}")
+            logger.debug("Initializing dual classic game with %s rounds for user %s", round_count, user_id)
 
-            # Calculate how many of each type to fetch
-            real_count = round_count
-            ai_count = round_count
-            
-            print(f"[DEBUG] Fetching {real_count} real images and {ai_count} AI images")
-            
-            real_images = get_images_rand(real_count, 'real')
-            print(f"[DEBUG] Got {len(real_images)} real images")
-            print(f"[DEBUG] Real image URLs: {real_images}")
-            
-            ai_images = get_images_rand(ai_count, 'ai')
-            print(f"[DEBUG] Got {len(ai_images)} AI images")
-            print(f"[DEBUG] AI image URLs: {ai_images}")
+            claimed = game_pool.claim('dual', round_count, user_id, DUAL_GAME_LIFETIME)
+            if claimed:
+                logger.debug("Claimed pooled dual game %s", claimed[0])
+                return claimed[1]
 
-            print("[DEBUG] Creating new game in database")
-            
-            # Create new game in database
-            
             new_game = Game(
                 game_mode='classic',
                 date_created=datetime.datetime.now(),
                 game_board='dual',
                 game_status='active',
-                expiry_date=datetime.datetime.now() + datetime.timedelta(days=7),  # Game expires in 7 days
+                expiry_date=datetime.datetime.now() + DUAL_GAME_LIFETIME,
                 created_by=user_id,
             )
-            db.session.add(new_game)
-            db.session.flush()  # This will show errors before commit
-            print(f"Dual Game created successfully with ID: {new_game.game_id}")
-
             # Generate a unique game code
             game_code = str(uuid.uuid4())[:8].upper()
-            # Create GameCodeTable entry
-            game_code_entry = GameCode(
-                game_id=new_game.game_id,
-                game_code=game_code
-            )
-            # print in red
-            print(f"\033[91m[DEBUG] Game code: {game_code}\033[0m")
-            db.session.add(game_code_entry)
-
-
-            for i in range(round_count):
-                real_img = real_images[i]
-                ai_img = ai_images[i]
-
-                for url in [real_img, ai_img]:
-                    print(f"[DEBUG] Processing image URL: {url}")
-                    # Get image_id from URL
-                    image_path = url.split('/api/images/view/')[-1]
-                    print(f"[DEBUG] Extracted image path: {image_path}")
-                    image = Images.query.filter_by(image_path=image_path).first()
-                    
-                    if image:
-                        print(f"[DEBUG] Found image in database with ID: {image.image_id}")
-                        # Create GameImages entry
-                        game_image = GameImages(
-                            game_id=new_game.game_id,
-                            image_id=image.image_id
-                        )
-                        db.session.add(game_image)
-                    else:
-                        print(f"[WARNING] Image not found in database: {image_path}")
-                
+            self._create_game_images(new_game, game_code, round_count)
+            logger.debug("Dual game created successfully with ID: %s", new_game.game_id)
+            game_id = new_game.game_id
+            expiry_date = new_game.expiry_date
+
             db.session.commit()
+            joinable_games.add(game_id, expiry_date)
             return game_code
 
         except Exception as e:
-            print(f"[ERROR] Error initializing dual classic game: {str(e)}")
-            print(f"[ERROR] Stack trace:", exc_info=True)
+            logger.exception("Error initializing dual classic game: %s", e)
             db.session.rollback()
             raise
 
 
 
+    def _get_dual_game_manifest(self, game_code: str) -> GameManifest:
+        manifest = game_manifest_cache.get_by_code(game_code)
+        if not manifest:
+            raise ValueError(f"Game code {game_code} not found")
+        if manifest.rounds is None:
+            raise ValueError(f"Invalid number of images for dual game: {len(manifest.images)}")
+        return manifest
+
     def get_dual_game_by_game_code(self, game_code: str, user_id: str = None) -> Dict:
         """
         Get a dual game by its game code
@@ -583,28 +683,21 @@ class GameService:
             Dict: A dictionary containing dual game data
         """
         try:
-            print(f"Getting dual game with code {game_code}")
-            
-            # Get the game ID from the game code
-            game_code_obj = GameCode.query.filter_by(game_code=game_code).first()
-            if not game_code_obj:
-                raise ValueError(f"Game code {game_code} not found")
-            
-            game_id = game_code_obj.game_id
-            print(f"Found game ID: {game_id}")
+            return self._get_dual_game_manifest(game_code).dual_game()
             
-            # Use the join_game method to get the game details
-            response = self.get_dual_game_by_id(game_id)
-            response['gameCode'] = game_code
-            response["settings"] = {
-                    "totalRounds": len(response["rounds"]),
-                    "timerPerRound": 60,
-                }
-            print(f"Returning response for dual game {game_id} \n response: {response}")
-            return response
+        except Exception as e:
+            logger.info("Error getting dual game by code: %s", e)
+            raise
+
+    def get_dual_game_json_by_game_code(self, game_code: str) -> bytes:
+        """
+        Get the pre-serialized {"game_data": ..., "status": "success"} body for a dual game
+        """
+        try:
+            return self._get_dual_game_manifest(game_code).dual_game_json
             
         except Exception as e:
-            print(f"Error getting dual game by code: {str(e)}")
+            logger.info("Error getting dual game by code: %s", e)
             raise
 
 
@@ -619,50 +712,17 @@ class GameService:
             Dict: A dictionary containing dual game data        
         """
         try:
-            print(f"Getting dual game with ID {game_id}")
-            
-            # Get the game
-            game = Game.query.filter_by(game_id=game_id).first()
-            if not game:
+            manifest = game_manifest_cache.get_by_id(game_id)
+            if not manifest:
                 raise ValueError(f"Dual Game with ID {game_id} not found")
-            print(f"Found dual game: {game}")
+            if manifest.rounds is None:
+                raise ValueError(f"Invalid number of images for dual game: {len(manifest.images)}")
             
-            # Get all game images
-            game_images = []
-            isCorrect = True
-            sorted_game_images = sorted(game.game_images, key=lambda gi: gi.id)
-            print(f"Getting images for dual game {game_id}")
-            for game_image in sorted_game_images:
-                image = game_image.image
-                game_images.append({
-                    'id': str(game_image.id),
-                    'url': f"/api/images/view/{image.image_path}",
-                    "isCorrect": isCorrect,
-                })
-                isCorrect = not isCorrect
-            print(f"Found {len(game_images)} images")
-            if (len(game_images) % 2) != 0:
-                raise ValueError(f"Invalid number of images for dual game: {len(game_images)}")
-            
-            # Create rounds
-            rounds = []
-            for i in range(0, len(game_images), 2):
-                round_images = game_images[i:i + 2]
-                rounds.append({
-                    'roundId': str(i // 2),
-                    'images': round_images
-                })
-            
-            # Build response
-            response = {
-                "gameId": str(game_id),
-                "rounds": rounds
+            return {
+                "gameId": str(manifest.game_id),
+                "rounds": list(manifest.rounds)
             }
-
-            print(f"Returning response for dual game {game_id} \n response: {response}")
-            
-            return response
         
         except Exception as e:
-            print(f"Error getting dual game by ID: {str(e)}")
+            logger.info("Error getting dual game by ID: %s", e)
             raise
@@ -0,0 +1,171 @@
+from collections import namedtuple
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import Date, String, and_, cast, func, literal, select, union_all
+
+from __init__ import db
+from models import GuessDailyRollup, Images, UserGuess, UserTags
+
+GLOBAL = 'global'
+IMAGE = 'image'
+USER = 'user'
+TAG = 'tag'
+MONTH = 'month'
+DEFAULT_MONTHS = 12
+
+# Cell name -> (image type, guessed type)
+_CELLS = {
+    'real_real': ('real', 'real'),
+    'real_ai': ('real', 'ai'),
+    'ai_real': ('ai', 'real'),
+    'ai_ai': ('ai', 'ai'),
+}
+# Served from guess_daily_rollup, the others scan user_guesses
+ROLLUP_SCOPES = (GLOBAL, IMAGE, MONTH)
+
+
+class ConfusionCounts(namedtuple('ConfusionCounts', ['real_real', 'real_ai', 'ai_real', 'ai_ai', 'total'])):
+    """
+    Guess counts of one scope by image type and guessed type, with "real"
+    as the positive class. ``total`` counts every guess, including any with
+    another guessed type.
+    """
+
+    @property
+    def correct(self) -> int:
+        return self.real_real + self.ai_ai
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.total if self.total else 0
+
+    @property
+    def precision(self) -> float:
+        guessed_real = self.real_real + self.ai_real
+        return self.real_real / guessed_real if guessed_real else 0
+
+    @property
+    def recall(self) -> float:
+        real = self.real_real + self.real_ai
+        return self.real_real / real if real else 0
+
+    @property
+    def f1_score(self) -> float:
+        precision, recall = self.precision, self.recall
+        return 2 * (precision * recall) / (precision + recall) if (precision + recall) else 0
+
+    def confusion_matrix(self) -> Dict[str, int]:
+        """The matrix in the shape the admin pages read"""
+        return {
+            "truePositive": self.real_real,
+            "falsePositive": self.real_ai,
+            "falseNegative": self.ai_real,
+            "trueNegative": self.ai_ai,
+        }
+
+    def ml_metrics(self) -> Dict[str, float]:
+        cells = self.real_real + self.real_ai + self.ai_real + self.ai_ai
+        return {
+            "accuracy": self.correct / cells if cells else 0,
+            "precision": self.precision,
+            "recall": self.recall,
+            "f1Score": self.f1_score,
+        }
+
+
+EMPTY_COUNTS = ConfusionCounts(0, 0, 0, 0, 0)
+
+
+def aggregate_guesses(scopes: Dict[str, Any]) -> Dict[str, Dict[Any, ConfusionCounts]]:
+    """
+    Confusion counts for several scopes in one statement; each scope is a
+    single pass with one FILTERed count per cell. The GLOBAL, IMAGE and
+    MONTH scopes read the daily rollup, so they cost one row per day and
+    image rather than one per guess.
+
+    ``scopes`` maps a scope to what to compute for it:
+
+    - GLOBAL: ignored, every guess counts
+    - IMAGE, USER, TAG: the image / user / tag ids to return, or None for all
+    - MONTH: how many months back to go, grouped by 'YYYY-MM'
+
+    Returns:
+        dict: scope -> key -> counts; the GLOBAL key is None. Keys without
+        guesses are missing, use EMPTY_COUNTS for them.
+    """
+    if not scopes:
+        return {}
+    results = {scope: {} for scope in scopes}
+    for row in db.session.execute(_aggregate_statement(scopes)):
+        key = row.key
+        if row.scope in (IMAGE, TAG):
+            key = int(key)
+        results[row.scope][key] = ConfusionCounts(*(row[2:]))
+    return results
+
+
+def _aggregate_statement(scopes: Dict[str, Any]):
+    """One SELECT per scope, joined with UNION ALL"""
+    selects = [_scope_select(scope, value) for scope, value in scopes.items()]
+    return selects[0] if len(selects) == 1 else union_all(*selects)
+
+
+def _scope_select(scope: str, value: Any):
+    if scope in ROLLUP_SCOPES:
+        return _rollup_select(scope, value)
+
+    columns = [
+        func.count().filter(and_(Images.image_type == image_type, UserGuess.user_guess_type == guess_type)).label(name)
+        for name, (image_type, guess_type) in _CELLS.items()
+    ]
+    columns.append(func.count().label('total'))
+
+    if scope == USER:
+        key = UserGuess.user_id
+    elif scope == TAG:
+        key = UserTags.tag_id
+    else:
+        raise ValueError(f"Unknown scope: {scope}")
+
+    query = select(literal(scope).label('scope'), cast(key, String).label('key'), *columns)
+    query = query.select_from(UserGuess).join(Images, UserGuess.image_id == Images.image_id)
+    if scope == TAG:
+        query = query.join(UserTags, UserTags.user_id == UserGuess.user_id)
+    if value is not None:
+        query = query.where(key.in_(list(value)))
+    return query.group_by(key)
+
+
+def _rollup_select(scope: str, value: Any):
+    count = GuessDailyRollup.guess_count
+    columns = [
+        func.coalesce(func.sum(count).filter(and_(
+            GuessDailyRollup.image_type == image_type, GuessDailyRollup.guess_type == guess_type,
+        )), 0).label(name)
+        for name, (image_type, guess_type) in _CELLS.items()
+    ]
+    columns.append(func.coalesce(func.sum(count), 0).label('total'))
+
+    if scope == GLOBAL:
+        key = literal(None, String)
+    elif scope == IMAGE:
+        key = GuessDailyRollup.image_id
+    else:
+        key = func.to_char(GuessDailyRollup.day, 'YYYY-MM')
+
+    query = select(literal(scope).label('scope'), cast(key, String).label('key'), *columns)
+    query = query.select_from(GuessDailyRollup)
+    if scope == MONTH:
+        months = DEFAULT_MONTHS if value is None else int(value)
+        query = query.where(GuessDailyRollup.day >= cast(func.now() - func.make_interval(0, months), Date))
+    elif scope == IMAGE and value is not None:
+        query = query.where(key.in_(list(value)))
+    if scope != GLOBAL:
+        query = query.group_by(key)
+    return query
+
+
+def guess_counts(scope: str, key: Optional[Any] = None) -> ConfusionCounts:
+    """Counts of a single key of the GLOBAL, IMAGE, USER or TAG scope, e.g. guess_counts(IMAGE, 12)"""
+    keys: Optional[Iterable] = None if scope == GLOBAL else [key]
+    return aggregate_guesses({scope: keys}).get(scope, {}).get(key, EMPTY_COUNTS)
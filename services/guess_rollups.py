@@ -0,0 +1,266 @@
+import datetime
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from __init__ import db
+from models import FeedbackDailyRollup, GuessDailyRollup, RollupWatermark, UserDailyRollup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATCH_UP_INTERVAL = 300
+# Days recomputed per transaction, so a backfill never holds the rollup lock for long
+CATCH_UP_BATCH_DAYS = 31
+GUESS_WATERMARK = 'guesses'
+FEEDBACK_WATERMARK = 'feedback'
+
+# Held until commit; guess writers take ROW EXCLUSIVE on the rollups when they
+# add to them, so a recompute never overlaps a writer's uncommitted increments
+LOCK_ROLLUPS = text(
+    "LOCK TABLE guess_daily_rollup, user_daily_rollup, feedback_daily_rollup IN EXCLUSIVE MODE"
+)
+READ_WATERMARK = text("SELECT last_id FROM rollup_watermarks WHERE name = :name")
+WRITE_WATERMARK = text("""
+    INSERT INTO rollup_watermarks (name, last_id, updated_at)
+    VALUES (:name, :last_id, :now)
+    ON CONFLICT (name) DO UPDATE
+    SET last_id = EXCLUDED.last_id, updated_at = EXCLUDED.updated_at
+""")
+# Days touched by guesses written since the watermark
+NEW_GUESS_DAYS = text("""
+    SELECT CAST(date_of_guess AS DATE) AS day, MAX(guess_id) AS last_id
+    FROM user_guesses
+    WHERE guess_id > :watermark
+    GROUP BY 1
+""")
+# Days of the guesses that got feedback since the watermark, which may be old guesses
+NEW_FEEDBACK_DAYS = text("""
+    SELECT CAST(g.date_of_guess AS DATE) AS day, MAX(f.feedback_id) AS last_id
+    FROM feedback_users f JOIN user_guesses g ON g.guess_id = f.guess_id
+    WHERE f.feedback_id > :watermark
+    GROUP BY 1
+""")
+# Guesses of the given days; the range lets ix_user_guesses_date_of_guess narrow the scan
+_DAYS = """
+    g.date_of_guess >= :first_day AND g.date_of_guess < :end_day
+    AND CAST(g.date_of_guess AS DATE) = ANY(:days)
+"""
+RECOMPUTE_QUERIES = [
+    text("DELETE FROM guess_daily_rollup WHERE day = ANY(:days)"),
+    text("DELETE FROM user_daily_rollup WHERE day = ANY(:days)"),
+    text("DELETE FROM feedback_daily_rollup WHERE day = ANY(:days)"),
+    text(f"""
+        INSERT INTO guess_daily_rollup (day, image_id, image_type, guess_type, guess_count)
+        SELECT CAST(g.date_of_guess AS DATE), g.image_id, i.image_type, g.user_guess_type, COUNT(*)
+        FROM user_guesses g JOIN images i ON i.image_id = g.image_id
+        WHERE {_DAYS}
+        GROUP BY 1, 2, 3, 4
+    """),
+    text(f"""
+        INSERT INTO user_daily_rollup (day, user_id, guess_count, correct_count)
+        SELECT CAST(g.date_of_guess AS DATE), g.user_id, COUNT(*),
+               COUNT(*) FILTER (WHERE g.user_guess_type = i.image_type)
+        FROM user_guesses g JOIN images i ON i.image_id = g.image_id
+        WHERE {_DAYS}
+        GROUP BY 1, 2
+    """),
+    text(f"""
+        INSERT INTO feedback_daily_rollup (day, image_id, feedback_count)
+        SELECT CAST(g.date_of_guess AS DATE), g.image_id, COUNT(*)
+        FROM feedback_users f JOIN user_guesses g ON g.guess_id = f.guess_id
+        WHERE {_DAYS}
+        GROUP BY 1, 2
+    """),
+]
+
+
+def rollup_rows(guesses: Iterable[Dict], image_types: Dict[int, str]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    guess_daily_rollup and user_daily_rollup increments for the given guesses
+
+    Args:
+        guesses: user_guesses rows as dicts
+        image_types: Image type of every guessed image id
+    """
+    by_image, by_user, correct = Counter(), Counter(), Counter()
+    for guess in guesses:
+        day = guess['date_of_guess'].date()
+        image_type = image_types[guess['image_id']]
+        by_image[(day, guess['image_id'], image_type, guess['user_guess_type'])] += 1
+        by_user[(day, guess['user_id'])] += 1
+        if guess['user_guess_type'] == image_type:
+            correct[(day, guess['user_id'])] += 1
+    guess_rows = [
+        {'day': day, 'image_id': image_id, 'image_type': image_type, 'guess_type': guess_type, 'guess_count': count}
+        for (day, image_id, image_type, guess_type), count in by_image.items()
+    ]
+    user_rows = [
+        {'day': day, 'user_id': user_id, 'guess_count': count, 'correct_count': correct[(day, user_id)]}
+        for (day, user_id), count in by_user.items()
+    ]
+    return guess_rows, user_rows
+
+
+def record_guesses(guesses: Iterable[Dict], image_types: Dict[int, str]) -> None:
+    """
+    Add guesses written in the current transaction to the rollups, so they
+    show up on the dashboard as soon as the transaction commits
+    """
+    guess_rows, user_rows = rollup_rows(guesses, image_types)
+    if not guess_rows:
+        return
+
+    # Rows are aggregated first, an upsert may only touch each key once
+    statement = insert(GuessDailyRollup).values(guess_rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['day', 'image_id', 'image_type', 'guess_type'],
+        set_={'guess_count': GuessDailyRollup.guess_count + statement.excluded.guess_count},
+    ))
+    statement = insert(UserDailyRollup).values(user_rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['day', 'user_id'],
+        set_={
+            'guess_count': UserDailyRollup.guess_count + statement.excluded.guess_count,
+            'correct_count': UserDailyRollup.correct_count + statement.excluded.correct_count,
+        },
+    ))
+
+
+def record_feedback(guesses: Iterable[Dict]) -> None:
+    """
+    Add feedback written in the current transaction to feedback_daily_rollup,
+    one entry per feedback with the date_of_guess and image_id of the guess it
+    was left on
+    """
+    by_image = Counter((guess['date_of_guess'].date(), guess['image_id']) for guess in guesses)
+    if not by_image:
+        return
+    statement = insert(FeedbackDailyRollup).values([
+        {'day': day, 'image_id': image_id, 'feedback_count': count}
+        for (day, image_id), count in by_image.items()
+    ])
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['day', 'image_id'],
+        set_={'feedback_count': FeedbackDailyRollup.feedback_count + statement.excluded.feedback_count},
+    ))
+
+
+def catch_up(batch_days: int = CATCH_UP_BATCH_DAYS) -> int:
+    """
+    Recompute the rollups of every day with guesses or feedback written
+    since the watermarks
+
+    Recomputing whole days from user_guesses makes the catch-up idempotent:
+    it folds in guesses and feedback written by anything that doesn't call
+    record_guesses / record_feedback (scripts, imports) without double
+    counting the ones that did. The first run backfills the whole history.
+
+    Days are recomputed batch_days at a time, each batch in its own
+    transaction under LOCK_ROLLUPS, so guess writers only ever wait for one
+    batch. The watermarks move with the last batch; an interrupted run
+    starts over from the previous ones.
+
+    Returns:
+        int: Number of days recomputed
+    """
+    try:
+        watermarks = {name: _read_watermark(name) for name in (GUESS_WATERMARK, FEEDBACK_WATERMARK)}
+        new_days = {
+            GUESS_WATERMARK: db.session.execute(NEW_GUESS_DAYS, {'watermark': watermarks[GUESS_WATERMARK]}).all(),
+            FEEDBACK_WATERMARK: db.session.execute(
+                NEW_FEEDBACK_DAYS, {'watermark': watermarks[FEEDBACK_WATERMARK]}
+            ).all(),
+        }
+        # End the read transaction before taking the lock
+        db.session.commit()
+        days = sorted({row.day for rows in new_days.values() for row in rows})
+        for start in range(0, len(days), batch_days):
+            db.session.execute(LOCK_ROLLUPS)
+            recompute_days(days[start:start + batch_days])
+            if start + batch_days >= len(days):
+                for name, rows in new_days.items():
+                    if rows:
+                        _write_watermark(name, max(row.last_id for row in rows))
+            db.session.commit()
+        return len(days)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def recompute_days(days: List[datetime.date]) -> None:
+    """Rebuild the rollup rows of the given days; the caller holds LOCK_ROLLUPS and commits"""
+    params = {
+        'days': days,
+        'first_day': min(days),
+        'end_day': max(days) + datetime.timedelta(days=1),
+    }
+    for query in RECOMPUTE_QUERIES:
+        db.session.execute(query, params)
+
+
+def rebuild() -> int:
+    """Drop the watermarks and the rollups and recompute every day, e.g. after guesses were deleted"""
+    try:
+        db.session.execute(LOCK_ROLLUPS)
+        db.session.query(RollupWatermark).delete()
+        for model in (GuessDailyRollup, UserDailyRollup, FeedbackDailyRollup):
+            db.session.query(model).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return catch_up()
+
+
+def _read_watermark(name: str) -> int:
+    return db.session.execute(READ_WATERMARK, {'name': name}).scalar() or 0
+
+
+def _write_watermark(name: str, last_id: int) -> None:
+    db.session.execute(WRITE_WATERMARK, {'name': name, 'last_id': last_id, 'now': datetime.datetime.now()})
+
+
+class RollupCatchUp(threading.Thread):
+    """Background thread that runs the catch-up on start and then periodically"""
+
+    def __init__(self, app, interval: int = DEFAULT_CATCH_UP_INTERVAL):
+        super().__init__(name='guess-rollup-catch-up', daemon=True)
+        self.app = app
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            try:
+                with self.app.app_context():
+                    days = catch_up()
+                    db.session.remove()
+                if days:
+                    logger.info("Recomputed guess rollups of %d days", days)
+            except Exception as e:
+                logger.error("Error catching up guess rollups: %s", e)
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+_catch_up: Optional[RollupCatchUp] = None
+
+
+def init_app(app) -> None:
+    """Start the catch-up thread, unless GUESS_ROLLUP_INTERVAL is 0"""
+    global _catch_up
+    if _catch_up is not None:
+        _catch_up.stop()
+        _catch_up = None
+    interval = int(app.config.get('GUESS_ROLLUP_INTERVAL', DEFAULT_CATCH_UP_INTERVAL))
+    if interval > 0:
+        _catch_up = RollupCatchUp(app, interval=interval)
+        _catch_up.start()
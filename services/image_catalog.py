@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from __init__ import db
+from models import Images
+
+# How long (seconds) a loaded catalog is trusted before it is re-read from the
+# database, same as the image sampler
+REFRESH_INTERVAL = 300
+# Columns stored as small integer codes into a per-column vocabulary
+CODED_COLUMNS = ('image_type', 'gender', 'disease')
+# Stored in the age column for images without an age
+NO_AGE = -1
+
+CatalogRow = namedtuple('CatalogRow', ['image_id', 'image_path'])
+
+
+class CatalogSnapshot:
+    """
+    One immutable version of the catalog: a column per image attribute, all
+    of the same length, plus the vocabularies the coded columns index into.
+
+    Filters return boolean masks that are combined with ``&`` and ``|`` and
+    then passed to ``count``, ``first`` or ``sample``.
+    """
+
+    def __init__(self, ids: np.ndarray, codes: Dict[str, np.ndarray], vocabularies: Dict[str, List[Optional[str]]],
+                 ages: np.ndarray, path_index: np.ndarray, paths: List[str]):
+        self.ids = ids
+        self.codes = codes
+        self.vocabularies = vocabularies
+        self.ages = ages
+        self.path_index = path_index
+        self.paths = paths
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def all(self) -> np.ndarray:
+        return np.ones(len(self.ids), dtype=bool)
+
+    def match(self, column: str, value: Optional[str]) -> np.ndarray:
+        """Rows whose coded column equals value"""
+        vocabulary = self.vocabularies[column]
+        if value not in vocabulary:
+            return np.zeros(len(self.ids), dtype=bool)
+        return self.codes[column] == vocabulary.index(value)
+
+    def contains(self, column: str, text: str) -> np.ndarray:
+        """Rows whose coded column contains text, like SQL ``LIKE '%text%'``"""
+        matching = [code for code, value in enumerate(self.vocabularies[column]) if value is not None and text in value]
+        return np.isin(self.codes[column], matching)
+
+    def age_between(self, min_age: int, max_age: int) -> np.ndarray:
+        """Rows with an age in [min_age, max_age], like SQL ``BETWEEN``"""
+        return (self.ages >= min_age) & (self.ages <= max_age) & (self.ages != NO_AGE)
+
+    def count(self, mask: np.ndarray) -> int:
+        return int(np.count_nonzero(mask))
+
+    def image_ids(self, mask: np.ndarray) -> List[int]:
+        return self.ids[mask].tolist()
+
+    def first(self, mask: np.ndarray) -> Optional[CatalogRow]:
+        """The matching row with the lowest image id"""
+        positions = np.flatnonzero(mask)
+        if not len(positions):
+            return None
+        return self._row(positions[np.argmin(self.ids[positions])])
+
+    def sample(self, mask: np.ndarray, count: int = 1) -> List[CatalogRow]:
+        """Up to count distinct matching rows, drawn at random"""
+        positions = np.flatnonzero(mask)
+        if not len(positions) or count <= 0:
+            return []
+        drawn = np.random.choice(positions, size=min(count, len(positions)), replace=False)
+        return [self._row(position) for position in drawn]
+
+    def _row(self, position: int) -> CatalogRow:
+        return CatalogRow(int(self.ids[position]), self.paths[self.path_index[position]])
+
+
+def build_snapshot(rows: Iterable[Tuple]) -> CatalogSnapshot:
+    """Columns from (image_id, image_path, image_type, gender, age, disease) rows"""
+    rows = list(rows)
+    vocabularies = {column: [None] for column in CODED_COLUMNS}
+    lookups = {column: {None: 0} for column in CODED_COLUMNS}
+    codes = {column: np.empty(len(rows), dtype=np.int16) for column in CODED_COLUMNS}
+    ids = np.empty(len(rows), dtype=np.int64)
+    ages = np.empty(len(rows), dtype=np.int16)
+    paths = []
+    for position, (image_id, image_path, image_type, gender, age, disease) in enumerate(rows):
+        ids[position] = image_id
+        ages[position] = NO_AGE if age is None else age
+        paths.append(image_path)
+        for column, value in zip(CODED_COLUMNS, (image_type, gender, disease)):
+            codes[column][position] = _code(value, vocabularies[column], lookups[column])
+    return CatalogSnapshot(ids, codes, vocabularies, ages, np.arange(len(rows), dtype=np.int32), paths)
+
+
+def _code(value: Optional[str], vocabulary: List[Optional[str]], lookup: Dict) -> int:
+    code = lookup.get(value)
+    if code is None:
+        code = lookup[value] = len(vocabulary)
+        vocabulary.append(value)
+    return code
+
+
+class ImageCatalog:
+    """
+    Columnar in-memory copy of the image metadata the admin tools filter
+    on (type, gender, age, disease), so filters are evaluated as NumPy masks
+    instead of SQL.
+
+    Readers take a snapshot and work on it without locking; uploads on this
+    process publish a new snapshot with the image appended, and the refresh
+    picks up images added through other workers or scripts.
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = None
+
+    def load(self, rows: Iterable[Tuple]) -> None:
+        """
+        Replace the catalog with the given
+        (image_id, image_path, image_type, gender, age, disease) rows
+        """
+        snapshot = build_snapshot(rows)
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reload the catalog from the images table"""
+        self.load(db.session.query(
+            Images.image_id, Images.image_path, Images.image_type, Images.gender, Images.age, Images.disease
+        ).all())
+
+    def add_image(self, image_id: int, image_path: str, image_type: str, gender: Optional[str],
+                  age: Optional[int], disease: Optional[str]) -> None:
+        """Register a newly uploaded image so filters see it straight away"""
+        with self._lock:
+            current = self._snapshot
+            if current is None:
+                # Nothing loaded yet, the first read will load it from the db
+                return
+            if np.any(current.ids == image_id):
+                return
+            codes, vocabularies = {}, {}
+            for column, value in zip(CODED_COLUMNS, (image_type, gender, disease)):
+                vocabulary = list(current.vocabularies[column])
+                code = vocabulary.index(value) if value in vocabulary else len(vocabulary)
+                if code == len(vocabulary):
+                    vocabulary.append(value)
+                vocabularies[column] = vocabulary
+                codes[column] = np.append(current.codes[column], np.int16(code))
+            self._snapshot = CatalogSnapshot(
+                np.append(current.ids, np.int64(image_id)),
+                codes,
+                vocabularies,
+                np.append(current.ages, np.int16(NO_AGE if age is None else age)),
+                np.append(current.path_index, np.int32(len(current.paths))),
+                current.paths + [image_path],
+            )
+
+    def snapshot(self) -> CatalogSnapshot:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.refresh()
+        return self._snapshot
+
+
+# Shared by every service in this process
+image_catalog = ImageCatalog()
@@ -0,0 +1,74 @@
+import datetime
+import os
+import re
+import stat
+from typing import Optional
+
+from flask import Response, request, send_file
+from werkzeug.http import is_resource_modified
+from werkzeug.security import safe_join
+
+# Images live next to the repository checkout
+IMAGES_ROOT = os.path.abspath(os.path.join(os.getcwd(), "../MedGenAI-Images/Images"))
+# Revalidated with the ETag after this long
+DEFAULT_MAX_AGE = 24 * 60 * 60
+# Files named after a hash of their content never change under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+_CONTENT_HASH = re.compile(r'(?<![0-9a-f])[0-9a-f]{32,}(?![0-9a-f])', re.IGNORECASE)
+
+
+def image_etag(st: os.stat_result) -> str:
+    """Strong validator from inode, modification time and size; changes whenever the file does"""
+    return f"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def is_content_addressed(path: str) -> bool:
+    return _CONTENT_HASH.search(os.path.basename(path)) is not None
+
+
+def send_image(base_dir: str, relative_path: str, max_age: int = DEFAULT_MAX_AGE,
+               mimetype: Optional[str] = None) -> Optional[Response]:
+    """
+    Serve a file below base_dir with ETag / Last-Modified validators,
+    304 responses to conditional requests and byte ranges
+
+    Returns:
+        Optional[Response]: None if the file doesn't exist (or escapes base_dir)
+    """
+    path = safe_join(base_dir, relative_path)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+
+    etag = image_etag(st)
+    last_modified = datetime.datetime.fromtimestamp(int(st.st_mtime), datetime.timezone.utc)
+    immutable = is_content_addressed(path)
+    if immutable:
+        max_age = IMMUTABLE_MAX_AGE
+
+    if request.method in ('GET', 'HEAD') and not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        # Answer revalidations without opening the file
+        response = Response(status=304)
+        response.set_etag(etag)
+        set_cache_headers(response, max_age, immutable)
+        return response
+
+    response = send_file(path, mimetype=mimetype, etag=etag, last_modified=last_modified,
+                         max_age=max_age, conditional=True)
+    set_cache_headers(response, max_age, immutable)
+    return response
+
+
+def set_cache_headers(response: Response, max_age: int, immutable: bool) -> None:
+    """Public caching for max_age seconds, marked immutable for content-addressed files"""
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
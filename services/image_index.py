@@ -0,0 +1,156 @@
+import base64
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.image_files import IMAGES_ROOT
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# How long (seconds) a listing is trusted before directory mtimes are checked again
+REFRESH_INTERVAL = 30
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(relative_path: str) -> str:
+    return base64.urlsafe_b64encode(relative_path.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Raises:
+        ValueError: If the cursor wasn't produced by encode_cursor
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+class ImageIndex:
+    """
+    In-memory index of the image files below the images folder: a sorted list
+    of relative paths and a map from file name to relative path.
+
+    Refreshing stats every directory but only lists the ones whose mtime
+    changed, so an unchanged tree costs one stat per directory instead of a
+    full walk. Uploads are added directly.
+    """
+
+    def __init__(self, root: str = IMAGES_ROOT, refresh_interval: int = REFRESH_INTERVAL):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        # Held for a whole refresh, so only one walk of the tree runs at a time
+        self._refresh_lock = threading.Lock()
+        # relative dir -> (mtime_ns, image file names, sub directory names)
+        self._dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self._paths: List[str] = []
+        self._by_name: Dict[str, str] = {}
+        self._checked_at = None
+
+    def refresh(self) -> bool:
+        """Re-list changed directories; returns whether anything changed"""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        dirs = {}
+        changed = self._scan('', dirs)
+        changed = changed or dirs.keys() != self._dirs.keys()
+        with self._lock:
+            if changed:
+                paths = sorted(
+                    f"{directory}/{name}" if directory else name
+                    for directory, (_, files, _) in dirs.items()
+                    for name in files
+                )
+                by_name = {}
+                for path in paths:
+                    by_name.setdefault(path.rsplit('/', 1)[-1], path)
+                self._paths, self._by_name = paths, by_name
+            self._dirs = dirs
+            self._checked_at = time.monotonic()
+        return changed
+
+    def add(self, relative_path: str) -> None:
+        """Register a file that was just written below the images folder"""
+        relative_path = relative_path.lstrip('/')
+        with self._lock:
+            if self._checked_at is None:
+                # Nothing indexed yet, the first read walks the tree
+                return
+            position = bisect.bisect_left(self._paths, relative_path)
+            if position == len(self._paths) or self._paths[position] != relative_path:
+                self._paths.insert(position, relative_path)
+            self._by_name.setdefault(relative_path.rsplit('/', 1)[-1], relative_path)
+
+    def paths(self) -> List[str]:
+        """Every indexed relative path, sorted"""
+        self._ensure_fresh()
+        return list(self._paths)
+
+    def find(self, name: str) -> Optional[str]:
+        """Relative path of an image by file name"""
+        self._ensure_fresh()
+        return self._by_name.get(name)
+
+    def page(self, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[str], Optional[str]]:
+        """
+        Up to limit relative paths after the cursor, in path order
+
+        Returns:
+            Tuple[List[str], Optional[str]]: The paths and the cursor of the
+            next page, None on the last page
+        """
+        self._ensure_fresh()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        paths = self._paths
+        start = bisect.bisect_right(paths, decode_cursor(cursor)) if cursor else 0
+        page = paths[start:start + limit]
+        next_cursor = encode_cursor(page[-1]) if page and start + limit < len(paths) else None
+        return page, next_cursor
+
+    def _ensure_fresh(self) -> None:
+        checked_at = self._checked_at
+        if checked_at is not None and time.monotonic() - checked_at <= self.refresh_interval:
+            return
+        # While one caller refreshes, the others keep serving the previous
+        # listing; only the very first load makes them wait
+        if not self._refresh_lock.acquire(blocking=checked_at is None):
+            return
+        try:
+            if self._checked_at == checked_at:
+                self._refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _scan(self, relative_dir: str, dirs: Dict) -> bool:
+        path = os.path.join(self.root, relative_dir) if relative_dir else self.root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        known = self._dirs.get(relative_dir)
+        changed = known is None or known[0] != mtime
+        if changed:
+            files, subdirs = [], []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        files.append(entry.name)
+            dirs[relative_dir] = (mtime, files, subdirs)
+        else:
+            dirs[relative_dir] = known
+        for name in dirs[relative_dir][2]:
+            child = f"{relative_dir}/{name}" if relative_dir else name
+            changed = self._scan(child, dirs) or changed
+        return changed
+
+
+# Shared by every request in this process
+image_index = ImageIndex()
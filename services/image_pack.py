@@ -0,0 +1,233 @@
+import datetime
+import fcntl
+import json
+import logging
+import mimetypes
+import mmap
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from flask import Response, request
+
+from services.image_files import IMAGES_ROOT, IMMUTABLE_MAX_AGE, is_content_addressed, set_cache_headers
+from services.image_index import ImageIndex
+
+logger = logging.getLogger(__name__)
+
+PACK_FILE = 'images.pack'
+INDEX_FILE = 'images.pack.json'
+# How long (seconds) the loaded index is trusted before checking for a rebuild
+RELOAD_INTERVAL = 30
+COPY_CHUNK = 1024 * 1024
+SEND_CHUNK = 64 * 1024
+
+
+def build_image_pack(images_root: str = IMAGES_ROOT, pack_dir: Optional[str] = None) -> Dict:
+    """
+    Append every new or changed image below images_root to the pack file and
+    rewrite its index
+
+    The pack is append-only: bytes of replaced or deleted images stay in the
+    file until it is deleted and built again.
+
+    Returns:
+        dict: Number of images added, unchanged and dropped from the index
+    """
+    pack_dir = pack_dir or default_pack_dir(images_root)
+    os.makedirs(pack_dir, exist_ok=True)
+    index_path = os.path.join(pack_dir, INDEX_FILE)
+    entries = _read_index(index_path)
+    added = unchanged = 0
+    seen = set()
+
+    with open(os.path.join(pack_dir, PACK_FILE), 'ab') as pack:
+        # One build at a time, other workers keep serving the previous index
+        fcntl.flock(pack, fcntl.LOCK_EX)
+        try:
+            offset = pack.seek(0, os.SEEK_END)
+            # Sorted paths keep each folder's images next to each other in the pack
+            for relative_path in ImageIndex(images_root, refresh_interval=0).paths():
+                seen.add(relative_path)
+                try:
+                    st = os.stat(os.path.join(images_root, relative_path))
+                except OSError:
+                    continue
+                entry = entries.get(relative_path)
+                if entry is not None and entry[1] == st.st_size and entry[2] == st.st_mtime_ns:
+                    unchanged += 1
+                    continue
+                with open(os.path.join(images_root, relative_path), 'rb') as source:
+                    size = _copy(source, pack)
+                entries[relative_path] = [offset, size, st.st_mtime_ns]
+                offset += size
+                added += 1
+            pack.flush()
+            os.fsync(pack.fileno())
+
+            removed = [path for path in entries if path not in seen]
+            for path in removed:
+                del entries[path]
+            temporary = index_path + '.tmp'
+            with open(temporary, 'w') as f:
+                json.dump({'entries': entries}, f)
+            os.replace(temporary, index_path)
+        finally:
+            fcntl.flock(pack, fcntl.LOCK_UN)
+
+    return {'added': added, 'unchanged': unchanged, 'removed': len(removed)}
+
+
+def default_pack_dir(images_root: str = IMAGES_ROOT) -> str:
+    return os.path.join(os.path.dirname(images_root), 'ImagePacks')
+
+
+class ImagePack:
+    """
+    Read side of the pack file: the pack is memory-mapped once and images
+    are served as memoryview slices of it, so a request costs no open or
+    read of its own. Images that aren't in the pack (new uploads) are
+    served from their loose files by the caller.
+
+    Each request stats the loose file: an image overwritten or deleted
+    since the pack was built, by any worker, no longer matches the size and
+    modification time of its entry and is served from the loose file until
+    the next build.
+
+    Bytes are only copied out of the map chunk by chunk as the response is
+    written, since WSGI servers (gunicorn) only accept bytes.
+    """
+
+    def __init__(self, pack_dir: Optional[str] = None, reload_interval: int = RELOAD_INTERVAL,
+                 images_root: str = IMAGES_ROOT):
+        self.pack_dir = pack_dir or default_pack_dir(images_root)
+        self.images_root = images_root
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._entries: Dict[str, list] = {}
+        self._index_mtime = None
+        self._checked_at = None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def init_app(self, app) -> None:
+        self.pack_dir = app.config.get('IMAGE_PACK_DIR') or self.pack_dir
+        with self._lock:
+            self._map, self._entries, self._index_mtime, self._checked_at = None, {}, None, None
+
+    def reload(self) -> None:
+        """Map the pack again if it was rebuilt since it was last loaded"""
+        index_path = os.path.join(self.pack_dir, INDEX_FILE)
+        try:
+            index_mtime = os.stat(index_path).st_mtime_ns
+        except OSError:
+            index_mtime = None
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if index_mtime == self._index_mtime:
+                return
+        if index_mtime is None:
+            pack_map, entries = None, {}
+        else:
+            entries = _read_index(index_path)
+            with open(os.path.join(self.pack_dir, PACK_FILE), 'rb') as f:
+                empty = os.fstat(f.fileno()).st_size == 0
+                pack_map = None if empty else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with self._lock:
+            # The previous map is closed once the last response slicing it is done
+            self._map, self._entries, self._index_mtime = pack_map, entries, index_mtime
+        logger.info("Loaded image pack with %d images", len(entries))
+
+    def get(self, relative_path: str) -> Optional[Tuple[memoryview, int]]:
+        """
+        The packed bytes of an image and its modification time (ns), or None
+        if it isn't packed or its loose file changed since the build
+        """
+        self._ensure_fresh()
+        relative_path = relative_path.lstrip('/')
+        with self._lock:
+            entry = self._entries.get(relative_path)
+            pack_map = self._map
+        if entry is None or pack_map is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        offset, size, mtime_ns = entry
+        try:
+            st = os.stat(os.path.join(self.images_root, relative_path))
+            current = st.st_size == size and st.st_mtime_ns == mtime_ns
+        except OSError:
+            current = False
+        with self._lock:
+            if not current:
+                self.misses += 1
+                self.stale += 1
+                return None
+            self.hits += 1
+        return memoryview(pack_map)[offset:offset + size], mtime_ns
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'stale': self.stale, 'size': len(self._entries)}
+
+    def _ensure_fresh(self) -> None:
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at > self.reload_interval:
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error("Error loading image pack: %s", e)
+
+
+def send_packed_image(relative_path: str, max_age: int) -> Optional[Response]:
+    """
+    Serve an image straight from the pack, with the same validators, 304s and
+    ranges as send_image
+
+    Returns:
+        Optional[Response]: None if the image isn't packed
+    """
+    packed = image_pack.get(relative_path)
+    if packed is None:
+        return None
+    data, mtime_ns = packed
+    mimetype = mimetypes.guess_type(relative_path)[0] or 'application/octet-stream'
+    response = Response(_iter_chunks(data), mimetype=mimetype)
+    response.headers['Content-Length'] = str(len(data))
+    response.set_etag(f"{mtime_ns:x}-{len(data):x}")
+    response.last_modified = datetime.datetime.fromtimestamp(mtime_ns // 1_000_000_000, datetime.timezone.utc)
+    immutable = is_content_addressed(relative_path)
+    if immutable:
+        max_age = IMMUTABLE_MAX_AGE
+    set_cache_headers(response, max_age, immutable)
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=len(data))
+
+
+def _iter_chunks(data: memoryview):
+    for start in range(0, len(data), SEND_CHUNK):
+        yield data[start:start + SEND_CHUNK].tobytes()
+
+
+def _read_index(index_path: str) -> Dict[str, list]:
+    try:
+        with open(index_path) as f:
+            return json.load(f)['entries']
+    except FileNotFoundError:
+        return {}
+
+
+def _copy(source, target) -> int:
+    size = 0
+    while True:
+        chunk = source.read(COPY_CHUNK)
+        if not chunk:
+            return size
+        target.write(chunk)
+        size += len(chunk)
+
+
+# Shared by every request in this process
+image_pack = ImagePack()
@@ -0,0 +1,157 @@
+import bisect
+import random
+import threading
+import time
+from array import array
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from __init__ import db
+from models import Images
+
+# How long (seconds) a loaded index is trusted before it is re-read from the
+# database. Uploads on this process update the index immediately; the refresh
+# picks up images added through other workers or scripts.
+REFRESH_INTERVAL = 300
+
+CatalogImage = namedtuple('CatalogImage', ['image_id', 'image_path', 'image_type'])
+
+
+class ImageSampler:
+    """
+    In-memory index of image ids grouped by image type.
+
+    Replaces ``ORDER BY random()`` on the images table: the ids are loaded once,
+    kept in compact per-type arrays and sampled without replacement in O(count).
+
+    The arrays are sorted by image id and image paths are kept alongside, so
+    the index doubles as the versioned image catalog that seeded games are
+    regenerated from (see services/game_seeds.py). The catalog version is the
+    highest image id it contains.
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._ids: Dict[str, array] = {}
+        self._images: Dict[int, Tuple[str, str]] = {}
+        self._max_id = 0
+        self._loaded_at = None
+
+    def load(self, rows: Iterable[Tuple[int, str, str]]) -> None:
+        """
+        Replace the index with the given (image_id, image_type, image_path) rows
+        """
+        ids, images = {}, {}
+        for image_id, image_type, image_path in rows:
+            ids.setdefault(image_type, array('l')).append(image_id)
+            images[image_id] = (image_path, image_type)
+        for image_type, type_ids in ids.items():
+            ids[image_type] = array('l', sorted(type_ids))
+        with self._lock:
+            self._ids = ids
+            self._images = images
+            self._max_id = max(images, default=0)
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reload the index from the images table"""
+        self.load(db.session.query(Images.image_id, Images.image_type, Images.image_path).all())
+
+    def invalidate(self) -> None:
+        """Force the next sample to reload the index"""
+        with self._lock:
+            self._loaded_at = None
+
+    def add_image(self, image_id: int, image_type: str, image_path: str) -> None:
+        """Register a newly uploaded image so it can be sampled straight away"""
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet, the first sample will read it from the db
+                return
+            if image_id in self._images:
+                return
+            ids = self._ids.setdefault(image_type, array('l'))
+            ids.insert(bisect.bisect_right(ids, image_id), image_id)
+            self._images[image_id] = (image_path, image_type)
+            self._max_id = max(self._max_id, image_id)
+
+    def remove_images(self, image_ids: Iterable[int]) -> None:
+        """Drop ids that no longer exist in the images table"""
+        missing = set(image_ids)
+        if not missing:
+            return
+        with self._lock:
+            for image_type, ids in self._ids.items():
+                self._ids[image_type] = array('l', (i for i in ids if i not in missing))
+            for image_id in missing:
+                self._images.pop(image_id, None)
+
+    def count(self, image_type: str) -> int:
+        self._ensure_loaded()
+        return len(self._ids.get(image_type, ()))
+
+    def catalog_version(self) -> int:
+        """Highest image id in the catalog"""
+        self._ensure_loaded()
+        return self._max_id
+
+    def catalog(self, image_type: str, version: int) -> array:
+        """
+        Ids of the given type in a catalog version, in ascending order
+
+        Reloads the index first if the version is newer than what is loaded,
+        e.g. when the game was created on another worker.
+        """
+        self._ensure_loaded()
+        if version > self._max_id:
+            self.refresh()
+        with self._lock:
+            ids = self._ids.get(image_type, array('l'))
+            return ids[:bisect.bisect_right(ids, version)]
+
+    def describe(self, image_ids: Iterable[int]) -> List[CatalogImage]:
+        """Catalog entries for the given ids, skipping unknown ones"""
+        self._ensure_loaded()
+        with self._lock:
+            return [
+                CatalogImage(image_id, *self._images[image_id])
+                for image_id in image_ids if image_id in self._images
+            ]
+
+    def sample_ids(self, count: int, image_type: str) -> List[int]:
+        """
+        Draw up to ``count`` distinct image ids of the given type.
+
+        Returns fewer ids if there are not enough images of that type.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            ids = self._ids.get(image_type)
+            if not ids or count <= 0:
+                return []
+            # Sample positions rather than the array itself: range() is a
+            # sequence on every python version and keeps the draw O(count)
+            return [ids[i] for i in random.sample(range(len(ids)), min(count, len(ids)))]
+
+    def sample_images(self, count: int, image_type: str) -> List[Images]:
+        """
+        Draw up to ``count`` distinct ``Images`` rows of the given type with a
+        single primary key lookup.
+        """
+        image_ids = self.sample_ids(count, image_type)
+        if not image_ids:
+            return []
+        rows = {img.image_id: img for img in Images.query.filter(Images.image_id.in_(image_ids)).all()}
+        if len(rows) != len(image_ids):
+            self.remove_images(i for i in image_ids if i not in rows)
+        return [rows[i] for i in image_ids if i in rows]
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.refresh()
+
+
+# Shared by every service in this process
+image_sampler = ImageSampler()
@@ -0,0 +1,187 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from flask import Response
+from werkzeug.security import safe_join
+
+from services.image_files import IMAGES_ROOT, send_image
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow every request gets the original file
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Longest edge of the generated variants, in pixels
+SIZES = (128, 256, 512)
+# Variant format -> (Pillow format name, mimetype)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+QUALITY = 80
+DEFAULT_WORKERS = 2
+
+
+def pick_size(requested: int) -> Optional[int]:
+    """Smallest variant size at least as large as requested, or None when only the original will do"""
+    for size in SIZES:
+        if requested <= size:
+            return size
+    return None
+
+
+def negotiate_format(accept_mimetypes) -> str:
+    """WebP for clients that explicitly accept it, JPEG otherwise"""
+    for mimetype, quality in accept_mimetypes:
+        if mimetype == 'image/webp' and quality > 0:
+            return 'webp'
+    return 'jpeg'
+
+
+def variant_path(relative_path: str, size: int, fmt: str) -> str:
+    """Where a variant of an image lives below the variant directory"""
+    base, _ = os.path.splitext(relative_path.lstrip('/'))
+    return f"{size}/{base}.{fmt}"
+
+
+def render_variant(source: str, target: str, size: int, fmt: str) -> None:
+    with Image.open(source) as image:
+        # Lets JPEG decode at a reduced scale instead of full resolution
+        image.draft('RGB', (size, size))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.thumbnail((size, size), Image.LANCZOS)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write next to the target and rename, so readers never see a partial file
+        temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(temporary, format=FORMATS[fmt][0], quality=QUALITY)
+        os.replace(temporary, target)
+
+
+def render_all(source: str, variant_root: str, relative_path: str) -> int:
+    """Render every size and format of one image; runs in the worker processes"""
+    for size in SIZES:
+        for fmt in FORMATS:
+            render_variant(source, os.path.join(variant_root, variant_path(relative_path, size, fmt)), size, fmt)
+    return len(SIZES) * len(FORMATS)
+
+
+class ImageVariants:
+    """
+    Resized and re-encoded copies of the images, kept on disk next to the
+    originals.
+
+    Variants of uploaded images are rendered by a process pool as soon as
+    they are ingested; anything else is rendered on the first request that
+    asks for it. A variant older than its original is rendered again.
+    """
+
+    def __init__(self, images_root: str = IMAGES_ROOT, variant_root: Optional[str] = None):
+        self.images_root = images_root
+        self.variant_root = variant_root or os.path.join(os.path.dirname(images_root), 'ImageVariants')
+        self.workers = DEFAULT_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    def init_app(self, app) -> None:
+        self.variant_root = app.config.get('IMAGE_VARIANT_DIR') or self.variant_root
+        self.workers = int(app.config.get('IMAGE_VARIANT_WORKERS', DEFAULT_WORKERS))
+
+    def submit(self, relative_path: str) -> None:
+        """Render the variants of a newly ingested image in the background"""
+        if not self.enabled or self.workers <= 0:
+            return
+        source = safe_join(self.images_root, relative_path.lstrip('/'))
+        if source is None:
+            return
+        future = self._get_executor().submit(render_all, source, self.variant_root, relative_path)
+        future.add_done_callback(self._log_failure)
+
+    def get(self, relative_path: str, size: int, fmt: str) -> Optional[str]:
+        """
+        Path of a variant below variant_root, rendering it first if needed
+
+        Returns:
+            Optional[str]: None when the original has to be served instead
+        """
+        if not self.enabled:
+            return None
+        source = safe_join(self.images_root, relative_path.lstrip('/'))
+        if source is None:
+            return None
+        variant = variant_path(relative_path, size, fmt)
+        target = os.path.join(self.variant_root, variant)
+        try:
+            source_mtime = os.stat(source).st_mtime
+        except OSError:
+            return None
+        try:
+            if os.stat(target).st_mtime >= source_mtime:
+                self._count('hits')
+                return variant
+        except OSError:
+            pass
+        self._count('misses')
+        try:
+            render_variant(source, target, size, fmt)
+        except Exception as e:
+            logger.warning("Could not render %s: %s", variant, e)
+            return None
+        return variant
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    @staticmethod
+    def _log_failure(future) -> None:
+        if future.exception() is not None:
+            logger.warning("Rendering image variants failed: %s", future.exception())
+
+
+def send_image_variant(relative_path: str, requested_size: Optional[int], accept_mimetypes,
+                       max_age: int) -> Optional[Response]:
+    """
+    Serve the variant matching ?size= and the Accept header
+
+    Returns:
+        Optional[Response]: None when the original should be served instead
+    """
+    if requested_size is None:
+        return None
+    size = pick_size(requested_size)
+    if size is None:
+        return None
+    fmt = negotiate_format(accept_mimetypes)
+    variant = image_variants.get(relative_path, size, fmt)
+    if variant is None:
+        return None
+    response = send_image(image_variants.variant_root, variant, max_age=max_age, mimetype=FORMATS[fmt][1])
+    if response is not None:
+        response.vary.add('Accept')
+    return response
+
+
+# Shared by every request in this process
+image_variants = ImageVariants()
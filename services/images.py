@@ -1,46 +1,45 @@
-import os
 from flask import request
 from models import Images
-from sqlalchemy.sql.expression import func
-
-# Dynamically construct the path to the Images directory
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../MedGenAI-Images/Images"))
+from services.image_index import DEFAULT_PAGE_SIZE, image_index
+from services.image_sampler import image_sampler
 
 def get_relative_paths():
     """
-    Returns a list of full image URLs for all images in the Images directory.
+    Returns the relative paths of all images in the Images directory.
     """
-    paths = []
-    for root, _, files in os.walk(BASE_DIR):
-        for file in files:
-            if file.lower().endswith(('.png', '.jpg', '.jpeg')):  # Supported image formats
-                # Calculate relative path for the image
-                relative_path = os.path.relpath(os.path.join(root, file), BASE_DIR)
-                paths.append(f"{relative_path.replace(os.sep, '/')}")
-    return paths
+    return image_index.paths()
 
-def get_image_list():
+def get_image_list(cursor=None, limit=DEFAULT_PAGE_SIZE):
     """
-    Returns a list of full image URLs for all images in the Images directory.
+    Returns one page of full image URLs from the Images directory.
+
+    Raises:
+        ValueError: If the cursor is invalid
     """
-    return [
-        f"{request.host_url}api/images/view/{relative_path}"
-        for relative_path in get_relative_paths()
-    ]
+    paths, next_cursor = image_index.page(cursor, limit)
+    return {
+        'images': [get_image_view_url(relative_path) for relative_path in paths],
+        'nextCursor': next_cursor
+    }
 
 
 def get_image_url(image_name):
     """
     Returns the full URL for a specific image by name, if it exists.
     """
-    for root, _, files in os.walk(BASE_DIR):
-        if image_name in files:
-            # Calculate relative path for the image
-            relative_path = os.path.relpath(os.path.join(root, image_name), BASE_DIR)
-            # Generate the full URL dynamically
-            return f"{request.host_url}api/images/view/{relative_path.replace(os.sep, '/')}"
-    return None
+    relative_path = image_index.find(image_name)
+    if relative_path is None:
+        return None
+    return get_image_view_url(relative_path)
 
 def get_images_rand(count, type):
-  images = Images.query.filter_by(image_type=type).order_by(func.random()).limit(count).all()
-  return [f"{request.host_url}api/images/view/{img.image_path}" for img in images]
+  """
+  Returns up to count random Images rows of the given type.
+  """
+  return image_sampler.sample_images(count, type)
+
+def get_image_view_url(image_path):
+  """
+  Returns the full URL that serves the given image path.
+  """
+  return f"{request.host_url}api/images/view/{image_path}"
@@ -0,0 +1,153 @@
+import bisect
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from __init__ import db
+from models import UserDailyRollup, UserGameSession, Users
+
+# How long (seconds) the in-memory board is trusted before it is reconciled
+# with the database. Games finished on this process are applied immediately;
+# the reconciliation picks up games finished on other workers.
+REFRESH_INTERVAL = 60
+DEFAULT_TOP = 10
+
+LeaderboardEntry = namedtuple('LeaderboardEntry', ['user_id', 'name', 'correct', 'total'])
+
+# Name shown on the boards: the username, or the user id of users with an
+# empty one (the users table has no email to fall back to)
+DISPLAY_NAME = func.coalesce(func.nullif(Users.username, ''), Users.user_id)
+
+
+def display_name(user: Users) -> str:
+    """DISPLAY_NAME of a loaded user row"""
+    return user.username or user.user_id
+
+
+def accuracy(entry: LeaderboardEntry) -> float:
+    return entry.correct / entry.total if entry.total else 0
+
+
+def _sort_key(entry: LeaderboardEntry) -> Tuple[float, str]:
+    # Best accuracy first, ties in user id order
+    return -accuracy(entry), entry.user_id
+
+
+class Leaderboard:
+    """
+    Per-user correct / total guess counts, kept sorted by accuracy.
+
+    Replaces a count and a sum query per user: the counts are loaded with
+    one aggregate query, games update them in place and the top of the board
+    is a slice of a sorted list.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Tuple[str, str, int, int]]],
+                 refresh_interval: int = REFRESH_INTERVAL):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, LeaderboardEntry] = {}
+        self._order: List[Tuple[float, str]] = []
+        self._loaded_at = None
+
+    def load(self, rows: Iterable[Tuple[str, str, int, int]]) -> None:
+        """Replace the board with the given (user_id, name, correct, total) rows"""
+        entries = {}
+        for user_id, name, correct, total in rows:
+            entries[user_id] = LeaderboardEntry(user_id, name, int(correct or 0), int(total or 0))
+        order = sorted(_sort_key(entry) for entry in entries.values())
+        with self._lock:
+            self._entries, self._order = entries, order
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reconcile the board with the database"""
+        self.load(self.loader())
+
+    def invalidate(self) -> None:
+        """Force the next read to reconcile the board"""
+        with self._lock:
+            self._loaded_at = None
+
+    def record(self, user_id: str, name: str, correct: int, total: int) -> None:
+        """Add a finished game's guesses to a user's counts"""
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet, the first read will load it from the db
+                return
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._order.pop(bisect.bisect_left(self._order, _sort_key(entry)))
+                correct, total = entry.correct + correct, entry.total + total
+            entry = self._entries[user_id] = LeaderboardEntry(user_id, name, correct, total)
+            bisect.insort(self._order, _sort_key(entry))
+
+    def top(self, count: int = DEFAULT_TOP) -> List[LeaderboardEntry]:
+        """The count users with the best accuracy"""
+        self._ensure_loaded()
+        with self._lock:
+            return [self._entries[user_id] for _, user_id in self._order[:count]]
+
+    def get(self, user_id: str) -> Optional[LeaderboardEntry]:
+        self._ensure_loaded()
+        return self._entries.get(user_id)
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.refresh()
+
+
+def load_session_accuracy():
+    """Every user with the guesses of their completed game sessions"""
+    completed = UserGameSession.session_status == 'completed'
+    return (
+        db.session.query(
+            Users.user_id,
+            DISPLAY_NAME,
+            func.sum(UserGameSession.correct_guesses).filter(completed),
+            func.sum(UserGameSession.total_guesses).filter(completed),
+        )
+        .outerjoin(UserGameSession, UserGameSession.user_id == Users.user_id)
+        .group_by(Users.user_id, Users.username)
+        .all()
+    )
+
+
+def load_guess_accuracy():
+    """Users with stored guesses, from the daily per-user rollup"""
+    return (
+        db.session.query(
+            Users.user_id,
+            DISPLAY_NAME,
+            func.sum(UserDailyRollup.correct_count),
+            func.sum(UserDailyRollup.guess_count),
+        )
+        .join(UserDailyRollup, UserDailyRollup.user_id == Users.user_id)
+        .group_by(Users.user_id, Users.username)
+        .all()
+    )
+
+
+def record_game(user_id: str, name: str, correct: int, total: int, stored: int) -> None:
+    """
+    Apply a finished game to both boards
+
+    Args:
+        name: The user's display_name
+        correct: Correct guesses
+        total: Guesses made, as counted on the game session
+        stored: Guesses stored as user_guesses rows
+    """
+    session_leaderboard.record(user_id, name, correct, total)
+    guess_leaderboard.record(user_id, name, correct, stored)
+
+
+# Accuracy over completed game sessions, shown on the user dashboard
+session_leaderboard = Leaderboard(load_session_accuracy)
+# Accuracy over individual guesses, shown on the admin metrics page
+guess_leaderboard = Leaderboard(load_guess_accuracy)
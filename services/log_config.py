@@ -0,0 +1,124 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Dict, Optional
+
+from flask import g, has_request_context, request
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def parse_mapping(value: str) -> Dict[str, str]:
+    """Parse "a=1,b=2" config values"""
+    mapping = {}
+    for entry in (value or '').split(','):
+        if '=' in entry:
+            key, item = entry.split('=', 1)
+            mapping[key.strip()] = item.strip()
+    return mapping
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        endpoint = getattr(record, 'endpoint', None)
+        if endpoint:
+            entry['endpoint'] = endpoint
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestSamplingFilter(logging.Filter):
+    """
+    Tags records with the request's endpoint and drops records below WARNING
+    from requests that were not sampled (see LOG_SAMPLE_RATES).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not has_request_context():
+            return True
+        record.endpoint = request.endpoint
+        if record.levelno >= logging.WARNING:
+            return True
+        return g.get('log_sampled', True)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves all formatting, including merging the message
+    arguments, to the listener thread. The queue is in-process, so records
+    are queued as they are instead of being made picklable; arguments are
+    rendered as they are when the listener gets to them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogConfig:
+    """
+    Central logging setup: root and per-module levels, per-route sampling of
+    debug/info records and an optional queue so log I/O happens on a
+    background thread instead of the request thread.
+    """
+
+    def __init__(self):
+        self.sample_rates: Dict[str, float] = {}
+        self.default_sample_rate = 1.0
+        self._listener: Optional[logging.handlers.QueueListener] = None
+
+    def init_app(self, app) -> None:
+        rates = {endpoint: float(rate) for endpoint, rate in parse_mapping(app.config.get('LOG_SAMPLE_RATES', '')).items()}
+        self.default_sample_rate = rates.pop('*', 1.0)
+        self.sample_rates = rates
+
+        output = logging.StreamHandler(sys.stdout)
+        if app.config.get('LOG_FORMAT', 'json') == 'json':
+            output.setFormatter(StructuredFormatter())
+        else:
+            output.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+
+        self._stop()
+        if app.config.get('LOG_ASYNC', True):
+            self._listener = logging.handlers.QueueListener(queue.SimpleQueue(), output, respect_handler_level=True)
+            handler = LazyQueueHandler(self._listener.queue)
+            self._listener.start()
+        else:
+            handler = output
+        handler.addFilter(RequestSamplingFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(app.config.get('LOG_LEVEL', 'INFO').upper())
+        for name, level in parse_mapping(app.config.get('LOG_LEVELS', '')).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        app.before_request(self._sample_request)
+
+    def _sample_request(self) -> None:
+        rate = self.sample_rates.get(request.endpoint, self.default_sample_rate)
+        g.log_sampled = rate >= 1 or random.random() < rate
+
+    def _stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+log_config = LogConfig()
+# Flush whatever is still queued on shutdown
+atexit.register(log_config._stop)
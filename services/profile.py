@@ -1,8 +1,13 @@
-from models import Users, UserGameSession, Game, Images, GameImages
-from sqlalchemy import func, desc
+from models import Users, UserGameSession, Game, GameImages, GameSeed
+from sqlalchemy import case, func, desc
 from datetime import datetime, timedelta
+import logging
 
 from __init__ import db
+from services.current_user import load_user
+from services.rank_index import rank_index
+
+logger = logging.getLogger(__name__)
 
 def get_profile_data(user_id):
     """
@@ -14,10 +19,11 @@ def get_profile_data(user_id):
             - gamesPlayed (int): Total number of games played
             - accuracy (float): Average accuracy percentage 
             - rank (int): Global ranking
+            - betterThan (float): Percentage of other players with a lower score
             - points (int): Total points earned
     """
     # Get user from database
-    user = Users.query.filter_by(user_id=user_id).first()
+    user = load_user(user_id)
     if not user:
         raise ValueError(f"User with ID {user_id} not found")
     
@@ -38,23 +44,20 @@ def get_profile_data(user_id):
         accuracy = round((total_correct / total_guesses) * 100, 1)
     
     # Calculate user rank
-    user_rank = Users.query.filter(Users.score > user.score).count() + 1
+    rank_index.observe(user)
+    user_rank = rank_index.rank(user_id)
     
     # Get total points
     points = user.score or 0
     
-    print(f"Profile data for user {user_id}:")
-    print(f"Games played: {games_played}")
-    print(f"Total correct: {total_correct}")
-    print(f"Total guesses: {total_guesses}")
-    print(f"Accuracy: {accuracy}%")
-    print(f"Rank: {user_rank}")
-    print(f"Points: {points}")
+    logger.debug("Profile data for user %s: games=%s correct=%s guesses=%s accuracy=%s%% rank=%s points=%s",
+                 user_id, games_played, total_correct, total_guesses, accuracy, user_rank, points)
     
     return {
         "gamesPlayed": games_played,
         "accuracy": accuracy,
         "rank": user_rank,
+        "betterThan": rank_index.better_than(user_id),
         "points": points
     }
 
@@ -71,28 +74,38 @@ def get_recent_game_history(user_id):
             - date (str): Date played
             - images (int): Number of images in game
     """
-    # Get user's completed game sessions, ordered by completion time
-    sessions = UserGameSession.query.filter_by(
-        user_id=user_id,
-        session_status='completed'  # Only get completed sessions
-    ).order_by(UserGameSession.completion_time.desc()).limit(10).all()
-    
-    print(f"Found {len(sessions)} recent games for user {user_id}")
+    # Images of seeded games are counted from the seed row (dual games have
+    # two per round), the others from their GameImages rows
+    stored_images = (
+        db.session.query(func.count(GameImages.id))
+        .filter(GameImages.game_id == Game.game_id)
+        .correlate(Game)
+        .scalar_subquery()
+    )
+    seeded_images = case((Game.game_board == 'dual', GameSeed.image_count * 2), else_=GameSeed.image_count)
+
+    # Get user's completed game sessions with their game, ordered by completion time
+    rows = (
+        db.session.query(
+            UserGameSession,
+            Game.game_mode,
+            func.coalesce(seeded_images, stored_images).label('image_count'),
+        )
+        .join(Game, Game.game_id == UserGameSession.game_id)
+        .outerjoin(GameSeed, GameSeed.game_id == Game.game_id)
+        .filter(
+            UserGameSession.user_id == user_id,
+            UserGameSession.session_status == 'completed'  # Only get completed sessions
+        )
+        .order_by(UserGameSession.completion_time.desc())
+        .limit(10)
+        .all()
+    )
+    
+    logger.debug("Found %d recent games for user %s", len(rows), user_id)
     
     history = []
-    for session in sessions:
-        # Get game details
-        game = Game.query.filter_by(game_id=session.game_id).first()
-        if not game:
-            continue
-            
-        # Count images in game
-        image_count = db.session.query(func.count(Images.image_id)).join(
-            GameImages, GameImages.image_id == Images.image_id
-        ).filter(
-            GameImages.game_id == game.game_id
-        ).scalar() or 0
-        
+    for session, game_mode, image_count in rows:
         # Format date
         date_played = session.completion_time.strftime("%Y-%m-%d %H:%M") if session.completion_time else "Unknown"
         
@@ -103,7 +116,7 @@ def get_recent_game_history(user_id):
         
         game_data = {
             "id": session.game_id,
-            "type": game.game_mode.capitalize(),
+            "type": game_mode.capitalize(),
             "accuracy": accuracy,
             "date": date_played,
             "images": image_count,
@@ -111,8 +124,6 @@ def get_recent_game_history(user_id):
             "correctGuesses": session.correct_guesses,
             "totalGuesses": session.total_guesses
         }
-        
-        print(f"Game data: {game_data}")
         history.append(game_data)
     
     return {"games": history}
@@ -140,7 +151,7 @@ def get_user_performance(user_id):
         UserGameSession.completion_time >= thirty_days_ago
     ).order_by(UserGameSession.completion_time).all()
     
-    print(f"Found {len(sessions)} sessions in last 30 days for user {user_id}")
+    logger.debug("Found %d sessions in last 30 days for user %s", len(sessions), user_id)
     
     # Initialize performance data
     all_mode = {"labels": [], "data": []}
@@ -161,8 +172,6 @@ def get_user_performance(user_id):
         if session.total_guesses and session.total_guesses > 0:
             accuracy = round((session.correct_guesses / session.total_guesses) * 100, 1)
         
-        print(f"Session {session.session_id}: {accuracy}% accuracy on {date_label}")
-        
         # Add to all modes
         all_mode["labels"].append(date_label)
         all_mode["data"].append(accuracy)
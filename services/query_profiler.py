@@ -0,0 +1,186 @@
+import contextlib
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterator, Optional
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEAT_THRESHOLD = 3
+DEFAULT_WINDOW = 200
+
+_IN_LIST = re.compile(r'\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*\s*\)')
+_PARAM = re.compile(r'%\(\w+\)s|\?')
+_SPACE = re.compile(r'\s+')
+
+# Stats of the block currently inside QueryProfiler.capture(), if any
+_captured: contextvars.ContextVar = contextvars.ContextVar('captured_query_stats', default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a statement to its shape, so executions that only differ by parameters compare equal"""
+    statement = _IN_LIST.sub('(?)', statement)
+    statement = _PARAM.sub('?', statement)
+    return _SPACE.sub(' ', statement).strip()
+
+
+class QueryStats:
+    """Statements run while handling one request (or one captured block)"""
+
+    def __init__(self, repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD):
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[normalize_statement(statement)] += 1
+
+    def repeated(self) -> Dict[str, int]:
+        """Statement shapes that ran at least repeat_threshold times, i.e. likely N+1 queries"""
+        return {
+            statement: count for statement, count in self.statements.items()
+            if count >= self.repeat_threshold
+        }
+
+
+class EndpointSummary:
+    """Rolling query counts of the last ``window`` requests to one endpoint"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.requests = 0
+        self.samples = deque(maxlen=window)
+        self.repeated = Counter()
+
+    def add(self, stats: QueryStats) -> None:
+        self.requests += 1
+        self.samples.append((stats.count, stats.seconds))
+        for statement, count in stats.repeated().items():
+            self.repeated[statement] = max(self.repeated[statement], count)
+        # Keep only the worst offenders
+        if len(self.repeated) > 10:
+            self.repeated = Counter(dict(self.repeated.most_common(10)))
+
+    def snapshot(self) -> Dict:
+        counts = sorted(count for count, _ in self.samples)
+        times = [seconds for _, seconds in self.samples]
+        return {
+            'requests': self.requests,
+            'avgQueries': sum(counts) / len(counts) if counts else 0,
+            'p95Queries': counts[min(len(counts) - 1, int(len(counts) * 0.95))] if counts else 0,
+            'maxQueries': counts[-1] if counts else 0,
+            'avgDbTimeMs': sum(times) / len(times) * 1000 if times else 0,
+            'repeatedStatements': [
+                {'statement': statement, 'maxPerRequest': count}
+                for statement, count in self.repeated.most_common()
+            ],
+        }
+
+
+class QueryProfiler:
+    """
+    Counts the SQL statements and database time of every request through
+    SQLAlchemy engine events, flags statements repeated within a request
+    (N+1 queries) and keeps a rolling summary per endpoint.
+
+    Each response gets X-Query-Count, X-Query-Time-Ms and X-Query-Repeated
+    headers; the summary is served at /admin/getQueryStats.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.repeat_threshold = DEFAULT_REPEAT_THRESHOLD
+        self.window = DEFAULT_WINDOW
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointSummary] = {}
+        self._listening = False
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('QUERY_PROFILER_ENABLED', True)
+        self.repeat_threshold = int(app.config.get('QUERY_PROFILER_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD))
+        if not self.enabled:
+            return
+        self._listen()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def current(self) -> Optional[QueryStats]:
+        stats = _captured.get()
+        if stats is None and has_request_context():
+            stats = g.get('query_stats')
+        return stats
+
+    @contextlib.contextmanager
+    def capture(self) -> Iterator[QueryStats]:
+        """Count the statements run inside the block, e.g. from a test or a script"""
+        self._listen()
+        stats = QueryStats(self.repeat_threshold)
+        token = _captured.set(stats)
+        try:
+            yield stats
+        finally:
+            _captured.reset(token)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {endpoint: summary.snapshot() for endpoint, summary in self._endpoints.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    def _listen(self) -> None:
+        if not self._listening:
+            # Listening on the Engine class covers every engine the app creates
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            self._listening = True
+
+    def _start_request(self) -> None:
+        g.query_stats = QueryStats(self.repeat_threshold)
+
+    def _finish_request(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        repeated = stats.repeated()
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers['X-Query-Time-Ms'] = f"{stats.seconds * 1000:.2f}"
+        response.headers['X-Query-Repeated'] = str(len(repeated))
+        endpoint = request.endpoint or 'unmatched'
+        if repeated:
+            statement, count = max(repeated.items(), key=lambda item: item[1])
+            logger.warning("Possible N+1 in %s: %dx %s", endpoint, count, statement[:200])
+        with self._lock:
+            summary = self._endpoints.get(endpoint)
+            if summary is None:
+                summary = self._endpoints[endpoint] = EndpointSummary(self.window)
+            summary.add(stats)
+        return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_start')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = query_profiler.current()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+# Shared by every request in this process
+query_profiler = QueryProfiler()
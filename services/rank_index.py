@@ -0,0 +1,234 @@
+import bisect
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from __init__ import db
+from models import Users
+
+# How long (seconds) the index is trusted before it is rebuilt from the users
+# table. Score changes on this process are applied immediately, and every
+# query first corrects the asking user's own score.
+REFRESH_INTERVAL = 300
+MIN_CAPACITY = 1024
+
+RankedPlayer = namedtuple('RankedPlayer', ['user_id', 'name', 'score', 'rank'])
+
+
+class ScoreTree:
+    """Fenwick tree of player counts per score (scores are >= 0)"""
+
+    def __init__(self, counts: Optional[List[int]] = None):
+        counts = list(counts or [])
+        capacity = MIN_CAPACITY
+        while capacity < len(counts):
+            capacity *= 2
+        self._counts = counts + [0] * (capacity - len(counts))
+        self._tree = [0] * (capacity + 1)
+        self.total = sum(counts)
+        self._build()
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[int]) -> 'ScoreTree':
+        counts: List[int] = []
+        for score in scores:
+            if score >= len(counts):
+                counts.extend([0] * (score + 1 - len(counts)))
+            counts[score] += 1
+        return cls(counts)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._counts)
+
+    def add(self, score: int, delta: int) -> None:
+        if score >= self.capacity:
+            capacity = self.capacity
+            while capacity <= score:
+                capacity *= 2
+            self._counts.extend([0] * (capacity - self.capacity))
+            self._build()
+        self._counts[score] += delta
+        self.total += delta
+        i = score + 1
+        while i <= self.capacity:
+            self._tree[i] += delta
+            i += i & -i
+
+    def count_below(self, score: int) -> int:
+        """Players with a score lower than score"""
+        i = min(score, self.capacity)
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def count_above(self, score: int) -> int:
+        """Players with a score higher than score"""
+        return self.total - self.count_below(score + 1)
+
+    def score_at(self, position: int) -> int:
+        """Score of the player at a 0-based position in ascending score order"""
+        i, remaining = 0, position + 1
+        step = 1 << (self.capacity.bit_length() - 1)
+        while step:
+            j = i + step
+            if j <= self.capacity and self._tree[j] < remaining:
+                i = j
+                remaining -= self._tree[j]
+            step >>= 1
+        return i
+
+    def _build(self) -> None:
+        # Linear-time build: push every node's sum into its parent
+        capacity = self.capacity
+        tree = [0] + self._counts
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+class RankIndex:
+    """
+    Every player's score, indexed for rank queries.
+
+    Replaces ``COUNT(*) WHERE score > :score`` on the users table: a Fenwick
+    tree over scores answers rank and percentile in O(log max score), and the
+    player ids of each score are kept sorted so the players around a rank
+    can be listed without a query. Players are ordered by score, highest
+    first, then by user id; equal scores share a rank.
+
+    The index is rebuilt from a ``(user_id, username, score)`` projection of
+    the users table, on first use and every ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, refresh_interval: int = REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._tree = ScoreTree()
+        self._scores: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+        # score -> user ids with that score, sorted
+        self._players: Dict[int, List[str]] = {}
+        self._loaded_at = None
+
+    def load(self, rows: Iterable[Tuple[str, str, int]]) -> None:
+        """Replace the index with the given (user_id, username, score) rows"""
+        scores, names, players = {}, {}, {}
+        for user_id, name, score in rows:
+            score = max(score or 0, 0)
+            scores[user_id] = score
+            names[user_id] = name
+            players.setdefault(score, []).append(user_id)
+        for user_ids in players.values():
+            user_ids.sort()
+        tree = ScoreTree.from_scores(scores.values())
+        with self._lock:
+            self._tree, self._scores, self._names, self._players = tree, scores, names, players
+            self._loaded_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Rebuild the index from the users table"""
+        self.load(db.session.query(Users.user_id, Users.username, Users.score).all())
+
+    def invalidate(self) -> None:
+        """Force the next query to rebuild the index"""
+        with self._lock:
+            self._loaded_at = None
+
+    def set_score(self, user_id: str, score: int, name: Optional[str] = None) -> None:
+        """Record a player's current total score"""
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet, the first query will read it from the db
+                return
+            self._place(user_id, score, name)
+
+    def _place(self, user_id: str, score: int, name: Optional[str]) -> None:
+        # Caller holds the lock
+        score = max(score or 0, 0)
+        previous = self._scores.get(user_id)
+        if name is not None:
+            self._names[user_id] = name
+        if previous == score:
+            return
+        if previous is not None:
+            self._tree.add(previous, -1)
+            user_ids = self._players[previous]
+            user_ids.pop(bisect.bisect_left(user_ids, user_id))
+            if not user_ids:
+                del self._players[previous]
+        self._tree.add(score, 1)
+        bisect.insort(self._players.setdefault(score, []), user_id)
+        self._scores[user_id] = score
+
+    def add_score(self, user_id: str, delta: int) -> None:
+        """Add points to a player already in the index"""
+        previous = self._scores.get(user_id)
+        if previous is not None:
+            self.set_score(user_id, previous + delta)
+
+    def observe(self, user: Users) -> None:
+        """
+        Add a player missing from the index, e.g. registered on another worker
+
+        The row may come from a cache and be older than the index, so players
+        already indexed keep their score; refresh() catches up the rest.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._loaded_at is None or user.user_id in self._scores:
+                return
+            self._place(user.user_id, user.score, user.username)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1 + the number of players with a higher score"""
+        self._ensure_loaded()
+        with self._lock:
+            score = self._scores.get(user_id)
+            return None if score is None else self._tree.count_above(score) + 1
+
+    def better_than(self, user_id: str) -> float:
+        """Percentage of the other players with a lower score"""
+        self._ensure_loaded()
+        with self._lock:
+            score = self._scores.get(user_id)
+            others = self._tree.total - 1
+            if score is None or others <= 0:
+                return 0
+            return round(self._tree.count_below(score) / others * 100, 1)
+
+    def neighbors(self, user_id: str, count: int = 2) -> List[RankedPlayer]:
+        """The player and up to count players ranked directly above and below them"""
+        self._ensure_loaded()
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return []
+            position = self._tree.count_above(score) + bisect.bisect_left(self._players[score], user_id)
+            first = max(position - count, 0)
+            last = min(position + count, self._tree.total - 1)
+            return [self._player_at(p) for p in range(first, last + 1)]
+
+    def __len__(self) -> int:
+        return self._tree.total
+
+    def _player_at(self, position: int) -> RankedPlayer:
+        """Player at a 0-based position, highest score first"""
+        score = self._tree.score_at(self._tree.total - 1 - position)
+        above = self._tree.count_above(score)
+        user_id = self._players[score][position - above]
+        return RankedPlayer(user_id, self._names.get(user_id), score, above + 1)
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.refresh()
+
+
+# Shared by every service in this process
+rank_index = RankIndex()
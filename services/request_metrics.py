@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from flask import g, request
+from sqlalchemy.pool import QueuePool
+
+# Latency bucket upper bounds in seconds: two per power of two from 1ms to
+# ~46s (HDR style), so every histogram has the same small, fixed size
+BUCKETS = tuple(0.001 * 2 ** (i / 2) for i in range(32))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing is one bisect and a short lock"""
+
+    __slots__ = ('counts', 'total', 'count', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+def _labels(**labels) -> str:
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+
+
+def _render_histogram(lines: List[str], name: str, labels: str, histogram: Histogram) -> None:
+    counts, total, count = histogram.snapshot()
+    prefix = labels + ',' if labels else ''
+    cumulative = 0
+    for bound, bucket_count in zip(BUCKETS, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound:.6g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {total:.6f}')
+    lines.append(f'{name}_count{suffix} {count}')
+
+
+class RequestMetrics:
+    """
+    Request latency histograms per blueprint and route, response status
+    counts, in-flight requests, database pool checkout wait and cache hit
+    rates, rendered in the Prometheus text format.
+
+    Memory is fixed per route: routes are labelled by their URL rule, not the
+    requested path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self._in_flight = 0
+        self.pool_checkout = Histogram()
+        self._caches: Dict[str, Callable[[], Dict]] = {}
+
+    def init_app(self, app) -> None:
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def register_cache(self, name: str, stats: Callable[[], Dict]) -> None:
+        """Export a cache's hit / miss counters, read from ``stats()`` at scrape time"""
+        self._caches[name] = stats
+
+    def render(self) -> str:
+        lines = [
+            '# HELP medgen_request_duration_seconds Request latency by blueprint and route',
+            '# TYPE medgen_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            latency = list(self._latency.items())
+            statuses = list(self._statuses.items())
+            in_flight = self._in_flight
+        for (blueprint, route, method), histogram in sorted(latency):
+            _render_histogram(lines, 'medgen_request_duration_seconds',
+                              _labels(blueprint=blueprint, route=route, method=method), histogram)
+
+        lines.append('# HELP medgen_responses_total Responses by route and status code')
+        lines.append('# TYPE medgen_responses_total counter')
+        for (blueprint, route, status), count in sorted(statuses):
+            lines.append(f'medgen_responses_total{{{_labels(blueprint=blueprint, route=route, status=status)}}} {count}')
+
+        lines.append('# HELP medgen_requests_in_flight Requests currently being handled')
+        lines.append('# TYPE medgen_requests_in_flight gauge')
+        lines.append(f'medgen_requests_in_flight {in_flight}')
+
+        lines.append('# HELP medgen_db_pool_checkout_seconds Time spent waiting for a database connection')
+        lines.append('# TYPE medgen_db_pool_checkout_seconds histogram')
+        _render_histogram(lines, 'medgen_db_pool_checkout_seconds', '', self.pool_checkout)
+
+        lines.append('# HELP medgen_cache_hits_total Cache hits by cache')
+        lines.append('# TYPE medgen_cache_hits_total counter')
+        lines.append('# HELP medgen_cache_misses_total Cache misses by cache')
+        lines.append('# TYPE medgen_cache_misses_total counter')
+        for name, stats in sorted(self._caches.items()):
+            values = stats()
+            lines.append(f'medgen_cache_hits_total{{{_labels(cache=name)}}} {values.get("hits", 0)}')
+            lines.append(f'medgen_cache_misses_total{{{_labels(cache=name)}}} {values.get("misses", 0)}')
+        return '\n'.join(lines) + '\n'
+
+    def _route(self) -> Tuple[str, str]:
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        return request.blueprint or '', rule
+
+    def _start_request(self) -> None:
+        g.request_started = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+
+    def _finish_request(self, response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        blueprint, route = self._route()
+        key = (blueprint, route, request.method)
+        histogram = self._latency.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._latency.setdefault(key, Histogram())
+        histogram.observe(time.perf_counter() - started)
+        status_key = (blueprint, route, response.status_code)
+        with self._lock:
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+        return response
+
+    def _teardown_request(self, exc) -> None:
+        if g.pop('request_started', None) is not None:
+            with self._lock:
+                self._in_flight -= 1
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each connection checkout waited"""
+
+    # Log under sqlalchemy's own pool logger rather than this module's
+    _sqla_logger_namespace = 'sqlalchemy.pool.impl.QueuePool'
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            request_metrics.pool_checkout.observe(time.perf_counter() - started)
+
+
+# Shared by every request in this process
+request_metrics = RequestMetrics()
@@ -6,6 +6,9 @@ from sqlalchemy import text
 import random
 
 from __init__ import db
+from services.game_codes import game_code_cache
+from services.game_expiry import joinable_games
+from services.game_manifest import game_manifest_cache
 
 from models import (
     UserGuess,
@@ -133,7 +136,14 @@ def drop_tables():
         db.session.execute(text("DROP TABLE IF EXISTS user_guesses CASCADE"))
         db.session.execute(text("DROP TABLE IF EXISTS user_game_sessions CASCADE"))
         db.session.execute(text("DROP TABLE IF EXISTS games CASCADE"))
+        db.session.execute(text("DROP TABLE IF EXISTS guess_daily_rollup CASCADE"))
+        db.session.execute(text("DROP TABLE IF EXISTS user_daily_rollup CASCADE"))
+        db.session.execute(text("DROP TABLE IF EXISTS feedback_daily_rollup CASCADE"))
+        db.session.execute(text("DROP TABLE IF EXISTS rollup_watermarks CASCADE"))
         db.session.commit()
+        game_manifest_cache.clear()
+        game_code_cache.clear()
+        joinable_games.invalidate()
         print("Selected tables have been dropped.")
     except Exception as e:
         db.session.rollback()
@@ -144,6 +154,9 @@ def drop_tables():
 def setup_tables():
     try:
         db.create_all()
+        # create_all skips tables that already exist, so add indexes introduced since
+        for index in list(Game.__table__.indexes) + list(UserGuess.__table__.indexes):
+            index.create(db.engine, checkfirst=True)
         print("Tables created successfully.")
 
         # process_csv()
@@ -0,0 +1,261 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 2 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_SWEEP_INTERVAL = 60
+
+
+class SessionStore(ABC):
+    """
+    Interface for the in-progress game session store.
+
+    Entries are keyed by "<game_id>_<user_id>" and expire after ``ttl`` seconds
+    without being read or written.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._counter_lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Remove idle entries, returning how many were removed"""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def stats(self) -> Dict:
+        with self._counter_lock:
+            stats = dict(self._counters)
+        stats['size'] = len(self)
+        stats['backend'] = type(self).__name__
+        return stats
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        if amount:
+            with self._counter_lock:
+                self._counters[counter] += amount
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Per-process LRU store with an idle TTL. Only suitable for a single worker.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (expires_at, value), ordered from least to most recently used
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                hit = None
+            elif entry[0] <= now:
+                del self._entries[key]
+                self._count('expired')
+                hit = None
+            else:
+                self._entries[key] = (now + self.ttl, entry[1])
+                self._entries.move_to_end(key)
+                hit = entry[1]
+        self._count('hits' if hit is not None else 'misses')
+        return hit
+
+    def set(self, key: str, value: Dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._count('evictions', evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            # Every access pushes the expiry out by the same ttl, so entries are
+            # also ordered by expiry and the scan can stop at the first live one
+            while self._entries:
+                key, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at > now:
+                    break
+                del self._entries[key]
+                removed += 1
+        self._count('expired', removed)
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in the session store")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Store backed by a local SQLite file so every worker on the host sees the
+    same sessions. Uses wall clock expiry because it is shared between processes.
+    """
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS game_sessions (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_game_sessions_expires_at ON game_sessions (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            dirname = os.path.dirname(self.path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value FROM game_sessions WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self._count('misses')
+            return None
+        conn.execute("UPDATE game_sessions SET expires_at = ? WHERE key = ?", (now + self.ttl, key))
+        self._count('hits')
+        return json.loads(row[0], object_hook=_decode)
+
+    def set(self, key: str, value: Dict) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO game_sessions (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=_encode), time.time() + self.ttl)
+        )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM game_sessions WHERE key = ?", (key,))
+
+    def sweep(self) -> int:
+        conn = self._connection()
+        expired = conn.execute("DELETE FROM game_sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        # Trim to capacity, dropping the entries closest to expiring first
+        evicted = conn.execute("""
+            DELETE FROM game_sessions WHERE key IN (
+                SELECT key FROM game_sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,)).rowcount
+        self._count('expired', expired)
+        self._count('evictions', evicted)
+        return expired + evicted
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM game_sessions").fetchone()[0]
+
+
+class SessionSweeper(threading.Thread):
+    """Background thread that periodically removes idle sessions from a store"""
+
+    def __init__(self, store: SessionStore, interval: int = DEFAULT_SWEEP_INTERVAL):
+        super().__init__(name='session-sweeper', daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                removed = self.store.sweep()
+                if removed:
+                    logger.debug("Swept %d idle game sessions", removed)
+            except Exception as e:
+                logger.error("Error sweeping game sessions: %s", e)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+def create_session_store(config) -> SessionStore:
+    """Build the session store selected by SESSION_STORE_BACKEND"""
+    backend = config.get('SESSION_STORE_BACKEND', 'memory')
+    ttl = int(config.get('SESSION_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    max_entries = int(config.get('SESSION_STORE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    if backend == 'memory':
+        return MemorySessionStore(ttl=ttl, max_entries=max_entries)
+    if backend == 'sqlite':
+        return SqliteSessionStore(config.get('SESSION_STORE_PATH', 'instance/game_sessions.db'), ttl=ttl, max_entries=max_entries)
+    raise ValueError(f"Unknown session store backend: {backend}")
+
+
+session_store: SessionStore = MemorySessionStore()
+_sweeper: Optional[SessionSweeper] = None
+
+
+def init_app(app) -> None:
+    """Configure the process-wide session store and start its sweeper"""
+    global session_store, _sweeper
+    session_store = create_session_store(app.config)
+    if _sweeper is not None:
+        _sweeper.stop()
+    _sweeper = SessionSweeper(session_store, int(app.config.get('SESSION_SWEEP_INTERVAL', DEFAULT_SWEEP_INTERVAL)))
+    _sweeper.start()
+
+
+def get_session_store() -> SessionStore:
+    return session_store
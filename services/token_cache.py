@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 10000
+# Entries are dropped this many seconds before the token's own expiry, so a
+# cached token is never accepted after verify_id_token would reject it
+DEFAULT_EXPIRY_SKEW = 5
+
+
+def token_key(token: str) -> str:
+    """Cache key for a token; the raw token is never kept in memory"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified Firebase ID tokens.
+
+    A player sends the same ID token with every request of a game, so once a
+    token is verified its decoded claims are kept until the token's ``exp``
+    and later requests skip signature and certificate checks entirely.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, expiry_skew: int = DEFAULT_EXPIRY_SKEW):
+        self.max_entries = max_entries
+        self.expiry_skew = expiry_skew
+        self._lock = threading.Lock()
+        # token hash -> (claims, wall clock expiry)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app) -> None:
+        self.max_entries = int(app.config.get('ID_TOKEN_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+        self.clear()
+
+    def get(self, token: str) -> Optional[Dict]:
+        """Decoded claims of a previously verified, unexpired token, or None"""
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: Dict) -> None:
+        """Remember a token that was just verified"""
+        exp = claims.get('exp')
+        if exp is None or self.max_entries <= 0:
+            return
+        expires_at = exp - self.expiry_skew
+        if expires_at <= time.time():
+            return
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token_key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+
+# Shared by every request in this process
+token_cache = TokenCache()
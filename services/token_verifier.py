@@ -0,0 +1,228 @@
+import json
+import logging
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+import firebase_admin
+import jwt
+import requests
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+from cryptography.x509 import load_pem_x509_certificate
+
+logger = logging.getLogger(__name__)
+
+# Public certificates Firebase signs ID tokens with
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+ISSUER_PREFIX = 'https://securetoken.google.com/'
+DEFAULT_CLOCK_SKEW = 5
+# Used when the key source gives no max-age
+DEFAULT_REFRESH_INTERVAL = 3600
+# Delay before retrying a failed fetch, and the shortest time between two fetches
+RETRY_INTERVAL = 60
+FETCH_TIMEOUT = 10
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+def load_key(value):
+    """A public key from a PEM certificate, a PEM public key or an already loaded key"""
+    if not isinstance(value, (str, bytes)):
+        return value
+    pem = value.encode('utf-8') if isinstance(value, str) else value
+    if b'CERTIFICATE' in pem:
+        return load_pem_x509_certificate(pem).public_key()
+    return load_pem_public_key(pem)
+
+
+def firebase_project_id() -> Optional[str]:
+    """Project id of the default Firebase app's credential, or None if there is no app yet"""
+    try:
+        return firebase_admin.get_app().project_id
+    except Exception:
+        return None
+
+
+class KeySource(ABC):
+    """
+    Interface for where token signing keys come from.
+
+    ``fetch`` returns the keys by key id and how many seconds they may be
+    cached for (None if the source doesn't say).
+    """
+
+    @abstractmethod
+    def fetch(self) -> Tuple[Dict[str, object], Optional[int]]:
+        pass
+
+
+class GoogleCertKeySource(KeySource):
+    """Google's published Firebase certificates, cached per their Cache-Control header"""
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, timeout: int = FETCH_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self) -> Tuple[Dict[str, object], Optional[int]]:
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        keys = {kid: load_key(cert) for kid, cert in response.json().items()}
+        match = _MAX_AGE.search(response.headers.get('Cache-Control', ''))
+        return keys, int(match.group(1)) if match else None
+
+
+class StaticKeySource(KeySource):
+    """A fixed key set, e.g. a local key pair for tests and benchmarks"""
+
+    def __init__(self, keys: Dict[str, object]):
+        self.keys = {kid: load_key(key) for kid, key in keys.items()}
+
+    @classmethod
+    def from_file(cls, path: str) -> 'StaticKeySource':
+        """Load a JSON object of key id to PEM certificate or public key"""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def fetch(self) -> Tuple[Dict[str, object], Optional[int]]:
+        return dict(self.keys), None
+
+
+class IdTokenVerifier:
+    """
+    Verifies Firebase ID tokens locally with PyJWT against signing keys held
+    in memory.
+
+    Keys are fetched by a background thread and refreshed before their
+    max-age runs out, so verifying a token never waits on an HTTP call.
+    ``verify`` returns None when it can't decide locally (no key set loaded
+    yet, or a key id it hasn't seen), and the caller falls back to the
+    Firebase SDK for that token.
+
+    The project id defaults to the one of the credential the Firebase app
+    was initialized with.
+    """
+
+    def __init__(self, project_id: Optional[str] = None, source: Optional[KeySource] = None,
+                 clock_skew: int = DEFAULT_CLOCK_SKEW, retry_interval: int = RETRY_INTERVAL):
+        self.project_id = project_id
+        self.source = source
+        self.clock_skew = clock_skew
+        self.retry_interval = retry_interval
+        self._keys: Dict[str, object] = {}
+        self._refresh_now = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.verified = 0
+        self.fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.source is not None and self._resolve_project_id() is not None
+
+    def init_app(self, app) -> None:
+        self.stop()
+        # The Firebase app is initialized when the auth middleware is imported,
+        # after this, so its project id is looked up on first use
+        self.project_id = app.config.get('FIREBASE_PROJECT_ID') or None
+        self.clock_skew = int(app.config.get('ID_TOKEN_CLOCK_SKEW', DEFAULT_CLOCK_SKEW))
+        keys_file = app.config.get('ID_TOKEN_KEYS_FILE')
+        if not app.config.get('ID_TOKEN_OFFLINE_VERIFY', True):
+            self.source = None
+            return
+        if keys_file:
+            self.source = StaticKeySource.from_file(keys_file)
+            self.refresh()
+        else:
+            self.source = GoogleCertKeySource()
+            self.start()
+
+    def refresh(self) -> Optional[int]:
+        """Fetch the key set now, returning its max-age"""
+        keys, max_age = self.source.fetch()
+        # Swapped in whole, so readers never see a partial key set
+        self._keys = keys
+        logger.info("Loaded %d ID token signing keys", len(keys))
+        return max_age
+
+    def verify(self, token: str) -> Optional[Dict]:
+        """
+        Decoded claims of a valid token, or None if the token has to be
+        verified by the Firebase SDK instead
+
+        Raises:
+            jwt.InvalidTokenError: If the token is malformed, expired, or not
+            signed by one of the loaded keys for this project
+        """
+        if not self.enabled:
+            return None
+        kid = jwt.get_unverified_header(token).get('kid')
+        key = self._keys.get(kid)
+        if key is None:
+            # Google publishes new keys ahead of using them, so this is rare:
+            # pick the new set up in the background
+            self._refresh_now.set()
+            self.fallbacks += 1
+            return None
+        claims = jwt.decode(
+            token, key,
+            algorithms=['RS256'],
+            audience=self.project_id,
+            issuer=ISSUER_PREFIX + self.project_id,
+            leeway=self.clock_skew,
+            options={'require': ['exp', 'iat', 'sub', 'aud', 'iss']},
+        )
+        subject = claims['sub']
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise jwt.InvalidTokenError('Invalid subject claim')
+        if claims.get('auth_time', 0) > time.time() + self.clock_skew:
+            raise jwt.ImmatureSignatureError('Token auth_time is in the future')
+        claims['uid'] = subject
+        self.verified += 1
+        return claims
+
+    def _resolve_project_id(self) -> Optional[str]:
+        if self.project_id is None:
+            self.project_id = firebase_project_id()
+        return self.project_id
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'keys': len(self._keys),
+            'verified': self.verified,
+            'fallbacks': self.fallbacks,
+        }
+
+    def start(self) -> None:
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stopped,), name='id-token-keys', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._refresh_now.set()
+        self._thread = None
+
+    def _run(self, stopped: threading.Event) -> None:
+        while not stopped.is_set():
+            # Cleared right before the fetch: a wake-up that arrives later asks for
+            # keys this fetch may not have seen
+            self._refresh_now.clear()
+            try:
+                max_age = self.refresh()
+                delay = max(self.retry_interval, int(max_age * 0.9)) if max_age else DEFAULT_REFRESH_INTERVAL
+            except Exception as e:
+                logger.error("Error fetching ID token signing keys: %s", e)
+                delay = self.retry_interval
+            # Fetch at most once per retry interval, however many unknown key ids show up
+            if stopped.wait(self.retry_interval):
+                return
+            if self._refresh_now.is_set():
+                continue
+            self._refresh_now.wait(delay - self.retry_interval)
+
+
+# Shared by every request in this process
+id_token_verifier = IdTokenVerifier()
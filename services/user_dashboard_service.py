@@ -2,31 +2,31 @@ from models import Users, UserGameSession, UserGuess, Game
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 from flask import current_app
+import logging
 import math
 from __init__ import db
+from services.current_user import load_user
+from services.leaderboard import accuracy as leaderboard_accuracy, session_leaderboard
+from services.rank_index import rank_index
+
+logger = logging.getLogger(__name__)
+
 class UserDashboardService:
     def get_user_stats(self, user_id):
         """Get user statistics for the dashboard"""
         try:
             # Get user from database
-            user = Users.query.filter_by(user_id=user_id).first()
+            user = load_user(user_id)
             if not user:
-                print(f"User not found: {user_id}")
                 raise ValueError(f"User with ID {user_id} not found")
             
-            print(f"Found user: {user.user_id}, username: {user.username}, score: {user.score}")
-            
             # Calculate average accuracy from completed game sessions
             completed_sessions = UserGameSession.query.filter_by(
                 user_id=user_id,
                 session_status='completed'
             ).all()
             
-            print(f"Found {len(completed_sessions)} completed sessions for user {user_id}")
-            
-            # Debug: Print all sessions
-            for session in completed_sessions:
-                print(f"Session {session.session_id}: correct={session.correct_guesses}, total={session.total_guesses}, status={session.session_status}")
+            logger.debug("Found %d completed sessions for user %s", len(completed_sessions), user_id)
             
             # Use SQL to directly calculate totals
             session_totals = db.session.query(
@@ -40,38 +40,42 @@ class UserDashboardService:
             total_correct = session_totals.total_correct or 0
             total_guesses = session_totals.total_guesses or 0
             
-            print(f"SQL query totals: correct={total_correct}, total={total_guesses}")
-            
             # Default accuracy to 0 if no guesses
             average_accuracy = 0
             if total_guesses > 0:
                 average_accuracy = round((total_correct / total_guesses) * 100)
             
-            print(f"Calculated accuracy: {average_accuracy}% ({total_correct}/{total_guesses})")
+            logger.debug("Accuracy for user %s: %s%% (%s/%s)", user_id, average_accuracy, total_correct, total_guesses)
             
             # Count completed challenges/games
             challenges_completed = len(completed_sessions)
             
-            # Calculate user rank based on score
-            user_rank_query = Users.query.filter(Users.score > user.score).count()
-            current_rank = user_rank_query + 1  # Add 1 because ranks start at 1
-            
-            print(f"User rank: {current_rank}")
+            # Rank, percentile and nearby players come from the in-memory rank index
+            rank_index.observe(user)
+            current_rank = rank_index.rank(user_id)
+            nearby_players = [
+                {"rank": player.rank, "name": player.name, "score": player.score}
+                for player in rank_index.neighbors(user_id)
+            ]
             
             # Return stats with default values for safety
             return {
                 "averageAccuracy": average_accuracy,
                 "challengesCompleted": challenges_completed,
                 "currentRank": current_rank,
+                "betterThan": rank_index.better_than(user_id),
+                "nearbyPlayers": nearby_players,
                 "totalScore": user.score or 0
             }
         except Exception as e:
-            print(f"Error in get_user_stats: {str(e)}")
+            logger.exception("Error in get_user_stats: %s", e)
             # Return default values in case of error
             return {
                 "averageAccuracy": 0,
                 "challengesCompleted": 0,
                 "currentRank": 0,
+                "betterThan": 0,
+                "nearbyPlayers": [],
                 "totalScore": 0,
                 "error": str(e)
             }
@@ -121,41 +125,13 @@ class UserDashboardService:
     
     def get_leaderboard(self):
         """Get global leaderboard data"""
-        # Get all users and calculate their accuracy
-        users = Users.query.all()
         players = []
         
-        for user in users:
-            # Calculate user's accuracy based on game sessions
-            user_sessions = UserGameSession.query.filter_by(
-                user_id=user.user_id,
-                session_status='completed'
-            )
-            total_sessions = user_sessions.count()
-            
-            if total_sessions > 0:
-                # Get sum of correct guesses and total guesses from all sessions
-                session_stats = db.session.query(
-                    func.sum(UserGameSession.correct_guesses).label("total_correct"),
-                    func.sum(UserGameSession.total_guesses).label("total_guesses")
-                ).filter(
-                    UserGameSession.user_id == user.user_id,
-                ).first()
+        for entry in session_leaderboard.top(10):
+            accuracy = round(leaderboard_accuracy(entry) * 100)
                 
-                total_correct = session_stats.total_correct or 0
-                total_guesses = session_stats.total_guesses or 0
-                
-                if total_guesses > 0:
-                    accuracy = round((total_correct / total_guesses) * 100)
-                else:
-                    accuracy = 0
-            else:
-                accuracy = 0
-                
-            # Get username or use email as fallback
-            display_name = user.username if user.username else user.email
-            
             # Truncate long names
+            display_name = entry.name
             if display_name and len(display_name) > 20:
                 display_name = display_name[:17] + "..."
                 
@@ -164,11 +140,7 @@ class UserDashboardService:
                 "accuracy": accuracy
             })
         
-        # Sort by accuracy descending and take top 10
-        players.sort(key=lambda x: x["accuracy"], reverse=True)
-        players = players[:10]
-        
-        # Add ranks after sorting
+        # Add ranks, the board is already sorted by accuracy
         for i, player in enumerate(players, 1):
             player["rank"] = i
             
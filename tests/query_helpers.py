@@ -0,0 +1,19 @@
+import contextlib
+
+from services.query_profiler import query_profiler
+
+
+def assert_max_queries(response, max_queries):
+    """Assert a test client response ran at most ``max_queries`` SQL statements"""
+    count = int(response.headers['X-Query-Count'])
+    assert count <= max_queries, f"{response.request.path} ran {count} queries, expected at most {max_queries}"
+
+
+@contextlib.contextmanager
+def max_queries(limit):
+    """Assert the block runs at most ``limit`` SQL statements, e.g. around a service call"""
+    with query_profiler.capture() as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f"Ran {stats.count} queries, expected at most {limit}: {dict(stats.statements)}"
+    )
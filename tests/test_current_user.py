@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Users
+from services.current_user import UserCache
+
+
+def _user(user_id, score=0):
+    return Users(user_id=user_id, username=user_id, level=1, exp=0, games_started=0, games_won=0, score=score)
+
+
+def test_cached_columns_until_forgotten():
+    cache = UserCache(ttl=30)
+    cache.put(_user('alice', score=40))
+    assert cache.get('alice')['score'] == 40
+    assert cache.get('bob') is None
+    cache.forget('alice')
+    assert cache.get('alice') is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'size': 0}
+
+
+def test_zero_ttl_disables_cache():
+    cache = UserCache(ttl=0)
+    cache.put(_user('alice'))
+    assert cache.get('alice') is None
+
+
+def test_lru_bound():
+    cache = UserCache(ttl=30, max_entries=2)
+    for name in ('a', 'b', 'c'):
+        cache.put(_user(name))
+    assert cache.get('a') is None
+    assert cache.get('c')['user_id'] == 'c'
+
+
+def test_update_overwrites_cached_columns():
+    cache = UserCache(ttl=30)
+    cache.put(_user('alice', score=40))
+    cache.update('alice', {'score': 55, 'games_won': 1})
+    cache.update('bob', {'score': 10})
+    assert cache.get('alice')['score'] == 55
+    assert cache.get('alice')['username'] == 'alice'
+    assert cache.get('bob') is None
@@ -0,0 +1,29 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.game_codes import GameCodeCache
+
+
+def test_remember_and_forget():
+    cache = GameCodeCache(max_entries=2)
+    cache.remember('AAA', 1)
+    cache.remember('BBB', 2)
+    assert cache.cached_id('AAA') == (True, 1)
+    cache.remember('CCC', 3)
+    # BBB was least recently used
+    assert cache.cached_id('BBB') == (False, None)
+    cache.forget(game_id=1)
+    assert cache.cached_id('AAA') == (False, None)
+
+
+def test_missing_codes_expire():
+    cache = GameCodeCache(missing_ttl=0)
+    cache.remember_missing(game_code='NOPE')
+    assert cache.cached_id('NOPE') == (False, None)
+
+    cache = GameCodeCache()
+    cache.remember_missing(game_code='NOPE')
+    assert cache.cached_id('NOPE') == (True, None)
+    cache.remember('NOPE', 5)
+    assert cache.cached_id('NOPE') == (True, 5)
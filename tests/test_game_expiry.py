@@ -0,0 +1,30 @@
+import sys
+import os
+import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.game_expiry import JoinableGames
+
+
+def make_games():
+    games = JoinableGames()
+    tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
+    games.load([(1, tomorrow), (2, None), (3, tomorrow)])
+    return games
+
+
+def test_pick_returns_joinable_games():
+    games = make_games()
+    assert {games.pick() for _ in range(100)} <= {1, 2, 3}
+    games.remove([1, 3])
+    assert games.pick() == 2
+    games.remove([2])
+    assert games.pick() is None
+
+
+def test_pick_skips_games_that_expired_since_loading():
+    games = make_games()
+    games.remove([1, 2])
+    games.add(4, datetime.datetime.now() - datetime.timedelta(seconds=1))
+    assert {games.pick() for _ in range(50)} == {3}
+    assert len(games) == 1
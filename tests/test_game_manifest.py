@@ -0,0 +1,36 @@
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.game_manifest import GameManifest
+
+
+def test_manifest_builds_images_and_dual_rounds():
+    manifest = GameManifest(7, 'ABCD1234', 'dual', [
+        (1, 'real_images/1.jpg', 'real'),
+        (2, 'cf_Male/1.jpg', 'ai'),
+        (3, 'real_images/2.jpg', 'real'),
+        (4, 'cf_Male/2.jpg', 'ai'),
+    ])
+
+    assert manifest.images[1] == {'url': '/api/images/view/cf_Male/1.jpg', 'type': 'ai'}
+    assert json.loads(manifest.game_json) == {'game_id': 7, 'images': list(manifest.images)}
+
+    dual = json.loads(manifest.dual_game_json)
+    assert dual['status'] == 'success'
+    assert dual['game_data']['gameCode'] == 'ABCD1234'
+    assert dual['game_data']['settings'] == {'totalRounds': 2, 'timerPerRound': 60}
+    assert dual['game_data']['rounds'][1] == {
+        'roundId': '1',
+        'images': [
+            {'id': '3', 'url': '/api/images/view/real_images/2.jpg', 'isCorrect': True},
+            {'id': '4', 'url': '/api/images/view/cf_Male/2.jpg', 'isCorrect': False},
+        ]
+    }
+
+
+def test_manifest_with_odd_image_count_has_no_rounds():
+    manifest = GameManifest(8, None, 'classic', [(1, 'a.jpg', 'real')])
+    assert manifest.rounds is None
+    assert manifest.dual_game_json is None
@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.game_pool import GamePoolMetrics, parse_pool_sizes
+
+
+def test_parse_pool_sizes():
+    assert parse_pool_sizes('classic:10=20, dual:5=3') == {('classic', 10): 20, ('dual', 5): 3}
+    assert parse_pool_sizes('') == {}
+
+
+def test_metrics_snapshot():
+    metrics = GamePoolMetrics()
+    metrics.record_claim(0.002, hit=True)
+    metrics.record_claim(0.001, hit=False)
+    metrics.record_refill(4)
+    snapshot = metrics.snapshot()
+    assert snapshot['claims'] == 1
+    assert snapshot['claimMisses'] == 1
+    assert snapshot['refillRatePerMinute'] == 4
+    assert snapshot['claimLatencyMs']['max'] == 2
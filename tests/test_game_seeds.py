@@ -0,0 +1,57 @@
+import sys
+import os
+import random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from services import game_seeds
+from services.game_seeds import (
+    decode_image_ids, draw_positions, encode_image_ids, game_image_ids, game_images,
+)
+from services.image_sampler import ImageSampler
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    # A private catalog, so the process-wide sampler is left alone
+    sampler = ImageSampler()
+    sampler.load([(i, 'real' if i % 2 else 'ai', f'{i}.jpg') for i in range(1, 101)])
+    monkeypatch.setattr(game_seeds, 'image_sampler', sampler)
+    return sampler
+
+
+def test_draw_positions_is_deterministic_and_distinct():
+    first = draw_positions(random.Random(42), 1000, 50)
+    assert first == draw_positions(random.Random(42), 1000, 50)
+    assert len(set(first)) == 50
+    assert all(0 <= p < 1000 for p in first)
+    assert sorted(draw_positions(random.Random(1), 5, 10)) == [0, 1, 2, 3, 4]
+
+
+def test_game_images_ignore_images_added_after_the_catalog_version(sampler):
+    classic = game_image_ids('classic', 7, 100, 5)
+    assert len(classic) == 5 and all(i % 2 for i in classic[:3]) and not any(i % 2 for i in classic[3:])
+
+    dual = game_image_ids('dual', 7, 100, 4)
+    for i in range(101, 201):
+        sampler.add_image(i, 'real' if i % 2 else 'ai', f'{i}.jpg')
+    assert game_image_ids('dual', 7, 100, 4) == dual
+    assert [i % 2 for i in dual] == [1, 0] * 4
+
+
+def test_game_images_fall_back_to_stored_ids_when_the_catalog_changed_under_the_seed(sampler):
+    drawn = game_image_ids('classic', 7, 100, 6)
+    stored = decode_image_ids(encode_image_ids(drawn))
+    assert stored == drawn
+    assert [image.image_id for image in game_images('classic', 7, 100, 6, stored)] == drawn
+
+    # An image the game doesn't use shifts the draw, the stored ids still hold
+    unused = next(i for i in range(1, 101) if i not in drawn)
+    sampler.remove_images([unused])
+    assert game_image_ids('classic', 7, 100, 6) != drawn
+    assert [image.image_id for image in game_images('classic', 7, 100, 6, stored)] == drawn
+
+    sampler.remove_images([drawn[0]])
+    with pytest.raises(ValueError):
+        game_images('classic', 7, 100, 6, stored)
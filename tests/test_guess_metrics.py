@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from services.guess_metrics import (EMPTY_COUNTS, GLOBAL, IMAGE, MONTH, TAG, USER, ConfusionCounts,
+                                    _aggregate_statement)
+
+
+def _sql(scopes):
+    statement = _aggregate_statement(scopes)
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def test_derived_metrics_treat_real_as_positive():
+    counts = ConfusionCounts(real_real=6, real_ai=2, ai_real=3, ai_ai=9, total=20)
+    assert counts.accuracy == 15 / 20
+    assert counts.precision == 6 / 9
+    assert counts.recall == 6 / 8
+    assert counts.f1_score == pytest.approx(2 * (6 / 9) * (6 / 8) / ((6 / 9) + (6 / 8)))
+    assert counts.confusion_matrix() == {
+        "truePositive": 6, "falsePositive": 2, "falseNegative": 3, "trueNegative": 9,
+    }
+
+
+def test_empty_counts_have_zero_metrics():
+    assert EMPTY_COUNTS.ml_metrics() == {"accuracy": 0, "precision": 0, "recall": 0, "f1Score": 0}
+
+
+def test_guess_scopes_filter_each_cell_by_image_and_guessed_type():
+    sql = _sql({USER: ['u1'], TAG: None})
+    assert sql.count('UNION ALL') == 1
+    for cell, (image_type, guess_type) in {
+        'real_real': ('real', 'real'), 'real_ai': ('real', 'ai'), 'ai_real': ('ai', 'real'), 'ai_ai': ('ai', 'ai'),
+    }.items():
+        predicate = (f"count(*) FILTER (WHERE images.image_type = '{image_type}' "
+                     f"AND user_guesses.user_guess_type = '{guess_type}') AS {cell}")
+        assert sql.count(predicate) == 2
+    assert "CAST(user_guesses.user_id AS VARCHAR) AS key" in sql
+    assert "WHERE user_guesses.user_id IN ('u1') GROUP BY user_guesses.user_id" in sql
+    assert "JOIN user_tags ON user_tags.user_id = user_guesses.user_id GROUP BY user_tags.tag_id" in sql
+
+
+def test_rollup_scopes_sum_the_daily_rollup():
+    sql = _sql({GLOBAL: None, IMAGE: [3, 4], MONTH: 6})
+    assert sql.count('UNION ALL') == 2
+    assert 'user_guesses' not in sql
+    assert sql.count("coalesce(sum(guess_daily_rollup.guess_count) FILTER (WHERE "
+                     "guess_daily_rollup.image_type = 'real' AND guess_daily_rollup.guess_type = 'ai'), 0) AS real_ai") == 3
+    assert "CAST(NULL AS VARCHAR) AS key" in sql
+    assert "WHERE guess_daily_rollup.image_id IN (3, 4) GROUP BY guess_daily_rollup.image_id" in sql
+    assert "make_interval(0, 6)" in sql
+    assert "GROUP BY to_char(guess_daily_rollup.day, 'YYYY-MM')" in sql
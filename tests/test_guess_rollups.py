@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert
+
+from __init__ import db
+from models import (Feedback, FeedbackDailyRollup, FeedbackUser, Game, GuessDailyRollup, Images, UserGameSession,
+                    UserGuess, Users)
+from services.guess_rollups import catch_up, record_feedback, record_guesses, rollup_rows
+
+
+def test_rollup_rows_aggregate_per_key():
+    morning = datetime.datetime(2024, 5, 1, 9, 0)
+    evening = datetime.datetime(2024, 5, 1, 21, 0)
+    next_day = datetime.datetime(2024, 5, 2, 9, 0)
+    guesses = [
+        {'image_id': 1, 'user_id': 'u1', 'user_guess_type': 'real', 'date_of_guess': morning},
+        {'image_id': 1, 'user_id': 'u2', 'user_guess_type': 'real', 'date_of_guess': evening},
+        {'image_id': 2, 'user_id': 'u1', 'user_guess_type': 'real', 'date_of_guess': evening},
+        {'image_id': 2, 'user_id': 'u1', 'user_guess_type': 'ai', 'date_of_guess': next_day},
+    ]
+    guess_rows, user_rows = rollup_rows(guesses, {1: 'real', 2: 'ai'})
+
+    may_1, may_2 = datetime.date(2024, 5, 1), datetime.date(2024, 5, 2)
+    assert sorted((r['day'], r['image_id'], r['guess_type'], r['guess_count']) for r in guess_rows) == [
+        (may_1, 1, 'real', 2), (may_1, 2, 'real', 1), (may_2, 2, 'ai', 1),
+    ]
+    assert sorted((r['day'], r['user_id'], r['guess_count'], r['correct_count']) for r in user_rows) == [
+        (may_1, 'u1', 2, 1), (may_1, 'u2', 1, 1), (may_2, 'u1', 1, 1),
+    ]
+
+
+@pytest.fixture
+def database():
+    # Needs a scratch PostgreSQL database, its tables are dropped afterwards
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    db.init_app(app)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield
+        db.session.remove()
+        db.drop_all()
+
+
+def _guess_counts():
+    return {
+        (row.day, row.image_id, row.guess_type): row.guess_count
+        for row in GuessDailyRollup.query.all()
+    }
+
+
+def test_catch_up_does_not_double_count_recorded_guesses(database):
+    now = datetime.datetime(2024, 5, 2, 12, 0)
+    db.session.add(Users(user_id='u1', username='alice'))
+    db.session.add(Images(image_id=1, image_path='1.jpg', image_type='real', upload_time=now))
+    game = Game(game_mode='classic', date_created=now, game_board='classic', game_status='active', created_by='u1')
+    db.session.add(game)
+    db.session.flush()
+    session = UserGameSession(game_id=game.game_id, user_id='u1', start_time=now, session_status='completed')
+    db.session.add(session)
+    db.session.flush()
+
+    # Recorded by the game service...
+    guesses = [
+        {'session_id': session.session_id, 'image_id': 1, 'user_id': 'u1', 'user_guess_type': 'real',
+         'date_of_guess': now - datetime.timedelta(days=day)}
+        for day in (0, 0, 1)
+    ]
+    db.session.execute(insert(UserGuess), guesses)
+    record_guesses(guesses, {1: 'real'})
+    # ...and written by a script
+    old_guess = UserGuess(session_id=session.session_id, image_id=1, user_id='u1', user_guess_type='ai',
+                          date_of_guess=now - datetime.timedelta(days=40))
+    db.session.add(old_guess)
+    db.session.commit()
+
+    assert catch_up(batch_days=1) == 3
+    may_2, may_1, march_23 = datetime.date(2024, 5, 2), datetime.date(2024, 5, 1), datetime.date(2024, 3, 23)
+    expected = {(may_2, 1, 'real'): 2, (may_1, 1, 'real'): 1, (march_23, 1, 'ai'): 1}
+    assert _guess_counts() == expected
+    assert catch_up() == 0
+
+    # Feedback on an old guess refreshes that day's feedback rollup
+    db.session.add(Feedback(feedback_id=1, x=1, y=1, msg='edge', date_added=now))
+    db.session.add(FeedbackUser(feedback_id=1, guess_id=old_guess.guess_id))
+    record_feedback([{'date_of_guess': old_guess.date_of_guess, 'image_id': 1}])
+    db.session.commit()
+    assert [(row.day, row.feedback_count) for row in FeedbackDailyRollup.query.all()] == [(march_23, 1)]
+    assert catch_up() == 1
+    assert [(row.day, row.feedback_count) for row in FeedbackDailyRollup.query.all()] == [(march_23, 1)]
+    assert _guess_counts() == expected
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.image_catalog import ImageCatalog
+
+
+ROWS = [
+    (3, '/real_images/3.jpg', 'real', 'Male', 30, 'none'),
+    (1, '/real_images/1.jpg', 'real', 'Female', 22, 'Pleural_Effusion'),
+    (2, '/ai/2.jpg', 'ai', 'Male', 61, 'none'),
+    (4, '/ai/4.jpg', 'ai', None, None, None),
+]
+
+
+def _catalog():
+    catalog = ImageCatalog(refresh_interval=3600)
+    catalog.load(ROWS)
+    return catalog
+
+
+def test_masks_combine_like_sql_filters():
+    snapshot = _catalog().snapshot()
+    male = snapshot.match('gender', 'Male')
+    assert sorted(snapshot.image_ids(male)) == [2, 3]
+    assert snapshot.count(male & snapshot.match('image_type', 'real')) == 1
+    assert snapshot.image_ids(snapshot.contains('disease', 'Pleural')) == [1]
+    assert sorted(snapshot.image_ids(snapshot.age_between(18, 35))) == [1, 3]
+    assert snapshot.count(snapshot.match('gender', 'Other')) == 0
+    assert snapshot.first(male).image_path == '/ai/2.jpg'
+
+
+def test_sample_draws_distinct_matching_rows():
+    snapshot = _catalog().snapshot()
+    rows = snapshot.sample(snapshot.match('image_type', 'ai'), 5)
+    assert sorted(row.image_id for row in rows) == [2, 4]
+    assert snapshot.sample(snapshot.match('image_type', 'missing')) == []
+
+
+def test_add_image_publishes_new_snapshot():
+    catalog = _catalog()
+    before = catalog.snapshot()
+    catalog.add_image(5, '/ai-images-upload/5.jpg', 'ai', 'Female', 40, 'Cardiomegaly')
+    catalog.add_image(5, '/ai-images-upload/5.jpg', 'ai', 'Female', 40, 'Cardiomegaly')
+    after = catalog.snapshot()
+    assert len(before) == 4 and len(after) == 5
+    assert after.first(after.match('disease', 'Cardiomegaly')).image_path == '/ai-images-upload/5.jpg'
+    assert after.count(after.match('gender', 'Female')) == 2
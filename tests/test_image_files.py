@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from services.image_files import IMMUTABLE_MAX_AGE, send_image
+
+
+def _client(base_dir):
+    app = Flask(__name__)
+
+    @app.route('/img/<path:name>')
+    def img(name):
+        return send_image(str(base_dir), name, max_age=60) or ('missing', 404)
+
+    return app.test_client()
+
+
+def test_validators_and_not_modified(tmp_path):
+    (tmp_path / 'xray.jpg').write_bytes(b'0123456789' * 10)
+    client = _client(tmp_path)
+
+    response = client.get('/img/xray.jpg')
+    assert response.status_code == 200
+    assert response.data == b'0123456789' * 10
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+
+    assert client.get('/img/xray.jpg', headers={'If-None-Match': etag}).status_code == 304
+    last_modified = response.headers['Last-Modified']
+    assert client.get('/img/xray.jpg', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_byte_ranges(tmp_path):
+    (tmp_path / 'xray.jpg').write_bytes(b'0123456789' * 10)
+    response = _client(tmp_path).get('/img/xray.jpg', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == b'0123456789'
+    assert response.headers['Content-Range'] == 'bytes 10-19/100'
+
+
+def test_content_addressed_files_are_immutable(tmp_path):
+    name = 'a3f1c2d4e5b6a7980112233445566778.webp'
+    (tmp_path / name).write_bytes(b'data')
+    response = _client(tmp_path).get('/img/' + name)
+    assert f'max-age={IMMUTABLE_MAX_AGE}' in response.headers['Cache-Control']
+    assert 'immutable' in response.headers['Cache-Control']
+
+
+def test_missing_and_escaping_paths(tmp_path):
+    client = _client(tmp_path / 'images')
+    (tmp_path / 'secret.txt').write_text('no')
+    os.makedirs(tmp_path / 'images')
+    assert client.get('/img/nope.jpg').status_code == 404
+    assert client.get('/img/../secret.txt').status_code == 404
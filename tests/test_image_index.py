@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+
+import pytest
+
+from services.image_index import ImageIndex
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x')
+
+
+def _index(tmp_path):
+    for name in ('real_images/1.jpg', 'real_images/2.jpg', 'cf_a/3.png', 'cf_a/notes.txt', 'cf_b/deep/4.jpeg'):
+        _touch(str(tmp_path / name))
+    return ImageIndex(str(tmp_path), refresh_interval=0)
+
+
+def test_lists_and_finds_images(tmp_path):
+    index = _index(tmp_path)
+    assert index.paths() == ['cf_a/3.png', 'cf_b/deep/4.jpeg', 'real_images/1.jpg', 'real_images/2.jpg']
+    assert index.find('4.jpeg') == 'cf_b/deep/4.jpeg'
+    assert index.find('missing.jpg') is None
+
+
+def test_cursor_pagination(tmp_path):
+    index = _index(tmp_path)
+    seen, cursor = [], None
+    while True:
+        page, cursor = index.page(cursor, limit=3)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == index.paths()
+    with pytest.raises(ValueError):
+        index.page('not a cursor!', limit=3)
+
+
+def test_only_changed_directories_are_relisted(tmp_path):
+    index = _index(tmp_path)
+    index.paths()
+    assert not index.refresh()
+    _touch(str(tmp_path / 'cf_b' / 'deep' / '5.jpg'))
+    assert index.refresh()
+    assert index.find('5.jpg') == 'cf_b/deep/5.jpg'
+
+
+def test_uploads_are_added_directly(tmp_path):
+    index = ImageIndex(str(tmp_path), refresh_interval=3600)
+    _touch(str(tmp_path / 'real_images' / '1.jpg'))
+    index.paths()
+    _touch(str(tmp_path / 'real-images-upload' / 'new.jpg'))
+    index.add('/real-images-upload/new.jpg')
+    assert index.paths() == ['real-images-upload/new.jpg', 'real_images/1.jpg']
+
+
+def test_concurrent_readers_share_one_refresh(tmp_path):
+    index = _index(tmp_path)
+    index.paths()
+    scans = []
+    started, release = threading.Event(), threading.Event()
+    scan = index._scan
+
+    def slow_scan(relative_dir, dirs):
+        if not relative_dir:
+            scans.append(relative_dir)
+            started.set()
+            release.wait(5)
+        return scan(relative_dir, dirs)
+
+    index._scan = slow_scan
+    refreshing = threading.Thread(target=index.paths)
+    refreshing.start()
+    assert started.wait(5)
+    # Served from the previous listing while the refresh is running
+    assert index.find('4.jpeg') == 'cf_b/deep/4.jpeg'
+    assert len(index.paths()) == 4
+    release.set()
+    refreshing.join()
+    assert len(scans) == 1
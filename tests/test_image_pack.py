@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from services import image_pack
+from services.image_pack import ImagePack, build_image_pack, send_packed_image
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_build_is_incremental(tmp_path):
+    images = tmp_path / 'images'
+    _write(str(images / 'real_images' / '1.jpg'), b'one')
+    _write(str(images / 'cf_a' / '2.jpg'), b'two')
+    assert build_image_pack(str(images), str(tmp_path / 'pack')) == {'added': 2, 'unchanged': 0, 'removed': 0}
+
+    _write(str(images / 'cf_a' / '3.jpg'), b'three')
+    os.remove(images / 'real_images' / '1.jpg')
+    assert build_image_pack(str(images), str(tmp_path / 'pack')) == {'added': 1, 'unchanged': 1, 'removed': 1}
+
+    pack = ImagePack(str(tmp_path / 'pack'), images_root=str(images))
+    data, _ = pack.get('/cf_a/3.jpg')
+    assert bytes(data) == b'three'
+    assert pack.get('real_images/1.jpg') is None
+
+
+def test_changed_loose_files_are_not_served_from_the_pack(tmp_path):
+    images = tmp_path / 'images'
+    _write(str(images / 'a.jpg'), b'old')
+    _write(str(images / 'b.jpg'), b'bee')
+    build_image_pack(str(images), str(tmp_path / 'pack'))
+    pack = ImagePack(str(tmp_path / 'pack'), images_root=str(images))
+
+    # As if overwritten and deleted through another worker
+    _write(str(images / 'a.jpg'), b'newer')
+    os.remove(images / 'b.jpg')
+    assert pack.get('a.jpg') is None
+    assert pack.get('b.jpg') is None
+    assert pack.stats()['stale'] == 2
+
+
+def test_serves_slices_with_validators_and_ranges(tmp_path, monkeypatch):
+    _write(str(tmp_path / 'images' / 'x.jpg'), b'0123456789')
+    build_image_pack(str(tmp_path / 'images'), str(tmp_path / 'pack'))
+    # A private pack, so the process-wide one is left alone
+    monkeypatch.setattr(image_pack, 'image_pack', ImagePack(str(tmp_path / 'pack'), images_root=str(tmp_path / 'images')))
+    app = Flask(__name__)
+
+    @app.route('/view/<path:name>')
+    def view(name):
+        return send_packed_image(name, 60) or ('loose', 200)
+
+    client = app.test_client()
+    response = client.get('/view/x.jpg')
+    assert response.data == b'0123456789'
+    assert response.mimetype == 'image/jpeg'
+    etag = response.headers['ETag']
+    assert client.get('/view/x.jpg', headers={'If-None-Match': etag}).status_code == 304
+    ranged = client.get('/view/x.jpg', headers={'Range': 'bytes=2-4'})
+    assert ranged.status_code == 206 and ranged.data == b'234'
+    assert client.get('/view/new.jpg').data == b'loose'
+
+
+def test_content_addressed_files_are_immutable(tmp_path, monkeypatch):
+    name = '0123456789abcdef0123456789abcdef.jpg'
+    _write(str(tmp_path / 'images' / name), b'hashed')
+    _write(str(tmp_path / 'images' / 'plain.jpg'), b'plain')
+    build_image_pack(str(tmp_path / 'images'), str(tmp_path / 'pack'))
+    monkeypatch.setattr(image_pack, 'image_pack', ImagePack(str(tmp_path / 'pack'), images_root=str(tmp_path / 'images')))
+    app = Flask(__name__)
+
+    @app.route('/view/<path:name>')
+    def view(name):
+        return send_packed_image(name, 60)
+
+    client = app.test_client()
+    cache_control = client.get(f'/view/{name}').cache_control
+    assert cache_control.immutable and cache_control.max_age == image_pack.IMMUTABLE_MAX_AGE
+    cache_control = client.get('/view/plain.jpg').cache_control
+    assert not cache_control.immutable and cache_control.max_age == 60
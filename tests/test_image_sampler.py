@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.image_sampler import ImageSampler
+
+
+def make_sampler():
+    sampler = ImageSampler()
+    sampler.load([(i, 'real' if i <= 50 else 'ai', f'images/{i}.jpg') for i in range(1, 101)])
+    return sampler
+
+
+def test_sample_ids_are_distinct_and_of_requested_type():
+    sampler = make_sampler()
+    ids = sampler.sample_ids(20, 'real')
+    assert len(ids) == 20
+    assert len(set(ids)) == 20
+    assert all(1 <= i <= 50 for i in ids)
+
+
+def test_sample_ids_caps_at_available_images():
+    sampler = make_sampler()
+    assert sorted(sampler.sample_ids(80, 'ai')) == list(range(51, 101))
+    assert sampler.sample_ids(5, 'unknown') == []
+    assert sampler.sample_ids(0, 'real') == []
+
+
+def test_add_and_remove_images():
+    sampler = make_sampler()
+    sampler.add_image(101, 'ai', 'images/101.jpg')
+    assert sampler.count('ai') == 51
+    sampler.remove_images([51, 52])
+    assert sampler.count('ai') == 49
+    assert 51 not in sampler.sample_ids(100, 'ai')
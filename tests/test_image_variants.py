@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+
+import pytest
+from flask import Flask, request
+
+from services.image_variants import ImageVariants, image_variants, pick_size, render_all, send_image_variant
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def _xray(path, size=(1024, 800)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new('L', size, color=128).save(path, format='JPEG')
+
+
+def test_pick_size():
+    assert pick_size(100) == 128
+    assert pick_size(256) == 256
+    assert pick_size(2000) is None
+
+
+def test_variant_rendered_on_miss_then_reused(tmp_path):
+    _xray(str(tmp_path / 'images' / 'real_images' / '1.jpg'))
+    variants = ImageVariants(str(tmp_path / 'images'), str(tmp_path / 'variants'))
+
+    variant = variants.get('real_images/1.jpg', 256, 'webp')
+    assert variant == '256/real_images/1.webp'
+    with Image.open(tmp_path / 'variants' / variant) as image:
+        assert image.format == 'WEBP'
+        assert max(image.size) == 256
+    assert variants.get('/real_images/1.jpg', 256, 'webp') == variant
+    assert variants.stats() == {'hits': 1, 'misses': 1}
+    assert variants.get('../outside.jpg', 256, 'webp') is None
+
+
+def test_render_all(tmp_path):
+    _xray(str(tmp_path / 'a.jpg'))
+    assert render_all(str(tmp_path / 'a.jpg'), str(tmp_path / 'variants'), 'a.jpg') == 6
+    assert os.path.exists(tmp_path / 'variants' / '512' / 'a.jpeg')
+
+
+def test_accept_negotiation(tmp_path, monkeypatch):
+    _xray(str(tmp_path / 'images' / 'x.jpg'))
+    monkeypatch.setattr(image_variants, 'images_root', str(tmp_path / 'images'))
+    monkeypatch.setattr(image_variants, 'variant_root', str(tmp_path / 'variants'))
+    app = Flask(__name__)
+
+    @app.route('/view/<path:name>')
+    def view(name):
+        return send_image_variant(name, request.args.get('size', type=int), request.accept_mimetypes, 60) \
+            or ('original', 200)
+
+    client = app.test_client()
+    webp = client.get('/view/x.jpg?size=128', headers={'Accept': 'image/webp,*/*'})
+    assert webp.mimetype == 'image/webp'
+    assert 'Accept' in webp.headers['Vary']
+    jpeg = client.get('/view/x.jpg?size=128', headers={'Accept': '*/*'})
+    assert jpeg.mimetype == 'image/jpeg'
+    assert Image.open(io.BytesIO(jpeg.data)).size == (128, 100)
+    assert client.get('/view/x.jpg').data == b'original'
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Users
+from services.leaderboard import Leaderboard, accuracy, display_name
+
+
+ROWS = [
+    ('a', 'alice', 8, 10),
+    ('b', 'bob', 1, 2),
+    ('c', 'carol', 9, 10),
+    ('d', 'dave', None, None),
+]
+
+
+def _board(rows=ROWS):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return rows
+
+    board = Leaderboard(loader, refresh_interval=3600)
+    return board, calls
+
+
+def test_top_is_sorted_by_accuracy():
+    board, calls = _board()
+    assert [entry.user_id for entry in board.top(3)] == ['c', 'a', 'b']
+    assert [entry.user_id for entry in board.top()] == ['c', 'a', 'b', 'd']
+    assert accuracy(board.get('d')) == 0
+    assert len(calls) == 1
+
+
+def test_record_moves_user_and_adds_new_ones():
+    board, calls = _board()
+    board.top()
+    board.record('b', 'bob', 19, 20)
+    board.record('e', 'erin', 1, 1)
+    assert [entry.user_id for entry in board.top(3)] == ['e', 'b', 'c']
+    assert board.get('b').correct == 20 and board.get('b').total == 22
+    board.invalidate()
+    assert [entry.user_id for entry in board.top(2)] == ['c', 'a']
+    assert len(calls) == 2
+
+
+def test_record_before_load_is_ignored():
+    board, calls = _board()
+    board.record('e', 'erin', 1, 1)
+    assert board.get('e') is None
+
+
+def test_display_name_falls_back_to_user_id():
+    assert display_name(Users(user_id='u1', username='alice')) == 'alice'
+    assert display_name(Users(user_id='u2', username='')) == 'u2'
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+
+from flask import Flask, g
+
+from services.log_config import LazyQueueHandler, LogConfig, RequestSamplingFilter, StructuredFormatter, parse_mapping
+
+
+def _record(level, msg, *args):
+    return logging.LogRecord('medgen.test', level, __file__, 1, msg, args, None)
+
+
+def test_parse_mapping():
+    assert parse_mapping('game.get_game=0.1, *=1') == {'game.get_game': '0.1', '*': '1'}
+    assert parse_mapping('') == {}
+
+
+def test_structured_formatter():
+    record = _record(logging.INFO, 'Created game %s', 42)
+    record.endpoint = 'game.create'
+    entry = json.loads(StructuredFormatter().format(record))
+    assert entry['msg'] == 'Created game 42'
+    assert entry['level'] == 'INFO'
+    assert entry['endpoint'] == 'game.create'
+
+
+def test_unsampled_requests_keep_warnings_only():
+    app = Flask(__name__)
+    sampling = RequestSamplingFilter()
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    with app.test_request_context('/ping'):
+        app.preprocess_request()
+        g.log_sampled = False
+        assert not sampling.filter(_record(logging.DEBUG, 'noise'))
+        assert sampling.filter(_record(logging.WARNING, 'kept'))
+        g.log_sampled = True
+        assert sampling.filter(_record(logging.INFO, 'kept'))
+
+    # Outside a request everything passes
+    assert sampling.filter(_record(logging.DEBUG, 'startup'))
+
+
+def test_sample_rates_per_endpoint():
+    app = Flask(__name__)
+    config = LogConfig()
+    config.sample_rates = {'ping': 0.0}
+    config.default_sample_rate = 1.0
+    app.before_request(config._sample_request)
+
+    @app.route('/ping')
+    def ping():
+        return 'pong' if g.log_sampled else 'quiet'
+
+    @app.route('/other')
+    def other():
+        return 'pong' if g.log_sampled else 'quiet'
+
+    client = app.test_client()
+    assert client.get('/ping').data == b'quiet'
+    assert client.get('/other').data == b'pong'
+
+
+def test_queued_records_are_formatted_on_the_listener_thread():
+    rendered_on = []
+
+    class Game:
+        def __str__(self):
+            rendered_on.append(threading.current_thread())
+            return 'game 42'
+
+    output = []
+    target = logging.Handler()
+    target.emit = lambda record: output.append(StructuredFormatter().format(record))
+    listener = logging.handlers.QueueListener(queue.SimpleQueue(), target)
+    handler = LazyQueueHandler(listener.queue)
+    listener.start()
+    try:
+        handler.handle(_record(logging.INFO, 'Created %s', Game()))
+    finally:
+        listener.stop()
+    assert json.loads(output[0])['msg'] == 'Created game 42'
+    assert rendered_on and threading.current_thread() not in rendered_on
@@ -0,0 +1,31 @@
+import sys
+import os
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+
+from services.query_profiler import normalize_statement
+from tests.query_helpers import max_queries
+
+
+def test_normalize_statement_ignores_parameters():
+    first = normalize_statement("SELECT * FROM games\n WHERE game_id = %(game_id_1)s")
+    assert first == normalize_statement("SELECT * FROM games WHERE game_id = %(param_1)s")
+    assert normalize_statement("SELECT 1 WHERE a IN (%(a_1_1)s, %(a_1_2)s)") == \
+        normalize_statement("SELECT 1 WHERE a IN (%(a_1_1)s)")
+
+
+def test_capture_flags_repeated_statements():
+    engine = create_engine('sqlite://')
+    with engine.connect() as conn:
+        with max_queries(3) as stats:
+            for i in range(3):
+                conn.execute(text("SELECT :value"), {'value': i})
+        assert stats.count == 3
+        assert list(stats.repeated().values()) == [3]
+
+        with pytest.raises(AssertionError):
+            with max_queries(1):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
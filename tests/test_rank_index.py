@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+from types import SimpleNamespace
+
+from services.rank_index import RankIndex, ScoreTree
+
+
+def _index(rows):
+    index = RankIndex(refresh_interval=3600)
+    index.load(rows)
+    return index
+
+
+def test_score_tree_counts_match_a_sorted_list():
+    rng = random.Random(7)
+    scores = [rng.choice([0, 10, 20, rng.randint(0, 3000)]) for _ in range(200)]
+    tree = ScoreTree.from_scores(scores[:100])
+    for score in scores[100:]:
+        tree.add(score, 1)
+    ordered = sorted(scores)
+    for score in set(scores) | {5, 4000}:
+        assert tree.count_below(score) == sum(1 for s in scores if s < score)
+        assert tree.count_above(score) == sum(1 for s in scores if s > score)
+    assert [tree.score_at(p) for p in range(len(ordered))] == ordered
+
+
+def test_rank_percentile_and_neighbors():
+    index = _index([('a', 'ann', 50), ('b', 'ben', 30), ('c', 'cat', 30), ('d', 'dan', 10), ('e', 'eve', 0)])
+    assert [index.rank(u) for u in 'abcde'] == [1, 2, 2, 4, 5]
+    assert index.better_than('b') == 50.0
+    assert index.better_than('e') == 0
+    assert [(p.user_id, p.rank) for p in index.neighbors('c', 1)] == [('b', 2), ('c', 2), ('d', 4)]
+    assert [p.user_id for p in index.neighbors('a', 2)] == ['a', 'b', 'c']
+    assert index.rank('missing') is None
+
+
+def test_score_updates_move_players():
+    index = _index([('a', 'ann', 50), ('b', 'ben', 30)])
+    index.add_score('b', 40)
+    index.set_score('new', 5000, 'nia')
+    assert [index.rank(u) for u in ('new', 'b', 'a')] == [1, 2, 3]
+    assert [p.name for p in index.neighbors('b', 5)] == ['nia', 'ben', 'ann']
+
+
+def test_observe_only_adds_missing_players():
+    index = _index([('a', 'ann', 50)])
+    # A cached row older than the score the index already holds
+    index.observe(SimpleNamespace(user_id='a', username='ann', score=10))
+    index.observe(SimpleNamespace(user_id='b', username='ben', score=70))
+    assert [index.rank(u) for u in ('b', 'a')] == [1, 2]
+    assert index.neighbors('a', 0)[0].score == 50
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from services.request_metrics import BUCKETS, Histogram, RequestMetrics
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    histogram.observe(0.0005)
+    histogram.observe(0.003)
+    histogram.observe(100)
+    counts, total, count = histogram.snapshot()
+    assert count == 3
+    assert counts[0] == 1 and counts[-1] == 1
+    assert sum(counts) == 3
+    assert len(counts) == len(BUCKETS) + 1
+
+
+def test_render_prometheus_text():
+    app = Flask(__name__)
+    metrics = RequestMetrics()
+    metrics.init_app(app)
+    metrics.register_cache('things', lambda: {'hits': 3, 'misses': 1})
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        return {'id': item_id}
+
+    client = app.test_client()
+    client.get('/items/1')
+    client.get('/items/2')
+    client.get('/missing')
+
+    text = metrics.render()
+    assert 'medgen_request_duration_seconds_count{blueprint="",route="/items/<int:item_id>",method="GET"} 2' in text
+    assert 'medgen_responses_total{blueprint="",route="unmatched",status="404"} 1' in text
+    assert 'medgen_requests_in_flight 0' in text
+    assert 'medgen_cache_hits_total{cache="things"} 3' in text
@@ -0,0 +1,66 @@
+import sys
+import os
+import datetime
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from services.session_store import MemorySessionStore, SessionStore, SqliteSessionStore
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(ttl=60, max_entries=2)
+    store.set('1_a', {'game_id': 1})
+    store.set('2_a', {'game_id': 2})
+    assert store.get('1_a') == {'game_id': 1}
+    store.set('3_a', {'game_id': 3})
+
+    assert store.get('2_a') is None
+    assert store.get('1_a') is not None
+    stats = store.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['size'] == 2
+
+
+def test_memory_store_expires_idle_sessions():
+    store = MemorySessionStore(ttl=0.05)
+    store.set('1_a', {'game_id': 1})
+    store.set('2_a', {'game_id': 2})
+    time.sleep(0.1)
+    store.set('3_a', {'game_id': 3})
+
+    assert store.sweep() == 2
+    assert len(store) == 1
+    assert store.get('3_a') == {'game_id': 3}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    created_at = datetime.datetime(2025, 1, 1, 12, 30)
+    SqliteSessionStore(path).set('1_a', {'game_id': 1, 'created_at': created_at})
+
+    other = SqliteSessionStore(path)
+    assert other.get('1_a') == {'game_id': 1, 'created_at': created_at}
+    other.delete('1_a')
+    assert other.get('1_a') is None
+    assert other.stats()['misses'] == 1
+
+
+def test_sqlite_store_sweeps_expired_and_excess_sessions(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / 'sessions.db'), ttl=60, max_entries=2)
+    for i in range(4):
+        store.set(f'{i}_a', {'game_id': i})
+    assert store.sweep() == 2
+    assert len(store) == 2
+
+
+def test_incomplete_store_fails_when_built():
+    class GetOnlyStore(SessionStore):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyStore()
@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+from services.token_cache import TokenCache
+
+
+def test_verified_token_is_reused_until_expiry():
+    cache = TokenCache()
+    cache.put('token-a', {'uid': 'alice', 'exp': time.time() + 3600})
+    assert cache.get('token-a')['uid'] == 'alice'
+    assert cache.get('token-b') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+
+def test_tokens_expire_early_by_skew():
+    cache = TokenCache(expiry_skew=30)
+    cache.put('token-a', {'uid': 'alice', 'exp': time.time() + 10})
+    assert cache.get('token-a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_lru_bound_and_forget():
+    cache = TokenCache(max_entries=2)
+    exp = time.time() + 3600
+    for name in ('a', 'b', 'c'):
+        cache.put(name, {'uid': name, 'exp': exp})
+    assert cache.get('a') is None
+    assert cache.get('c')['uid'] == 'c'
+    cache.forget('c')
+    assert cache.get('c') is None
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from services.token_verifier import IdTokenVerifier, KeySource, StaticKeySource
+
+PROJECT = 'medgen-test'
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _token(kid='key-1', **overrides):
+    now = int(time.time())
+    claims = {
+        'iss': 'https://securetoken.google.com/' + PROJECT,
+        'aud': PROJECT,
+        'sub': 'alice',
+        'iat': now,
+        'exp': now + 3600,
+        'auth_time': now,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, KEY, algorithm='RS256', headers={'kid': kid})
+
+
+def _verifier():
+    verifier = IdTokenVerifier(PROJECT, StaticKeySource({'key-1': KEY.public_key()}))
+    verifier.refresh()
+    return verifier
+
+
+def test_verifies_locally_signed_token():
+    claims = _verifier().verify(_token())
+    assert claims['uid'] == 'alice'
+
+
+def test_rejects_wrong_project_and_expired_tokens():
+    verifier = _verifier()
+    with pytest.raises(jwt.InvalidAudienceError):
+        verifier.verify(_token(aud='other-project'))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.verify(_token(exp=int(time.time()) - 60))
+
+
+def test_unknown_key_falls_back():
+    verifier = _verifier()
+    assert verifier.verify(_token(kid='rotated')) is None
+    assert verifier.stats()['fallbacks'] == 1
+    # Without a project id everything goes to the Firebase SDK
+    assert IdTokenVerifier().verify(_token()) is None
+
+
+class _RotatingKeySource(KeySource):
+    """Serves key-1, then key-1 and key-2 from the second fetch on"""
+
+    def __init__(self):
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        keys = {'key-1': KEY.public_key()}
+        if self.fetches > 1:
+            keys['key-2'] = KEY.public_key()
+        return keys, None
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_unknown_key_during_throttle_triggers_next_fetch():
+    source = _RotatingKeySource()
+    verifier = IdTokenVerifier(PROJECT, source, retry_interval=0.3)
+    verifier.start()
+    try:
+        assert _wait_for(lambda: source.fetches == 1)
+        # Arrives while the thread waits out the retry interval after the first fetch
+        assert verifier.verify(_token(kid='key-2')) is None
+        assert _wait_for(lambda: source.fetches == 2)
+        assert verifier.verify(_token(kid='key-2'))['uid'] == 'alice'
+    finally:
+        verifier.stop()
+
+
+def test_key_source_must_implement_fetch():
+    with pytest.raises(TypeError):
+        KeySource()